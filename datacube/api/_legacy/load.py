@@ -146,7 +146,8 @@ def make_dask_array(sources,
 
     dsk_name = 'datacube_load_{name}-{token}'.format(name=measurement['name'], token=uuid.uuid4().hex)
 
-    irr_chunks, grid_chunks = _calculate_chunk_sizes(sources, geobox, dask_chunks)
+    irr_chunks, grid_chunks = _calculate_chunk_sizes(sources, geobox, dask_chunks,
+                                                     itemsize=np.dtype(measurement['dtype']).itemsize)
     sliced_irr_chunks = (1,) * sources.ndim
 
     dsk = {}
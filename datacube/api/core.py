@@ -1,9 +1,12 @@
 import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import groupby
 from typing import Union, Optional, Dict, Tuple
 import datetime
 
 import numpy
+import toolz
 import xarray
 from dask import array as da
 
@@ -137,7 +140,7 @@ class Datacube(object):
     def load(self, product=None, measurements=None, output_crs=None, resolution=None, resampling=None,
              skip_broken_datasets=False,
              dask_chunks=None, like=None, fuse_func=None, align=None, datasets=None, progress_cbk=None,
-             **query):
+             threads=None, **query):
         """
         Load data as an ``xarray`` object.  Each measurement will be a data variable in the :class:`xarray.Dataset`.
 
@@ -247,7 +250,8 @@ class Datacube(object):
 
         :param dict dask_chunks:
             If the data should be lazily loaded using :class:`dask.array.Array`,
-            specify the chunking size in each output dimension.
+            specify the chunking size in each output dimension. Dimensions that are not specified, or set
+            to ``'auto'``, are sized automatically, see :meth:`load_data`.
 
             See the documentation on using `xarray with dask <http://xarray.pydata.org/en/stable/dask.html>`_
             for more information.
@@ -279,6 +283,10 @@ class Datacube(object):
             if supplied will be called for every file read with `files_processed_so_far, total_files`. This is
             only applicable to non-lazy loads, ignored when using dask.
 
+        :param int threads:
+            Optional. Number of threads to use for reading and fusing data, time slices and bands are
+            spread across them. Only applicable to non-lazy loads, ignored when using dask.
+
         :return: Requested data in a :class:`xarray.Dataset`
         :rtype: :class:`xarray.Dataset`
         """
@@ -313,6 +321,7 @@ class Datacube(object):
                                 dask_chunks=dask_chunks,
                                 skip_broken_datasets=skip_broken_datasets,
                                 progress_cbk=progress_cbk,
+                                threads=threads,
                                 **legacy_args)
 
         return apply_aliases(result, datacube_product, measurements)
@@ -346,11 +355,9 @@ class Datacube(object):
             raise ValueError("must specify a product")
 
         datasets = self.index.datasets.search(limit=limit,
+                                              geopolygon=query.geopolygon,
                                               **query.search_terms)
 
-        if query.geopolygon is not None:
-            datasets = select_datasets_inside_polygon(datasets, query.geopolygon)
-
         if ensure_location:
             datasets = (dataset for dataset in datasets if dataset.uris)
 
@@ -461,15 +468,25 @@ class Datacube(object):
     @staticmethod
     def _dask_load(sources, geobox, measurements, dask_chunks,
                    skip_broken_datasets=False):
-        needed_irr_chunks, grid_chunks = _calculate_chunk_sizes(sources, geobox, dask_chunks)
+        all_dss = list(toolz.unique((ds for dss in sources.values.ravel() for ds in dss),
+                                    key=lambda ds: ds.id))
+
+        itemsize = max((numpy.dtype(m.dtype).itemsize for m in measurements), default=8)
+        needed_irr_chunks, grid_chunks = _calculate_chunk_sizes(sources, geobox, dask_chunks,
+                                                                itemsize=itemsize,
+                                                                native_chunks=_native_chunk_shape(all_dss, geobox))
         gbt = GeoboxTiles(geobox, grid_chunks)
         dsk = {}
 
+        # Reproject footprints of all datasets in one go, rather than once per dataset per tile lookup
+        extents = dict(zip((ds.id for ds in all_dss),
+                           geometry.batch_to_crs([ds.extent for ds in all_dss], geobox.crs)[0]))
+
         def chunk_datasets(dss, gbt):
             out = {}
             for ds in dss:
                 dsk[_tokenize_dataset(ds)] = ds
-                for idx in gbt.tiles(ds.extent):
+                for idx in gbt.tiles(extents[ds.id]):
                     out.setdefault(idx, []).append(ds)
             return out
 
@@ -488,41 +505,76 @@ class Datacube(object):
     @staticmethod
     def _xr_load(sources, geobox, measurements,
                  skip_broken_datasets=False,
-                 progress_cbk=None):
+                 progress_cbk=None,
+                 threads=None):
 
         def mk_cbk(cbk):
             if cbk is None:
                 return None
             n = 0
             n_total = sum(len(x) for x in sources.values.ravel())*len(measurements)
+            lock = threading.Lock()
 
             def _cbk(*ignored):
                 nonlocal n
-                n += 1
-                return cbk(n, n_total)
+                with lock:
+                    n += 1
+                    return cbk(n, n_total)
             return _cbk
 
         data = Datacube.create_storage(sources.coords, geobox, measurements)
         _cbk = mk_cbk(progress_cbk)
 
-        for index, datasets in numpy.ndenumerate(sources.values):
-            for m in measurements:
-                t_slice = data[m.name].values[index]
+        def all_slices():
+            for index, datasets in numpy.ndenumerate(sources.values):
+                for m in measurements:
+                    yield data[m.name].values[index], datasets, m
 
+        def fuse_slice(t_slice, datasets, m, cbk):
+            _fuse_measurement(t_slice, datasets, geobox, m,
+                              skip_broken_datasets=skip_broken_datasets,
+                              progress_cbk=cbk)
+
+        if threads is None or threads <= 1:
+            for t_slice, datasets, m in all_slices():
                 try:
-                    _fuse_measurement(t_slice, datasets, geobox, m,
-                                      skip_broken_datasets=skip_broken_datasets,
-                                      progress_cbk=_cbk)
+                    fuse_slice(t_slice, datasets, m, _cbk)
                 except (TerminateCurrentLoad, KeyboardInterrupt):
                     data.attrs['dc_partial_load'] = True
                     return data
 
+            return data
+
+        # Every (time slice, measurement) pair is written into its own part of
+        # the output, so they can all be fused independently of each other.
+        terminated = threading.Event()
+
+        def checked_cbk(*args):
+            # Tasks that are already running notice termination on the next file read
+            if terminated.is_set():
+                raise TerminateCurrentLoad()
+            if _cbk is not None:
+                _cbk(*args)
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(fuse_slice, t_slice, datasets, m, checked_cbk)
+                       for t_slice, datasets, m in all_slices()]
+            try:
+                for fut in as_completed(futures):
+                    fut.result()
+            except (TerminateCurrentLoad, KeyboardInterrupt):
+                data.attrs['dc_partial_load'] = True
+            finally:
+                terminated.set()
+                for fut in futures:
+                    fut.cancel()
+
         return data
 
     @staticmethod
     def load_data(sources, geobox, measurements, resampling=None,
                   fuse_func=None, dask_chunks=None, skip_broken_datasets=False,
-                  progress_cbk=None,
+                  progress_cbk=None, threads=None,
                   **extra):
         """
         Load data from :meth:`group_datasets` into an :class:`xarray.Dataset`.
@@ -554,7 +606,9 @@ class Datacube(object):
             If provided, the data will be loaded on demand using using :class:`dask.array.Array`.
             Should be a dictionary specifying the chunking size for each output dimension.
             Unspecified dimensions will be auto-guessed, currently this means use chunk size of 1 for non-spatial
-            dimensions and use whole dimension (no chunking unless specified) for spatial dimensions.
+            dimensions. Spatial dimensions are sized to keep chunks under dask's ``array.chunk-size`` (128MiB
+            by default), in multiples of the storage block size of the source product when the output grid
+            matches the product grid, whole dimension is used when it fits.
 
             See the documentation on using `xarray with dask <http://xarray.pydata.org/en/stable/dask.html>`_
             for more information.
@@ -563,6 +617,12 @@ class Datacube(object):
             if supplied will be called for every file read with `files_processed_so_far, total_files`. This is
             only applicable to non-lazy loads, ignored when using dask.
 
+        :param int threads:
+            If provided, time slices and bands are read and fused concurrently using this many threads.
+            Callbacks to ``progress_cbk`` can then come from any of these threads, but are never
+            concurrent. Raising :class:`TerminateCurrentLoad` from ``progress_cbk`` stops the load
+            early, as it does for single threaded loads. Only applicable to non-lazy loads.
+
         :rtype: xarray.Dataset
 
         .. seealso:: :meth:`find_datasets` :meth:`group_datasets`
@@ -607,7 +667,8 @@ class Datacube(object):
         else:
             return Datacube._xr_load(sources, geobox, measurements,
                                      skip_broken_datasets=skip_broken_datasets,
-                                     progress_cbk=progress_cbk)
+                                     progress_cbk=progress_cbk,
+                                     threads=threads)
 
     @staticmethod
     def measurement_data(sources, geobox, measurement, fuse_func=None, dask_chunks=None):
@@ -703,21 +764,41 @@ def output_geobox(like=None, output_crs=None, resolution=None, align=None,
     return geometry.GeoBox.from_geopolygon(geopolygon, resolution, crs, align)
 
 
-def select_datasets_inside_polygon(datasets, polygon):
+def select_datasets_inside_polygon(datasets, polygon, batch_size=1000):
     # Check against the bounding box of the original scene, can throw away some portions
     assert polygon is not None
     query_crs = polygon.crs
-    for dataset in datasets:
-        if intersects(polygon, dataset.extent.to_crs(query_crs)):
-            yield dataset
-
-
-def fuse_lazy(datasets, geobox, measurement, skip_broken_datasets=False, prepend_dims=0):
-    prepend_shape = (1,) * prepend_dims
-    data = numpy.full(geobox.shape, measurement.nodata, dtype=measurement.dtype)
-    _fuse_measurement(data, datasets, geobox, measurement,
-                      skip_broken_datasets=skip_broken_datasets)
-    return data.reshape(prepend_shape + geobox.shape)
+    query_bbox = polygon.boundingbox
+    for batch in toolz.partition_all(batch_size, datasets):
+        extents, bbs = geometry.batch_to_crs([ds.extent for ds in batch], query_crs)
+        candidates = geometry.bboxes_intersect(bbs, query_bbox)
+        for dataset, extent, candidate in zip(batch, extents, candidates):
+            if candidate and intersects(polygon, extent):
+                yield dataset
+
+
+def fuse_lazy(datasets, geobox, measurement, skip_broken_datasets=False, prepend_dims=0, block_shape=None):
+    """ Load and fuse pixels for one dask chunk.
+
+    :param datasets: Datasets to fuse into a single 2d slice, or when ``block_shape`` is
+                     given, a list with one such list per slice of the block in row-major order
+    :param prepend_dims: Number of 1-sized dimensions to add in front of a single slice
+    :param block_shape: Shape of the non-spatial part of the block to fill
+    """
+    if block_shape is None:
+        prepend_shape = (1,) * prepend_dims
+        data = numpy.full(geobox.shape, measurement.nodata, dtype=measurement.dtype)
+        _fuse_measurement(data, datasets, geobox, measurement,
+                          skip_broken_datasets=skip_broken_datasets)
+        return data.reshape(prepend_shape + geobox.shape)
+
+    block_shape = tuple(block_shape)
+    data = numpy.full(block_shape + geobox.shape, measurement.nodata, dtype=measurement.dtype)
+    for idx, dss in zip(numpy.ndindex(*block_shape), datasets):
+        if dss:
+            _fuse_measurement(data[idx], dss, geobox, measurement,
+                              skip_broken_datasets=skip_broken_datasets)
+    return data
 
 
 def _fuse_measurement(dest, datasets, geobox, measurement,
@@ -734,7 +815,8 @@ def _fuse_measurement(dest, datasets, geobox, measurement,
 
 
 def get_bounds(datasets, crs):
-    bbox = geometry.bbox_union(ds.extent.to_crs(crs).boundingbox for ds in datasets)
+    _, bbs = geometry.batch_to_crs([ds.extent for ds in datasets], crs)
+    bbox = geometry.bboxes_union(bbs)
     return geometry.box(*bbox, crs=crs)
 
 
@@ -755,9 +837,79 @@ def dataset_type_to_row(dt):
     return row
 
 
+DEFAULT_CHUNK_BYTES = 128 * (1 << 20)
+
+
+def _max_chunk_bytes() -> int:
+    """ Target size of automatically sized chunks, dask's ``array.chunk-size`` when configured """
+    try:
+        import dask
+        from dask.utils import parse_bytes
+        return parse_bytes(dask.config.get('array.chunk-size'))
+    except (ImportError, AttributeError, KeyError):
+        return DEFAULT_CHUNK_BYTES
+
+
+def _native_chunk_shape(datasets, geobox: GeoBox) -> Optional[Tuple[int, int]]:
+    """
+    Spatial chunk shape, in pixels, of the storage units of the first product whose grid
+    matches ``geobox`` (same CRS and resolution). This is the NetCDF/GeoTIFF block size from
+    ``storage.chunking`` when present, or the tile size of the product ``GridSpec`` otherwise.
+    """
+    for product in toolz.unique((ds.type for ds in datasets), key=lambda p: p.name):
+        grid_spec = product.grid_spec
+        if grid_spec is None or grid_spec.crs != geobox.crs:
+            continue
+        if not numpy.allclose(grid_spec.resolution, geobox.resolution):
+            continue
+
+        chunking = product.definition['storage'].get('chunking', {})
+        if all(dim in chunking for dim in geobox.dimensions):
+            return tuple(int(chunking[dim]) for dim in geobox.dimensions)
+        return grid_spec.tile_resolution
+    return None
+
+
+def _auto_chunks(shape: Tuple[int, ...],
+                 chunks: Tuple[Optional[int], ...],
+                 block: Tuple[int, ...],
+                 max_pixels: int) -> Tuple[int, ...]:
+    """
+    Fill in ``None`` entries of ``chunks`` so that a chunk has at most ``max_pixels`` pixels.
+
+    Whole dimension is used when it fits, otherwise chunks are as square as possible
+    and rounded down to a multiple of ``block`` where budget allows.
+    """
+    auto = sorted((i for i, c in enumerate(chunks) if c is None), key=lambda i: shape[i])
+    budget = max(1, max_pixels // int(numpy.prod([c for c in chunks if c is not None])))
+    out = list(chunks)
+
+    for n_left, i in zip(range(len(auto), 0, -1), auto):
+        n = int(budget ** (1 / n_left) + 1e-6)
+        if n >= shape[i]:
+            n = shape[i]
+        elif n >= block[i]:
+            n -= n % block[i]
+        out[i] = max(1, n)
+        budget = max(1, budget // out[i])
+
+    return tuple(out)
+
+
 def _calculate_chunk_sizes(sources: xarray.DataArray,
                            geobox: GeoBox,
-                           dask_chunks: Dict[str, Union[str, int]]):
+                           dask_chunks: Dict[str, Union[str, int]],
+                           itemsize: int = 8,
+                           native_chunks: Optional[Tuple[int, int]] = None,
+                           max_chunk_bytes: Optional[int] = None):
+    """
+    Resolve user supplied ``dask_chunks`` into chunk sizes for every dimension.
+
+    Non-spatial dimensions default to chunks of 1. Spatial dimensions that are not set, or set
+    to ``'auto'``, are sized so that one chunk of the largest data type (``itemsize`` bytes per pixel)
+    takes at most ``max_chunk_bytes``, rounded to a multiple of ``native_chunks`` (the block size of the
+    source storage) where possible. Negative values mean whole dimension.
+    """
     valid_keys = sources.dims + geobox.dimensions
     bad_keys = set(dask_chunks) - set(valid_keys)
     if bad_keys:
@@ -767,13 +919,15 @@ def _calculate_chunk_sizes(sources: xarray.DataArray,
                    for dim, sz in zip(sources.dims + geobox.dimensions,
                                       sources.shape + geobox.shape)}  # type: Dict[str, int]
 
-    # defaults: 1 for non-spatial, whole dimension for Y/X
+    # defaults: 1 for non-spatial, budget limited for Y/X
     chunk_defaults = dict(**{dim: 1 for dim in sources.dims},
-                          **{dim: -1 for dim in geobox.dimensions})   # type: Dict[str, int]
+                          **{dim: None for dim in geobox.dimensions})   # type: Dict[str, Optional[int]]
 
-    def _resolve(k, v: Optional[Union[str, int]]) -> int:
+    def _resolve(k, v: Optional[Union[str, int]]) -> Optional[int]:
         if v is None or v == "auto":
-            v = _resolve(k, chunk_defaults[k])
+            v = chunk_defaults[k]
+            if v is None:
+                return None
 
         if isinstance(v, int):
             if v < 0:
@@ -784,6 +938,11 @@ def _calculate_chunk_sizes(sources: xarray.DataArray,
     irr_chunks = tuple(_resolve(dim, dask_chunks.get(dim)) for dim in sources.dims)
     grid_chunks = tuple(_resolve(dim, dask_chunks.get(dim)) for dim in geobox.dimensions)
 
+    if None in grid_chunks:
+        max_chunk_bytes = max_chunk_bytes or _max_chunk_bytes()
+        max_pixels = max_chunk_bytes // (itemsize * int(numpy.prod(irr_chunks)))
+        grid_chunks = _auto_chunks(geobox.shape, grid_chunks, native_chunks or (1, 1), max_pixels)
+
     return irr_chunks, grid_chunks
 
 
@@ -791,6 +950,14 @@ def _tokenize_dataset(dataset):
     return 'dataset-{}'.format(dataset.id.hex)
 
 
+def _chunk_sizes(n: int, chunk: int) -> Tuple[int, ...]:
+    """ Split dimension of size ``n`` into chunks of at most ``chunk`` elements.
+    """
+    if n == 0:
+        return (0,)
+    return tuple(min(chunk, n - i) for i in range(0, n, chunk))
+
+
 # pylint: disable=too-many-locals
 def _make_dask_array(chunked_srcs,
                      dsk,
@@ -804,41 +971,48 @@ def _make_dask_array(chunked_srcs,
     dsk_name = 'dc_load_{name}-{token}'.format(name=measurement.name, token=token)
 
     needed_irr_chunks, grid_chunks = chunks[:-2], chunks[-2:]
-    actual_irr_chunks = (1,) * len(needed_irr_chunks)
+    irr_chunks = tuple(_chunk_sizes(n, c)
+                       for n, c in zip(chunked_srcs.shape, needed_irr_chunks))
+    irr_starts = tuple(numpy.cumsum((0,) + cc[:-1]) for cc in irr_chunks)
 
     # we can have up to 4 empty chunk shapes: whole, right edge, bottom edge and
-    # bottom right corner
+    # bottom right corner, times number of distinct non-spatial block shapes
     #  W R
     #  B BR
-    empties = {}  # type Dict[Tuple[int,int], str]
+    empties = {}  # type Dict[Tuple[int,...], str]
 
-    def _mk_empty(shape: Tuple[int, int]) -> str:
+    def _mk_empty(shape: Tuple[int, ...]) -> str:
         name = empties.get(shape, None)
         if name is not None:
             return name
 
-        name = 'empty_{}x{}-{token}'.format(*shape, token=token)
-        dsk[name] = (numpy.full, actual_irr_chunks + shape, measurement.nodata, measurement.dtype)
+        name = 'empty_{}-{token}'.format('x'.join(map(str, shape)), token=token)
+        dsk[name] = (numpy.full, shape, measurement.nodata, measurement.dtype)
         empties[shape] = name
 
         return name
 
-    for irr_index, tiled_dss in numpy.ndenumerate(chunked_srcs.values):
-        key_prefix = (dsk_name, *irr_index)
+    for block_index in numpy.ndindex(*(len(cc) for cc in irr_chunks)):
+        key_prefix = (dsk_name, *block_index)
+        block_shape = tuple(cc[i] for cc, i in zip(irr_chunks, block_index))
+        block_roi = tuple(slice(ss[i], ss[i] + n)
+                          for ss, i, n in zip(irr_starts, block_index, block_shape))
+        tiled_dss_block = chunked_srcs.values[block_roi].ravel()
 
         # all spatial chunks
         for idx in numpy.ndindex(gbt.shape):
-            dss = tiled_dss.get(idx, None)
+            dss_block = [tiled_dss.get(idx, []) for tiled_dss in tiled_dss_block]
 
-            if dss is None:
-                val = _mk_empty(gbt.chunk_shape(idx))
+            if not any(dss_block):
+                val = _mk_empty(block_shape + gbt.chunk_shape(idx))
             else:
                 val = (fuse_lazy,
-                       [_tokenize_dataset(ds) for ds in dss],
+                       [[_tokenize_dataset(ds) for ds in dss] for dss in dss_block],
                        gbt[idx],
                        measurement,
                        skip_broken_datasets,
-                       chunked_srcs.ndim)
+                       0,
+                       block_shape)
 
             dsk[key_prefix + idx] = val
 
@@ -848,12 +1022,10 @@ def _make_dask_array(chunked_srcs,
     y_shapes[-1], x_shapes[-1] = gbt.chunk_shape(tuple(n-1 for n in gbt.shape))
 
     data = da.Array(dsk, dsk_name,
-                    chunks=actual_irr_chunks + (tuple(y_shapes), tuple(x_shapes)),
+                    chunks=irr_chunks + (tuple(y_shapes), tuple(x_shapes)),
                     dtype=measurement.dtype,
                     shape=(chunked_srcs.shape + gbt.base.shape))
 
-    if needed_irr_chunks != actual_irr_chunks:
-        data = data.rechunk(chunks=chunks)
     return data
 
 
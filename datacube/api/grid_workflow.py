@@ -7,6 +7,7 @@ from collections import OrderedDict
 import warnings
 import pandas as pd
 
+from datacube.utils import geometry
 from datacube.utils.geometry import intersects
 from .query import Query, query_group_by
 from .core import Datacube, apply_aliases
@@ -191,8 +192,11 @@ class GridWorkflow(object):
             geobox = geobox.buffered(*tile_buffer) if tile_buffer else geobox
 
             datasets, query = self._find_datasets(geobox.extent, indexers)
-            for dataset in datasets:
-                if intersects(geobox.extent, dataset.extent.to_crs(self.grid_spec.crs)):
+            datasets = list(datasets)
+            extents, bbs = geometry.batch_to_crs([dataset.extent for dataset in datasets], self.grid_spec.crs)
+            candidates = geometry.bboxes_intersect(bbs, geobox.extent.boundingbox)
+            for dataset, extent, candidate in zip(datasets, extents, candidates):
+                if candidate and intersects(geobox.extent, extent):
                     add_dataset_to_cells(cell_index, geobox, dataset)
             return cells
         else:
@@ -205,11 +209,14 @@ class GridWorkflow(object):
                     tile_index for tile_index, tile_geobox in
                     self.grid_spec.tiles_from_geopolygon(query.geopolygon, geobox_cache=geobox_cache))
 
-                for dataset in datasets:
+                datasets = list(datasets)
+                extents, bbs = geometry.batch_to_crs([dataset.extent for dataset in datasets],
+                                                     self.grid_spec.crs)
+
+                for dataset, dataset_extent, bbox in zip(datasets, extents, bbs):
                     # Go through our datasets and see which tiles each dataset produces, and whether they intersect
                     # our query geopolygon.
-                    dataset_extent = dataset.extent.to_crs(self.grid_spec.crs)
-                    bbox = dataset_extent.boundingbox
+                    bbox = geometry.BoundingBox(*bbox)
                     bbox = bbox.buffered(*tile_buffer) if tile_buffer else bbox
 
                     for tile_index, tile_geobox in self.grid_spec.tiles(bbox, geobox_cache=geobox_cache):
@@ -229,7 +236,7 @@ class GridWorkflow(object):
         query = Query(index=self.index, geopolygon=geopolygon, **indexers)
         if not query.product:
             raise RuntimeError('must specify a product')
-        datasets = self.index.datasets.search_eager(**query.search_terms)
+        datasets = self.index.datasets.search(**query.search_terms)
         return datasets, query
 
     @staticmethod
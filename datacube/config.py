@@ -31,6 +31,8 @@ db_database: datacube
 index_driver: default
 # If a connection is unused for this length of time, expect it to be invalidated.
 db_connection_timeout: 60
+# Number of rows fetched at a time from large search results, 0 fetches them all at once.
+db_fetch_size: 1000
 
 [user]
 # Which environment to use when none is specified explicitly.
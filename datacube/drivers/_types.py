@@ -55,6 +55,12 @@ class GeoRasterReader(object, metaclass=ABCMeta):
     def nodata(self) -> Optional[Union[int, float]]:
         ...  # pragma: no cover
 
+    @property
+    def overviews(self) -> Tuple[int, ...]:
+        """ Decimation factors of available overviews, empty if none or unknown.
+        """
+        return ()
+
     @abstractmethod
     def read(self,
              window: Optional[RasterWindow] = None,
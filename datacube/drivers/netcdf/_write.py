@@ -1,7 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
 
+import numpy as np
+import dask.array as da
+from dask.array.core import slices_from_chunks
+
 from . import writer as netcdf_writer
+from datacube.storage._rio import _HDF5_LOCK
 from datacube.utils import DatacubeException
 
 
@@ -56,6 +62,44 @@ def create_netcdf_storage_unit(filename,
     return nco
 
 
+def _compute_block(data, roi):
+    return netcdf_writer.netcdfy_data(np.asarray(data[roi]))
+
+
+def write_variable(ncvar, data):
+    """
+    Write array into an already created NetCDF variable.
+
+    Dask arrays are streamed one chunk at a time: the next chunk is computed in
+    a background thread while the current one is being compressed and written
+    to disk, so at most two chunks are held in memory at any time. Writes hold
+    the same HDF5 lock as reads of NetCDF sources, as HDF5 may not be thread safe.
+    Compression happens inside HDF5 under that lock, so when the sources are
+    NetCDF files reading the next chunk does not overlap with writing this one.
+
+    :param netCDF4.Variable ncvar: destination variable
+    :param data: :class:`numpy.ndarray` or :class:`dask.array.Array` of the same shape
+    """
+    if not isinstance(data, da.Array):
+        data = netcdf_writer.netcdfy_data(np.asarray(data))
+        with _HDF5_LOCK:
+            ncvar[:] = data
+        return
+
+    rois = list(slices_from_chunks(data.chunks))
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(_compute_block, data, rois[0])
+
+        for roi, next_roi in zip(rois, rois[1:] + [None]):
+            block = pending.result()
+            if next_roi is not None:
+                pending = pool.submit(_compute_block, data, next_roi)
+
+            with _HDF5_LOCK:
+                ncvar[roi] = block
+
+
 def write_dataset_to_netcdf(dataset, filename, global_attributes=None, variable_params=None,
                             netcdfparams=None):
     """
@@ -63,6 +107,9 @@ def write_dataset_to_netcdf(dataset, filename, global_attributes=None, variable_
 
     Requires a spatial Dataset, with attached coordinates and global crs attribute.
 
+    Dask backed variables are written chunk by chunk, see :func:`write_variable`,
+    for best results dask chunks should be multiples of the NetCDF ``chunksizes``.
+
     :param `xarray.Dataset` dataset:
     :param filename: Output filename
     :param global_attributes: Global file attributes. dict of attr_name: attr_value
@@ -90,7 +137,8 @@ def write_dataset_to_netcdf(dataset, filename, global_attributes=None, variable_
                                      global_attributes,
                                      netcdfparams)
 
-    for name, variable in dataset.data_vars.items():
-        nco[name][:] = netcdf_writer.netcdfy_data(variable.values)
-
-    nco.close()
+    try:
+        for name, variable in dataset.data_vars.items():
+            write_variable(nco[name], variable.data)
+    finally:
+        nco.close()
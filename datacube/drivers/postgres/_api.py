@@ -15,7 +15,7 @@ import uuid
 
 from sqlalchemy import cast
 from sqlalchemy import delete
-from sqlalchemy import select, text, bindparam, and_, or_, func, literal, distinct
+from sqlalchemy import select, text, bindparam, and_, or_, func, literal, distinct, exists
 from sqlalchemy.dialects.postgresql import INTERVAL
 from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.exc import IntegrityError
@@ -29,9 +29,9 @@ from ._fields import (
     parse_fields, Expression, PgField, PgExpression,
     NativeField, DateDocField, SimpleDocField
 )
-from .sql import escape_pg_identifier
+from .sql import escape_pg_identifier, POLYGON
 from ._schema import (
-    DATASET, DATASET_SOURCE, METADATA_TYPE, DATASET_LOCATION, DATASET_TYPE
+    DATASET, DATASET_SOURCE, METADATA_TYPE, DATASET_LOCATION, DATASET_TYPE, DATASET_FOOTPRINT
 )
 
 from typing import Iterable, Tuple
@@ -68,6 +68,27 @@ PGCODE_FOREIGN_KEY_VIOLATION = '23503'
 _LOG = logging.getLogger(__name__)
 
 
+def _footprint_filter(footprint):
+    """
+    Datasets with a footprint overlapping any of the given polygons, or without a recorded footprint.
+
+    Also returns a column telling whether the footprint was checked for that dataset.
+
+    :param footprint: Polygons in EPSG:4326, each a sequence of (lon, lat) points
+    """
+    has_footprint = exists().where(DATASET_FOOTPRINT.c.dataset_ref == DATASET.c.id)
+    # Uncorrelated, so that it's evaluated once using the GiST index on footprint
+    overlaps = DATASET.c.id.in_(
+        select([
+            DATASET_FOOTPRINT.c.dataset_ref
+        ]).where(
+            or_(*(DATASET_FOOTPRINT.c.footprint.op('&&')(literal(points, POLYGON))
+                  for points in footprint))
+        )
+    )
+    return or_(overlaps, ~has_footprint), has_footprint.label('footprint_checked')
+
+
 def _split_uri(uri):
     """
     Split the scheme and the remainder of the URI.
@@ -229,6 +250,41 @@ class PostgresDbAPI(object):
         )
         return ret.rowcount > 0
 
+    def insert_datasets(self, datasets):
+        """
+        Insert several datasets with one statement, skipping those already indexed.
+
+        :param datasets: Sequence of (metadata_doc, dataset_id, dataset_type_id)
+        :return: ids of the datasets that were inserted
+        :rtype: set[uuid.UUID]
+        """
+        if not datasets:
+            return set()
+
+        type_ids = {dataset_type_id for _, _, dataset_type_id in datasets}
+        metadata_type_refs = dict(self._connection.execute(
+            select([
+                DATASET_TYPE.c.id, DATASET_TYPE.c.metadata_type_ref
+            ]).where(
+                DATASET_TYPE.c.id.in_(type_ids)
+            )
+        ).fetchall())
+
+        res = self._connection.execute(
+            insert(DATASET).values([
+                dict(id=dataset_id,
+                     dataset_type_ref=dataset_type_id,
+                     metadata_type_ref=metadata_type_refs.get(dataset_type_id),
+                     metadata=metadata_doc)
+                for metadata_doc, dataset_id, dataset_type_id in datasets
+            ]).on_conflict_do_nothing(
+                index_elements=['id']
+            ).returning(
+                DATASET.c.id
+            )
+        )
+        return {row[0] for row in res}
+
     def update_dataset(self, metadata_doc, dataset_id, dataset_type_id):
         """
         Update dataset
@@ -248,6 +304,43 @@ class PostgresDbAPI(object):
         )
         return res.rowcount > 0
 
+    def has_dataset_footprints(self):
+        """
+        Does the database have the (optional) footprint table used for spatial searches?
+
+        :rtype: bool
+        """
+        return _core.has_dataset_footprints(self._connection)
+
+    def insert_dataset_footprint(self, dataset_id, footprint):
+        """
+        Record footprint of a dataset, replacing any existing one.
+
+        :type dataset_id: str or uuid.UUID
+        :param footprint: Polygons in EPSG:4326, each a sequence of (lon, lat) points
+        """
+        self._connection.execute(
+            delete(DATASET_FOOTPRINT).where(DATASET_FOOTPRINT.c.dataset_ref == dataset_id)
+        )
+        if footprint:
+            self._connection.execute(
+                DATASET_FOOTPRINT.insert(),
+                [dict(dataset_ref=dataset_id, part=part, footprint=points)
+                 for part, points in enumerate(footprint)]
+            )
+
+    def insert_dataset_footprints(self, footprints):
+        """
+        Record footprints of several newly added datasets with one statement.
+
+        :param footprints: Sequence of (dataset_id, footprint), see :meth:`insert_dataset_footprint`
+        """
+        rows = [dict(dataset_ref=dataset_id, part=part, footprint=points)
+                for dataset_id, footprint in footprints
+                for part, points in enumerate(footprint)]
+        if rows:
+            self._connection.execute(DATASET_FOOTPRINT.insert().values(rows))
+
     def insert_dataset_location(self, dataset_id, uri):
         """
         Add a location to a dataset if it is not already recorded.
@@ -272,6 +365,32 @@ class PostgresDbAPI(object):
 
         return r.rowcount > 0
 
+    def insert_dataset_locations(self, locations):
+        """
+        Add several dataset locations with one statement, skipping those already recorded.
+
+        Locations of the same dataset are recorded in the given order, so the last one will be
+        the most recent.
+
+        :param locations: Sequence of (dataset_id, uri)
+        :return: Number of locations added
+        :rtype: int
+        """
+        if not locations:
+            return 0
+
+        rows = []
+        for dataset_id, uri in locations:
+            scheme, body = _split_uri(uri)
+            rows.append(dict(dataset_ref=dataset_id, uri_scheme=scheme, uri_body=body))
+
+        r = self._connection.execute(
+            insert(DATASET_LOCATION).values(rows).on_conflict_do_nothing(
+                index_elements=['uri_scheme', 'uri_body', 'dataset_ref']
+            )
+        )
+        return r.rowcount
+
     def contains_dataset(self, dataset_id):
         return bool(
             self._connection.execute(
@@ -332,6 +451,34 @@ class PostgresDbAPI(object):
                 raise MissingRecordError("Referenced source dataset doesn't exist")
             raise
 
+    def insert_dataset_sources(self, edges):
+        """
+        Add several lineage links with one statement, skipping those already recorded.
+
+        :param edges: Sequence of (classifier, dataset_id, source_dataset_id)
+        :return: Number of links added
+        :rtype: int
+        """
+        if not edges:
+            return 0
+
+        try:
+            r = self._connection.execute(
+                insert(DATASET_SOURCE).values([
+                    dict(classifier=classifier,
+                         dataset_ref=dataset_id,
+                         source_dataset_ref=source_dataset_id)
+                    for classifier, dataset_id, source_dataset_id in edges
+                ]).on_conflict_do_nothing(
+                    index_elements=['classifier', 'dataset_ref']
+                )
+            )
+            return r.rowcount
+        except IntegrityError as e:
+            if e.orig.pgcode == PGCODE_FOREIGN_KEY_VIOLATION:
+                raise MissingRecordError("Referenced source dataset doesn't exist")
+            raise
+
     def archive_dataset(self, dataset_id):
         self._connection.execute(
             DATASET.update().where(
@@ -437,13 +584,16 @@ class PostgresDbAPI(object):
 
     @staticmethod
     def search_datasets_query(expressions, source_exprs=None,
-                              select_fields=None, with_source_ids=False, limit=None):
+                              select_fields=None, with_source_ids=False, limit=None,
+                              footprint=None):
         """
         :type expressions: Tuple[Expression]
         :type source_exprs: Tuple[Expression]
         :type select_fields: Iterable[PgField]
         :type with_source_ids: bool
         :type limit: int
+        :param footprint: Only datasets overlapping one of these EPSG:4326 polygons (or without a footprint).
+                          When returning full datasets a ``footprint_checked`` column is added.
         :rtype: sqlalchemy.Expression
         """
 
@@ -473,6 +623,12 @@ class PostgresDbAPI(object):
         from_expression = PostgresDbAPI._from_expression(DATASET, expressions, select_fields)
         where_expr = and_(DATASET.c.archived == None, *raw_expressions)
 
+        if footprint:
+            footprint_expr, footprint_checked = _footprint_filter(footprint)
+            where_expr = and_(where_expr, footprint_expr)
+            if not select_fields:
+                select_columns += (footprint_checked,)
+
         if not source_exprs:
             return (
                 select(
@@ -526,14 +682,15 @@ class PostgresDbAPI(object):
 
     def search_datasets(self, expressions,
                         source_exprs=None, select_fields=None,
-                        with_source_ids=False, limit=None):
+                        with_source_ids=False, limit=None, footprint=None):
         """
         :type with_source_ids: bool
         :type select_fields: tuple[datacube.drivers.postgres._fields.PgField]
         :type expressions: tuple[datacube.drivers.postgres._fields.PgExpression]
         """
         select_query = self.search_datasets_query(expressions, source_exprs,
-                                                  select_fields, with_source_ids, limit)
+                                                  select_fields, with_source_ids, limit,
+                                                  footprint=footprint)
         return self._connection.execute(select_query)
 
     @staticmethod
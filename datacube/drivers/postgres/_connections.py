@@ -37,6 +37,7 @@ except (ImportError, KeyError):
     # No default on Windows and some other systems
     DEFAULT_DB_USER = None
 DEFAULT_DB_PORT = 5432
+DEFAULT_FETCH_SIZE = 1000
 
 
 class PostgresDb(object):
@@ -54,10 +55,12 @@ class PostgresDb(object):
     or else use a separate instance of this class in each process.
     """
 
-    def __init__(self, engine):
+    def __init__(self, engine, fetch_size=DEFAULT_FETCH_SIZE):
         # We don't recommend using this constructor directly as it may change.
         # Use static methods PostgresDb.create() or PostgresDb.from_config()
         self._engine = engine
+        self._fetch_size = fetch_size
+        self._has_footprints = None
 
     @classmethod
     def from_config(cls, config, application_name=None, validate_connection=True):
@@ -71,12 +74,13 @@ class PostgresDb(object):
             config.get('db_port', DEFAULT_DB_PORT),
             application_name=app_name,
             validate=validate_connection,
-            pool_timeout=int(config.get('db_connection_timeout', 60))
+            pool_timeout=int(config.get('db_connection_timeout', 60)),
+            fetch_size=int(config.get('db_fetch_size', DEFAULT_FETCH_SIZE))
         )
 
     @classmethod
     def create(cls, hostname, database, username=None, password=None, port=None,
-               application_name=None, validate=True, pool_timeout=60):
+               application_name=None, validate=True, pool_timeout=60, fetch_size=DEFAULT_FETCH_SIZE):
         engine = cls._create_engine(
             EngineUrl(
                 'postgresql',
@@ -97,7 +101,7 @@ class PostgresDb(object):
                     'An administrator must run init:\n\t{init_command}'.format(
                         init_command='datacube -v system init'
                     ))
-        return PostgresDb(engine)
+        return PostgresDb(engine, fetch_size=fetch_size)
 
     @staticmethod
     def _create_engine(url, application_name=None, pool_timeout=60):
@@ -179,10 +183,24 @@ class PostgresDb(object):
         """
         is_new = _core.ensure_db(self._engine, with_permissions=with_permissions)
         if not is_new:
-            _core.update_schema(self._engine)
+            _core.update_schema(self._engine, with_permissions=with_permissions)
 
+        self._has_footprints = None
         return is_new
 
+    def has_dataset_footprints(self):
+        """
+        Does the database have the (optional) footprint table used for spatial searches?
+
+        Only looked up once, the answer is remembered until :meth:`init` is called again.
+
+        :rtype: bool
+        """
+        if self._has_footprints is None:
+            with self.connect() as connection:
+                self._has_footprints = connection.has_dataset_footprints()
+        return self._has_footprints
+
     @contextmanager
     def connect(self):
         """
@@ -202,6 +220,34 @@ class PostgresDb(object):
             yield _api.PostgresDbAPI(connection)
             connection.close()
 
+    @contextmanager
+    def stream(self):
+        """
+        Borrow a connection for reading large query results.
+
+        Queries are run inside a read-only transaction on a server-side cursor, and rows are
+        fetched ``db_fetch_size`` at a time, rather than the whole result being buffered on the client.
+
+        As with connect(), don't hold on to it for longer than needed: the transaction stays open
+        until all results are consumed.
+        """
+        if not self._fetch_size:
+            with self.connect() as connection:
+                yield connection
+            return
+
+        with self._engine.connect() as connection:
+            # Server-side cursors need a real transaction, the engine itself runs in autocommit mode.
+            # The isolation level is reset when the connection goes back to the pool.
+            reader = connection.execution_options(isolation_level='REPEATABLE READ')
+            transaction = reader.begin()
+            try:
+                reader.execute(text('SET TRANSACTION READ ONLY'))
+                yield _api.PostgresDbAPI(reader.execution_options(stream_results=True,
+                                                                  max_row_buffer=self._fetch_size))
+            finally:
+                transaction.rollback()
+
     @contextmanager
     def begin(self):
         """
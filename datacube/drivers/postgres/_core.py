@@ -105,6 +105,10 @@ def ensure_db(engine, with_permissions=True):
         grant create on schema {schema} to agdc_manage;
         """.format(schema=SCHEMA_NAME))
 
+        # Older databases get the footprint table from update_schema(), which grants it itself.
+        if pg_exists(c, schema_qualified('dataset_footprint')):
+            _grant_footprint_table(c)
+
     c.close()
 
     return is_new
@@ -136,7 +140,7 @@ def schema_is_latest(engine):
     return has_dataset_source_update and has_uri_searches and has_dataset_location
 
 
-def update_schema(engine):
+def update_schema(engine, with_permissions=True):
     """
     Instead of versioning our schema, this function ensures we are running against the latest
     version of the database schema.
@@ -184,6 +188,43 @@ def update_schema(engine):
         """.format(schema=SCHEMA_NAME))
         _LOG.info('Completed uri-search update')
 
+    # Footprint table for spatial searches. Existing datasets are not back-filled: searches fall back to
+    # checking the extent of any dataset without a footprint on the client.
+    if not pg_exists(engine, schema_qualified('dataset_footprint')):
+        _LOG.info('Applying dataset footprint update')
+        # Switch to 'agdc_admin' (for this transaction only), so that it's owned like the rest of the schema.
+        engine.execute("""
+        begin;
+          {set_role}
+          create table {schema}.dataset_footprint (
+            dataset_ref uuid not null,
+            part smallint not null,
+            footprint polygon not null,
+            constraint pk_dataset_footprint primary key (dataset_ref, part),
+            constraint fk_dataset_footprint_dataset_ref_dataset foreign key (dataset_ref)
+              references {schema}.dataset (id)
+          );
+          create index ix_{schema}_dataset_footprint_footprint on {schema}.dataset_footprint using gist (footprint);
+        commit;
+        """.format(schema=SCHEMA_NAME, set_role='set local role agdc_admin;' if with_permissions else ''))
+        if with_permissions:
+            _grant_footprint_table(engine)
+        _LOG.info('Completed dataset footprint update')
+
+
+def has_dataset_footprints(conn):
+    """
+    Is the (optional) dataset footprint table available for spatial searches?
+    """
+    return pg_exists(conn, schema_qualified('dataset_footprint'))
+
+
+def _grant_footprint_table(conn):
+    conn.execute("""
+    grant select on {schema}.dataset_footprint to agdc_user;
+    grant insert, delete on {schema}.dataset_footprint to agdc_ingest;
+    """.format(schema=SCHEMA_NAME))
+
 
 def _ensure_role(engine, name, inherits_from=None, add_user=False, create_db=False):
     if has_role(engine, name):
@@ -6,7 +6,7 @@ Tables for indexing the datasets which were ingested into the AGDC.
 import logging
 
 from sqlalchemy import ForeignKey, UniqueConstraint, PrimaryKeyConstraint, CheckConstraint, SmallInteger
-from sqlalchemy import Table, Column, Integer, String, DateTime
+from sqlalchemy import Table, Column, Integer, String, DateTime, Index
 from sqlalchemy.dialects import postgresql as postgres
 from sqlalchemy.sql import func
 
@@ -111,3 +111,17 @@ DATASET_SOURCE = Table(
     PrimaryKeyConstraint('dataset_ref', 'classifier'),
     UniqueConstraint('source_dataset_ref', 'dataset_ref'),
 )
+
+# Footprints of datasets in EPSG:4326 (lon, lat), for spatial searches.
+#
+# One row per polygon of the (multi)polygon valid-data extent, only the outer ring is kept.
+# A native postgres polygon is used so that no extensions are needed for the GiST index.
+DATASET_FOOTPRINT = Table(
+    'dataset_footprint', _core.METADATA,
+    Column('dataset_ref', None, ForeignKey(DATASET.c.id), nullable=False),
+    Column('part', SmallInteger, nullable=False),
+    Column('footprint', sql.POLYGON, nullable=False),
+
+    PrimaryKeyConstraint('dataset_ref', 'part'),
+    Index('ix_{}_dataset_footprint_footprint'.format(_core.SCHEMA_NAME), 'footprint', postgresql_using='gist'),
+)
@@ -3,12 +3,13 @@
 Custom types for postgres & sqlalchemy
 """
 
-from sqlalchemy import TIMESTAMP
+from sqlalchemy import TIMESTAMP, cast
 from sqlalchemy.dialects.postgresql.ranges import RangeOperators
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import sqltypes
 from sqlalchemy.sql.expression import Executable, ClauseElement
 from sqlalchemy.sql.functions import GenericFunction
+from sqlalchemy.types import UserDefinedType
 
 SCHEMA_NAME = 'agdc'
 
@@ -77,6 +78,28 @@ class Float8Range(GenericFunction):
         self.packagenames = ['%s' % SCHEMA_NAME]
 
 
+class POLYGON(UserDefinedType):
+    """Postgres native 'POLYGON' type.
+
+    Bound from a sequence of (x, y) points.
+    """
+
+    def get_col_spec(self, **kw):
+        return 'POLYGON'
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None:
+                return None
+            return '({})'.format(','.join('({!r},{!r})'.format(float(x), float(y))
+                                          for x, y in value))
+
+        return process
+
+    def bind_expression(self, bindvalue):
+        return cast(bindvalue, POLYGON)
+
+
 class PGNAME(sqltypes.Text):
     """Postgres 'NAME' type."""
     __visit_name__ = 'NAME'
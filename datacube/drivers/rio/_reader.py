@@ -7,13 +7,13 @@ from typing import (
 import numpy as np
 from affine import Affine
 from concurrent.futures import ThreadPoolExecutor
-import rasterio
 from rasterio.io import DatasetReader
 from rasterio.crs import CRS as RioCRS
 from datetime import datetime
 
 from datacube.storage import BandInfo
 from datacube.utils.geometry import CRS
+from datacube.utils.rio import rio_handle_pool
 from datacube.utils import (
     uri_to_local_path,
     get_part_from_uri,
@@ -81,13 +81,14 @@ def _dc_crs(crs: Optional[RioCRS]) -> Optional[CRS]:
     return CRS(crs.wkt)
 
 
-def _read(src: DatasetReader,
+def _read(uri: str,
           bidx: int,
           window: Optional[RasterWindow],
           out_shape: Optional[RasterShape]) -> np.ndarray:
-    return src.read(bidx,
-                    window=_roi_to_window(window, src.shape),
-                    out_shape=out_shape)
+    with rio_handle_pool().checkout(uri) as src:
+        return src.read(bidx,
+                        window=_roi_to_window(window, src.shape),
+                        out_shape=out_shape)
 
 
 def _rio_uri(band: BandInfo) -> str:
@@ -150,17 +151,26 @@ def _rio_band_idx(band: BandInfo, src: DatasetReader) -> int:
 
 
 class RIOReader(GeoRasterReader):
+    """ Reader for one band of a file.
+
+        Metadata is captured from ``src`` at construction, file handles for
+        reading pixels are checked out from the process wide handle pool as
+        needed, so ``src`` can be released once the reader is constructed.
+    """
     def __init__(self,
                  src: DatasetReader,
                  band_idx: int,
                  pool: ThreadPoolExecutor,
+                 uri: str,
                  overrides: Overrides = Overrides(None, None, None)):
 
         transform = pick(overrides.transform, src.transform)
         if transform is not None and transform.is_identity:
             transform = None
 
-        self._src = src
+        self._uri = uri
+        self._shape = src.shape
+        self._overviews = tuple(src.overviews(band_idx))
         self._crs = overrides.crs or _dc_crs(src.crs)
         self._transform = transform
         self._nodata = pick(overrides.nodata, src.nodatavals[band_idx-1])
@@ -182,16 +192,20 @@ class RIOReader(GeoRasterReader):
 
     @property
     def shape(self) -> RasterShape:
-        return self._src.shape
+        return self._shape
 
     @property
     def nodata(self) -> Optional[Union[int, float]]:
         return self._nodata
 
+    @property
+    def overviews(self) -> Tuple[int, ...]:
+        return self._overviews
+
     def read(self,
              window: Optional[RasterWindow] = None,
              out_shape: Optional[RasterShape] = None) -> FutureNdarray:
-        return self._pool.submit(_read, self._src, self._band_idx, window, out_shape)
+        return self._pool.submit(_read, self._uri, self._band_idx, window, out_shape)
 
 
 def _compute_overrides(src: DatasetReader, bi: BandInfo) -> Overrides:
@@ -215,14 +229,11 @@ def _rdr_open(band: BandInfo, ctx: Any, pool: ThreadPoolExecutor) -> RIOReader:
     """ Open file pointed by BandInfo and return RIOReader instance.
 
         raises Exception on failure
-
-        TODO: start using ctx for handle cache
     """
     normalised_uri = _rio_uri(band)
-    src = rasterio.open(normalised_uri, 'r')
-    bidx = _rio_band_idx(band, src)
-
-    return RIOReader(src, bidx, pool, _compute_overrides(src, band))
+    with rio_handle_pool().checkout(normalised_uri) as src:
+        bidx = _rio_band_idx(band, src)
+        return RIOReader(src, bidx, pool, normalised_uri, _compute_overrides(src, band))
 
 
 class RIORdrDriver(ReaderDriver):
@@ -233,7 +244,7 @@ class RIORdrDriver(ReaderDriver):
     def new_load_context(self,
                          bands: Iterable[BandInfo],
                          old_ctx: Optional[Any]) -> Any:
-        return None  # TODO: implement file handle cache with this
+        return None  # file handles are cached process wide, see rio_handle_pool
 
     def open(self, band: BandInfo, ctx: Any) -> FutureGeoRasterReader:
         return self._pool.submit(_rdr_open, band, ctx, self._pool)
@@ -75,6 +75,7 @@ class S3Source(object):
           calls.
         """
         s3_dataset = self.s3_metadata[self.band.name]['s3_dataset']
+        codec = self.s3_metadata[self.band.name].get('codec')
         if isinstance(window, S3Source) or window is None:
             slices = tuple([slice(0, a) for a in s3_dataset.macro_shape[-2:]])
         else:
@@ -90,7 +91,8 @@ class S3Source(object):
                                                   dtype(s3_dataset.numpy_type),
                                                   slices,
                                                   s3_dataset.bucket,
-                                                  True)[0]
+                                                  True,
+                                                  codec)[0]
 
 
 class S3DataSource(DataSource):
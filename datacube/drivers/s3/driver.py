@@ -6,6 +6,7 @@ from pathlib import Path
 import numpy as np
 
 from datacube.drivers.s3.datasource import S3DataSource
+from datacube.drivers.s3.storage.s3aio.codec import parse_codec
 from datacube.drivers.s3.storage.s3aio.s3lio import S3LIO
 from datacube.storage import BandInfo
 from .utils import DriverUtils
@@ -54,6 +55,22 @@ class S3WriterDriver(object):
             raise DatacubeException('Dataset contains invalid chunking values, cannot write to storage.')
         return chunksizes
 
+    def _get_codec(self, codec):
+        """Return the codec to encode chunks with, if valid.
+
+        :param str codec: the raw codec parameter, see
+          :mod:`datacube.drivers.s3.storage.s3aio.codec`. When not
+          set, the storage default is used.
+        :return str codec: the validated codec, as recorded in the
+          index for each chunk.
+        """
+        codec = self.storage.s3aio.resolve_codec(codec)
+        try:
+            parse_codec(codec)
+        except ValueError as e:
+            raise DatacubeException('Invalid `codec` parameter, cannot write to storage: {}'.format(e))
+        return codec
+
     def get_reg_irreg_index(self, coord, data):
         """Returns the regular/irregular information for a single dataset
         coordinate.
@@ -156,6 +173,7 @@ class S3WriterDriver(object):
             raise DatacubeException('Expect `bucket` to be set in the storage config')
 
         bucket = storage_config['bucket']
+        codec = self._get_codec(storage_config.get('codec'))
 
         # TODO: Should write all data variables to disk, not just configured variables
         outputs = {}
@@ -172,12 +190,13 @@ class S3WriterDriver(object):
                                                     output['chunk_size'],
                                                     output['base_name'],
                                                     output['bucket'],
-                                                    True)
+                                                    True,
+                                                    codec)
             output['key_maps'] = [{
                 's3_key': s3_key,
                 'chunk': chunk,
                 'chunk_id': chunk_id,
-                'compression': None,
+                'compression': codec,
                 'index_min': self._get_index(chunk, dataset[band].coords, dataset[band].dims, 'min'),
                 'index_max': self._get_index(chunk, dataset[band].coords, dataset[band].dims, 'max')
             } for (s3_key, chunk, chunk_id) in key_maps]
@@ -188,8 +207,8 @@ class S3WriterDriver(object):
              output['regular_index'],
              output['irregular_index']) = self.get_reg_irreg_indices(dataset[band].coords)
 
-            self.logger.info('Wrote %d chunks of size %s to s3 bucket: %s, base_name: %s',
-                             len(output['key_maps']), output['chunk_size'],
+            self.logger.info('Wrote %d chunks of size %s with codec %s to s3 bucket: %s, base_name: %s',
+                             len(output['key_maps']), output['chunk_size'], codec,
                              output['bucket'], output['base_name'])
             outputs[band] = output
         return outputs
@@ -0,0 +1,133 @@
+"""
+Chunk codecs for S3 array storage.
+
+A codec is a pipeline of stages separated by ``|``, each optionally followed by ``:<level>``, for
+example ``'shuffle|zstd:9'`` or ``'delta|shuffle|lz4'``. Stages are applied left to right when
+encoding a chunk and right to left when decoding it. Filters (``delta``, ``shuffle``) rearrange the
+values so they compress better, compressors (``zlib``, ``zstd``, ``lz4``) do the actual compression.
+``'none'`` stores the raw bytes.
+
+The codec string is recorded with every chunk in the index, so chunks remain readable whatever
+codec new data is written with.
+
+"""
+import zlib
+from collections import namedtuple
+
+import numpy as np
+import zstd
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+#: Codec of chunks written before codecs were recorded in the index, when compression is enabled.
+LEGACY_COMPRESSED = 'zstd:9'
+NO_COMPRESSION = 'none'
+
+_Stage = namedtuple('_Stage', ['encode', 'decode', 'default_level'])
+
+
+def _delta_encode(data, dtype, level):
+    if dtype.kind not in 'iu':
+        raise ValueError('delta filter only supports integer data, not {}'.format(dtype))
+    values = np.frombuffer(data, dtype=dtype)
+    out = np.empty_like(values)
+    out[:1] = values[:1]
+    np.subtract(values[1:], values[:-1], out=out[1:])
+    return out.tobytes()
+
+
+def _delta_decode(data, dtype, level):
+    return np.cumsum(np.frombuffer(data, dtype=dtype), dtype=dtype).tobytes()
+
+
+def _shuffle_encode(data, dtype, level):
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, dtype.itemsize).T.tobytes()
+
+
+def _shuffle_decode(data, dtype, level):
+    return np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, -1).T.tobytes()
+
+
+def _zlib_encode(data, dtype, level):
+    return zlib.compress(data, level)
+
+
+def _zlib_decode(data, dtype, level):
+    return zlib.decompress(data)
+
+
+def _zstd_encode(data, dtype, level):
+    return zstd.ZstdCompressor(level=level, write_content_size=True).compress(data)
+
+
+def _zstd_decode(data, dtype, level):
+    return zstd.ZstdDecompressor().decompress(data)
+
+
+def _lz4_encode(data, dtype, level):
+    return lz4.frame.compress(data, compression_level=level)
+
+
+def _lz4_decode(data, dtype, level):
+    return lz4.frame.decompress(data)
+
+
+STAGES = {
+    'delta': _Stage(_delta_encode, _delta_decode, None),
+    'shuffle': _Stage(_shuffle_encode, _shuffle_decode, None),
+    'zlib': _Stage(_zlib_encode, _zlib_decode, 6),
+    'zstd': _Stage(_zstd_encode, _zstd_decode, 9),
+    'lz4': _Stage(_lz4_encode, _lz4_decode, 0),
+}
+
+
+def parse_codec(codec):
+    """Parse a codec string into a list of ``(stage name, level)`` pairs.
+
+    :param str codec: codec string, ``None``, ``''`` and ``'none'`` mean no stages.
+    :raises ValueError: on unknown or unavailable stages.
+    """
+    if not codec or codec == NO_COMPRESSION:
+        return []
+
+    stages = []
+    for stage in codec.split('|'):
+        name, _, level = stage.strip().partition(':')
+        if name not in STAGES:
+            raise ValueError('Unknown codec stage {!r} in {!r}, expected one of: {}'.format(
+                name, codec, ', '.join(sorted(STAGES))))
+        if name == 'lz4' and lz4 is None:
+            raise ValueError('lz4 codec requires the lz4 package to be installed')
+        stages.append((name, int(level) if level else STAGES[name].default_level))
+    return stages
+
+
+def encode_chunk(array, codec):
+    """Encode an array into the bytes to store.
+
+    :param numpy.ndarray array: chunk data
+    :param str codec: codec string, see :func:`parse_codec`
+    :rtype: bytes
+    """
+    dtype = array.dtype
+    data = np.ascontiguousarray(array).tobytes()
+    for name, level in parse_codec(codec):
+        data = STAGES[name].encode(data, dtype, level)
+    return data
+
+
+def decode_chunk(data, codec, dtype):
+    """Decode stored bytes back into the raw bytes of a chunk, see :func:`encode_chunk`.
+
+    :param bytes data: stored data
+    :param str codec: codec string the data was encoded with
+    :param numpy.dtype dtype: data type of the chunk
+    :rtype: bytes
+    """
+    dtype = np.dtype(dtype)
+    for name, level in reversed(parse_codec(codec)):
+        data = STAGES[name].decode(data, dtype, level)
+    return data
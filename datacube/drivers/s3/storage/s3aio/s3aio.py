@@ -4,19 +4,82 @@ S3AIO Class
 Array access to a single S3 object
 
 """
-import SharedArray as sa
-import zstd
+from concurrent.futures import ThreadPoolExecutor
 from itertools import repeat, product
+from threading import Lock
 
 import numpy as np
-from pathos.multiprocessing import ProcessingPool
 
-from .s3io import S3IO, generate_array_name
+from .codec import LEGACY_COMPRESSED, NO_COMPRESSION, parse_codec, decode_chunk
+from .s3io import S3IO
+from .sharedmem import worker_pool, create_shared_array, release_shared_array, write_shared
 
 
-class S3AIO(object):
+def plan_byte_ranges(ranges, max_gap, max_size):
+    """Merge byte ranges that are close to each other into fewer, larger requests.
+
+    Two ranges are merged when there are no more than ``max_gap`` unwanted bytes between
+    them and the merged request is no larger than ``max_size`` bytes.
+
+    :param list ranges: ``(start, end)`` byte ranges, end is exclusive.
+    :param int max_gap: Largest gap in bytes to read through.
+    :param int max_size: Largest size in bytes of a merged request.
+    :return: List of ``(start, end, members)`` requests in file order, where ``members``
+        are indexes into ``ranges`` of the ranges covered by that request.
+    """
+    plan = []
+    for i in sorted(range(len(ranges)), key=lambda i: ranges[i]):
+        start, end = ranges[i]
+        if plan:
+            last = plan[-1]
+            if start - last[1] <= max_gap and max(end, last[1]) - last[0] <= max_size:
+                last[1] = max(end, last[1])
+                last[2].append(i)
+                continue
+        plan.append([start, end, [i]])
+
+    return [tuple(request) for request in plan]
+
+
+class LazyThreadPool(object):
+    """Bounded thread pool started on first use.
+
+    Pickles to a fresh unstarted pool, so that objects holding it can still be sent to worker processes.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = Lock()
+
+    def _get(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def submit(self, fn, *args, **kwargs):
+        return self._get().submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables):
+        return self._get().map(fn, *iterables)
 
-    def __init__(self, enable_compression=True, enable_s3=True, file_path=None, num_workers=30):
+    def __getstate__(self):
+        return {'max_workers': self.max_workers}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_workers'])
+
+
+class S3AIO(object):
+    #: Merge byte ranges separated by up to this many bytes, reading a few unwanted bytes
+    #: is cheaper than the latency of an extra request.
+    MAX_GAP = 1 << 20
+    #: Do not merge byte ranges into requests larger than this, so that they can be fetched concurrently.
+    MAX_REQUEST_SIZE = 16 << 20
+
+    def __init__(self, enable_compression=True, enable_s3=True, file_path=None, num_workers=30,
+                 max_gap=MAX_GAP, max_request_size=MAX_REQUEST_SIZE):
         """Initialise the S3 array IO interface.
 
         :param bool enable_s3: Flag to store objects in s3 or disk.
@@ -24,11 +87,35 @@ class S3AIO(object):
             False: store on disk (for testing purposes)
         :param str file_path: The root directory for the emulated s3 buckets when enable_se is set to False.
         :param int num_workers: The number of workers for parallel IO.
+        :param int max_gap: Byte ranges closer than this are fetched with a single request.
+        :param int max_request_size: Byte ranges are not merged into requests larger than this.
         """
         self.s3io = S3IO(enable_s3, file_path, num_workers)
 
-        self.pool = ProcessingPool(num_workers)
+        self.num_workers = num_workers
+        self.io_pool = LazyThreadPool(num_workers)
         self.enable_compression = enable_compression
+        self.max_gap = max_gap
+        self.max_request_size = max_request_size
+
+    @property
+    def pool(self):
+        """Worker processes for parallel IO, shared by all instances with the same number of workers."""
+        return worker_pool(self.num_workers)
+
+    def resolve_codec(self, codec=None):
+        """Codec to use for a S3 object, see :mod:`.codec`.
+
+        :param str codec: codec recorded for the object, ``None`` for objects written before codecs were
+            recorded, which are zstd compressed when compression is enabled.
+        """
+        if codec is not None:
+            return codec
+        return LEGACY_COMPRESSED if self.enable_compression else NO_COMPRESSION
+
+    def is_encoded(self, codec=None):
+        """Whether objects stored with ``codec`` have to be decoded, rather than read by byte ranges."""
+        return bool(parse_codec(self.resolve_codec(codec)))
 
     def to_1d(self, index, shape):
         """Converts nD index to 1D index.
@@ -48,7 +135,7 @@ class S3AIO(object):
         """
         return np.unravel_index(index, shape)
 
-    def get_point(self, index_point, shape, dtype, s3_bucket, s3_key):
+    def get_point(self, index_point, shape, dtype, s3_bucket, s3_key, codec=None):
         """Gets a point in the nd array stored in S3.
 
         Only works if compression is off.
@@ -58,24 +145,60 @@ class S3AIO(object):
         :param numpy.dtype: dtype of the stored data.
         :param str s3_bucket: S3 bucket name
         :param str s3_key: S3 key name
+        :param str codec: codec the object is stored with, see :meth:`resolve_codec`.
         :return: Returns the point data.
         """
         item_size = np.dtype(dtype).itemsize
         idx = self.to_1d(index_point, shape) * item_size
-        if self.enable_compression:
+        if self.is_encoded(codec):
             b = self.s3io.get_bytes(s3_bucket, s3_key)
-            cctx = zstd.ZstdDecompressor()
-            b = cctx.decompress(b)[idx:idx + item_size]
+            b = decode_chunk(b, self.resolve_codec(codec), dtype)[idx:idx + item_size]
         else:
             b = self.s3io.get_byte_range(s3_bucket, s3_key, idx, idx + item_size)
         a = np.frombuffer(b, dtype=dtype, count=-1, offset=0)
         return a
 
+    def get_byte_ranges(self, s3_bucket, s3_key, ranges, callback, new_session=False):
+        """Gets several byte ranges of a S3 object.
+
+        Nearby ranges are merged into a single request, see :func:`plan_byte_ranges`, and requests
+        are issued concurrently on a bounded thread pool.
+
+        :param str s3_bucket: S3 bucket name
+        :param str s3_key: S3 key name
+        :param list ranges: ``(start, end)`` byte ranges to retrieve, end is exclusive.
+        :param callback: Called as ``callback(i, data)`` with the bytes of ``ranges[i]`` as soon as they
+            are available, possibly from a worker thread.
+        :param bool new_session: Flag to create a new session or reuse existing session, must be True when
+            called from a worker thread.
+        """
+        plan = plan_byte_ranges(ranges, self.max_gap, self.max_request_size)
+
+        # boto3 sessions are not thread safe, use a new one per request when running concurrently
+        new_session = new_session or len(plan) > 1
+
+        def fetch(request):
+            start, end, members = request
+            data = self.s3io.get_byte_range(s3_bucket, s3_key, start, end, new_session=new_session)
+            if data is None or len(data) < end - start:
+                raise IOError('Failed to read bytes {}-{} of {}/{}'.format(start, end, s3_bucket, s3_key))
+            for i in members:
+                range_start, range_end = ranges[i]
+                callback(i, data[range_start - start:range_end - start])
+
+        if len(plan) == 1:
+            fetch(plan[0])
+            return
+
+        for future in [self.io_pool.submit(fetch, request) for request in plan]:
+            future.result()
+
     def cdims(self, slices, shape):
         return [sl.start == 0 and sl.stop == sh and (sl.step is None or sl.step == 1)
                 for sl, sh in zip(slices, shape)]
 
-    def get_slice(self, array_slice, shape, dtype, s3_bucket, s3_key):  # pylint: disable=too-many-locals
+    def get_slice(self, array_slice, shape, dtype, s3_bucket, s3_key,  # pylint: disable=too-many-locals
+                  codec=None, new_session=False):
         """Gets a slice of the nd array stored in S3.
 
         Only works if compression is off.
@@ -85,22 +208,19 @@ class S3AIO(object):
         :param numpy.dtype: dtype of the stored data.
         :param str s3_bucket: S3 bucket name
         :param str s3_key: S3 key name
+        :param str codec: codec the object is stored with, see :meth:`resolve_codec`.
+        :param bool new_session: Flag to create a new session or reuse existing session, must be True when
+            called from a worker thread.
         :return: Returns the data slice.
         """
-        # convert array_slice into into sub-slices of maximum contiguous blocks
-
-        # Todo:
-        #   - parallelise reads and writes
-        #     - option 1. get memory rows in parallel and merge
-        #     - option 2. smarter byte range subsets depending on:
-        #       - data size
-        #       - data contiguity
+        # convert array_slice into into sub-slices of maximum contiguous blocks, nearby blocks
+        # are read with a single request and requests run concurrently, see get_byte_ranges
 
-        if self.enable_compression:
-            return self.get_slice_by_bbox(array_slice, shape, dtype, s3_bucket, s3_key)
+        if self.is_encoded(codec):
+            return self.get_slice_by_bbox(array_slice, shape, dtype, s3_bucket, s3_key, codec,
+                                          new_session=new_session)
 
         # truncate array_slice to shape
-        # array_slice = [slice(max(0, s.start) - min(sh, s.stop)) for s, sh in zip(array_sliced, shape)]
         array_slice = [slice(max(0, s.start), min(sh, s.stop)) for s, sh in zip(array_slice, shape)]
 
         cdim = self.cdims(array_slice, shape)
@@ -118,28 +238,28 @@ class S3AIO(object):
         blocks = list(zip(outer_cells, repeat(array_slice[start:])))
         item_size = np.dtype(dtype).itemsize
 
-        results = []
+        byte_ranges = []
         for cell, sub_range in blocks:
-            # print(cell, sub_range)
             s3_start = (np.ravel_multi_index(cell + tuple([s.start for s in sub_range]), shape)) * item_size
             s3_end = (np.ravel_multi_index(cell + tuple([s.stop - 1 for s in sub_range]), shape) + 1) * item_size
-            # print(s3_start, s3_end)
-            data = self.s3io.get_byte_range(s3_bucket, s3_key, s3_start, s3_end)
-            results.append((cell, sub_range, data))
+            byte_ranges.append((int(s3_start), int(s3_end)))
 
         result = np.empty([s.stop - s.start for s in array_slice], dtype=dtype)
         offset = [s.start for s in array_slice]
 
-        for cell, sub_range, data in results:
+        def scatter(i, data):
+            cell, sub_range = blocks[i]
             t = [slice(x.start - o, x.stop - o) if isinstance(x, slice) else x - o for x, o in
                  zip(cell + tuple(sub_range), offset)]
-            if data.dtype != dtype:
-                data = np.frombuffer(data, dtype=dtype, count=-1, offset=0)
-            result[t] = data.reshape([s.stop - s.start for s in sub_range])
+            data = np.frombuffer(data, dtype=dtype, count=-1, offset=0)
+            result[tuple(t)] = data.reshape([s.stop - s.start for s in sub_range])
+
+        self.get_byte_ranges(s3_bucket, s3_key, byte_ranges, scatter, new_session=new_session)
 
         return result
 
-    def get_slice_mp(self, array_slice, shape, dtype, s3_bucket, s3_key):  # pylint: disable=too-many-locals
+    def get_slice_mp(self, array_slice, shape, dtype, s3_bucket, s3_key,  # pylint: disable=too-many-locals
+                     codec=None):
         """Gets a slice of the nd array stored in S3 in parallel.
 
         Only works if compression is off.
@@ -149,12 +269,12 @@ class S3AIO(object):
         :param numpy.dtype: dtype of the stored data.
         :param str s3_bucket: S3 bucket name
         :param str s3_key: S3 key name
+        :param str codec: codec the object is stored with, see :meth:`resolve_codec`.
         :return: Returns the data slice.
         """
 
         # pylint: disable=too-many-locals
-        def work_get_slice(block, array_name, offset, s3_bucket, s3_key, shape, dtype):
-            result = sa.attach(array_name)
+        def work_get_slice(block, array_ref, offset, s3_bucket, s3_key, shape, dtype):
             cell, sub_range = block
 
             item_size = np.dtype(dtype).itemsize
@@ -168,10 +288,10 @@ class S3AIO(object):
                 data = np.frombuffer(data, dtype=dtype, count=-1, offset=0)
                 # data = data.reshape([s.stop - s.start for s in sub_range])
 
-            result[t] = data.reshape([s.stop - s.start for s in sub_range])
+            write_shared(array_ref, tuple(t), data.reshape([s.stop - s.start for s in sub_range]))
 
-        if self.enable_compression:
-            return self.get_slice_by_bbox(array_slice, shape, dtype, s3_bucket, s3_key)
+        if self.is_encoded(codec):
+            return self.get_slice_by_bbox(array_slice, shape, dtype, s3_bucket, s3_key, codec)
 
         cdim = self.cdims(array_slice, shape)
 
@@ -188,17 +308,16 @@ class S3AIO(object):
         blocks = list(zip(outer_cells, repeat(array_slice[start:])))
         offset = [s.start for s in array_slice]
 
-        array_name = generate_array_name('S3AIO')
-        sa.create(array_name, shape=[s.stop - s.start for s in array_slice], dtype=dtype)
-        shared_array = sa.attach(array_name)
+        array_ref, shared_array = create_shared_array('S3AIO', [s.stop - s.start for s in array_slice], dtype)
 
-        self.pool.map(work_get_slice, blocks, repeat(array_name), repeat(offset), repeat(s3_bucket),
+        self.pool.map(work_get_slice, blocks, repeat(array_ref), repeat(offset), repeat(s3_bucket),
                       repeat(s3_key), repeat(shape), repeat(dtype))
 
-        sa.delete(array_name)
+        release_shared_array(array_ref)
         return shared_array
 
-    def get_slice_by_bbox(self, array_slice, shape, dtype, s3_bucket, s3_key):  # pylint: disable=too-many-locals
+    def get_slice_by_bbox(self, array_slice, shape, dtype, s3_bucket, s3_key,  # pylint: disable=too-many-locals
+                          codec=None, new_session=False):
         """Gets a slice of the nd array stored in S3 by bounding box.
 
         :param tuple array_slice: tuple of slices to retrieve.
@@ -206,6 +325,9 @@ class S3AIO(object):
         :param numpy.dtype: dtype of the stored data.
         :param str s3_bucket: S3 bucket name
         :param str s3_key: S3 key name
+        :param str codec: codec the object is stored with, see :meth:`resolve_codec`.
+        :param bool new_session: Flag to create a new session or reuse existing session, must be True when
+            called from a worker thread.
         :return: Returns the data slice.
         """
         # Todo:
@@ -224,11 +346,9 @@ class S3AIO(object):
         # else:
         #     d = self.s3io.get_byte_range_mp(s3_bucket, s3_key, s3_begin, s3_end, 5*1024*1024)
 
-        d = self.s3io.get_bytes(s3_bucket, s3_key)
+        d = self.s3io.get_bytes(s3_bucket, s3_key, new_session=new_session)
 
-        if self.enable_compression:
-            cctx = zstd.ZstdDecompressor()
-            d = cctx.decompress(d)
+        d = decode_chunk(d, self.resolve_codec(codec), dtype)
 
         d = np.frombuffer(d, dtype=np.uint8, count=-1, offset=0)
         d = d[s3_begin:s3_end]
@@ -8,10 +8,8 @@ Multi-threaded. set new_session = True
 
 """
 
-import SharedArray as sa
 import io
 import os
-import uuid
 from itertools import repeat
 from functools import reduce
 from operator import mul
@@ -21,8 +19,9 @@ import boto3
 import boto3.session
 import botocore
 import numpy as np
-import sys
-from pathos.multiprocessing import ProcessingPool
+
+from .sharedmem import (worker_pool, create_shared_array, release_shared_array, read_shared, write_shared,
+                        list_shared_arrays, delete_shared_array)
 
 
 # pylint: disable=too-many-locals, too-many-public-methods
@@ -49,7 +48,12 @@ class S3IO(object):
         else:
             self.file_path = file_path
 
-        self.pool = ProcessingPool(num_workers)
+        self.num_workers = num_workers
+
+    @property
+    def pool(self):
+        """Worker processes for parallel IO, shared by all instances with the same number of workers."""
+        return worker_pool(self.num_workers)
 
     def list_created_arrays(self):
         """List the created shared memory arrays.
@@ -58,7 +62,7 @@ class S3IO(object):
 
         :return: Returns the list of created arrays.
         """
-        result = [f for f in os.listdir("/dev/shm") if f.startswith('S3') or f.startswith('DCCORE')]
+        result = list_shared_arrays(('S3', 'DCCORE'))
         # TODO(csiro): Fix issue and remove pylint flag below
         # pylint: disable=superfluous-parens
         print(result)
@@ -70,7 +74,7 @@ class S3IO(object):
           Arrays are prefixed by 'S3' or 'DCCORE'.
         """
         for a in self.list_created_arrays():
-            sa.delete(a)
+            delete_shared_array(a)
 
     def s3_resource(self, new_session=False):
         """Create a S3 resource.
@@ -383,12 +387,13 @@ class S3IO(object):
 
         return mpu_response
 
-    def put_bytes_mpu_mp_shm(self, s3_bucket, s3_key, array_name, block_size, new_session=False):
+    def put_bytes_mpu_mp_shm(self, s3_bucket, s3_key, array_ref, block_size, new_session=False):
         """Put bytes into a S3 object using Multi-Part upload in parallel with shared memory
 
         :param str s3_bucket: name of the s3 bucket.
         :param str s3_key: name of the s3 key.
-        :param bytes data: data to store in s3.
+        :param SharedArrayRef array_ref: shared array holding the data to store in s3,
+            see :func:`.sharedmem.create_shared_array`.
         :param int block_size: block size for upload.
         :param bool new_session: Flag to create a new session or reuse existing session.
             True: create new session
@@ -396,12 +401,11 @@ class S3IO(object):
         :return: Multi-part upload response
         """
 
-        def work_put_shm(block_number, array_name, s3_bucket, s3_key, block_size, mpu):
+        def work_put_shm(block_number, array_ref, s3_bucket, s3_key, block_size, mpu):
             part_number = block_number + 1
             start = block_number * block_size
             end = (block_number + 1) * block_size
-            shared_array = sa.attach(array_name)
-            data_chunk = io.BytesIO(shared_array.data[start:end])
+            data_chunk = io.BytesIO(read_shared(array_ref).view(np.uint8).ravel()[start:end].tobytes())
 
             s3 = boto3.session.Session().resource('s3')
             # s3 = boto3.resource('s3')
@@ -414,19 +418,19 @@ class S3IO(object):
             return dict(PartNumber=part_number, ETag=response['ETag'])
 
         if not self.enable_s3:
-            data = sa.attach(array_name)
-            return self.put_bytes(s3_bucket, s3_key, data, new_session)
+            data = read_shared(array_ref)
+            return self.put_bytes(s3_bucket, s3_key, bytes(data.data), new_session)
 
         s3 = self.s3_resource(new_session)
 
         mpu = s3.meta.client.create_multipart_upload(Bucket=s3_bucket, Key=s3_key)
 
-        shared_array = sa.attach(array_name)
-        num_blocks = int(np.ceil(shared_array.nbytes / float(block_size)))
+        nbytes = int(np.prod(array_ref.shape)) * np.dtype(array_ref.dtype).itemsize
+        num_blocks = int(np.ceil(nbytes / float(block_size)))
         parts_dict = dict(Parts=[])
         blocks = range(num_blocks)
 
-        results = self.pool.map(work_put_shm, blocks, repeat(array_name), repeat(s3_bucket),
+        results = self.pool.map(work_put_shm, blocks, repeat(array_ref), repeat(s3_bucket),
                                 repeat(s3_key), repeat(block_size), repeat(mpu))
 
         for result in results:
@@ -523,15 +527,14 @@ class S3IO(object):
         :return: Requested bytes
         """
 
-        def work_get(block_number, array_name, s3_bucket, s3_key, s3_max_size, block_size):
+        def work_get(block_number, array_ref, s3_bucket, s3_key, s3_max_size, block_size):
             start = block_number * block_size
             end = (block_number + 1) * block_size
             if end > s3_max_size:
                 end = s3_max_size
             d = self.get_byte_range(s3_bucket, s3_key, start, end, True)
             # d = np.frombuffer(d, dtype=np.uint8, count=-1, offset=0)
-            shared_array = sa.attach(array_name)
-            shared_array[start:end] = d
+            write_shared(array_ref, slice(start, end), np.frombuffer(d, dtype=np.uint8))
 
         if not self.enable_s3:
             return self.get_byte_range(s3_bucket, s3_key, s3_start, s3_end, new_session)
@@ -543,21 +546,10 @@ class S3IO(object):
         s3_obj_size = s3_end - s3_start
         num_streams = int(np.ceil(s3_obj_size / block_size))
         blocks = range(num_streams)
-        array_name = generate_array_name('S3IO' + '_' + s3_bucket + '_' + s3_key)
-        sa.create(array_name, shape=s3_obj_size, dtype=np.uint8)
-        shared_array = sa.attach(array_name)
+        array_ref, shared_array = create_shared_array('S3IO', s3_obj_size, np.uint8)
 
-        self.pool.map(work_get, blocks, repeat(array_name), repeat(s3_bucket), repeat(s3_key),
+        self.pool.map(work_get, blocks, repeat(array_ref), repeat(s3_bucket), repeat(s3_key),
                       repeat(s3_max_size), repeat(block_size))
 
-        sa.delete(array_name)
+        release_shared_array(array_ref)
         return shared_array
-
-
-def generate_array_name(basename):
-    array_name = '_'.join([basename, str(uuid.uuid4()), str(os.getpid())])
-
-    if sys.platform == 'darwin':
-        return 'file://' + array_name
-    else:
-        return array_name
@@ -5,23 +5,21 @@ Labeled Array access, backed by multiple S3 objects.
 
 """
 
-import SharedArray as sa
 import hashlib
-import sys
-import zstd
 from itertools import repeat, product
 
 import numpy as np
-from pathos.multiprocessing import ProcessingPool
 
-from .s3io import generate_array_name
-from .s3aio import S3AIO
+from .codec import encode_chunk, decode_chunk
+from .s3aio import S3AIO, LazyThreadPool
+from .sharedmem import worker_pool, create_shared_array, release_shared_array, read_shared, write_shared
 
 
 class S3LIO(object):
     DECIMAL_PLACES = 6
 
-    def __init__(self, enable_compression=True, enable_s3=True, file_path=None, num_workers=30):
+    def __init__(self, enable_compression=True, enable_s3=True, file_path=None, num_workers=30,
+                 max_gap=S3AIO.MAX_GAP, max_request_size=S3AIO.MAX_REQUEST_SIZE):
         """Initialise the S3 Labeled IO interface.
 
         :param bool enable_s3: Flag to store objects in s3 or disk.
@@ -29,12 +27,21 @@ class S3LIO(object):
             False: store on disk (for testing purposes)
         :param str file_path: The root directory for the emulated s3 buckets when enable_s3 is set to False.
         :param int num_workers: The number of workers for parallel IO.
+        :param int max_gap: Byte ranges closer than this are fetched with a single request.
+        :param int max_request_size: Byte ranges are not merged into requests larger than this.
         """
-        self.s3aio = S3AIO(enable_compression, enable_s3, file_path, num_workers)
+        self.s3aio = S3AIO(enable_compression, enable_s3, file_path, num_workers,
+                           max_gap=max_gap, max_request_size=max_request_size)
 
-        self.pool = ProcessingPool(num_workers)
+        self.num_workers = num_workers
+        self.io_pool = LazyThreadPool(num_workers)
         self.enable_compression = enable_compression
 
+    @property
+    def pool(self):
+        """Worker processes for parallel IO, shared by all instances with the same number of workers."""
+        return worker_pool(self.num_workers)
+
     def chunk_indices_1d(self, begin, end, step, bound_slice=None, return_as_shape=False):
         """Chunk a 1D index.
 
@@ -77,7 +84,7 @@ class S3LIO(object):
         var1 = map(self.chunk_indices_1d, repeat(0), shape, chunk, array_slice, repeat(return_as_shape))
         return product(*var1)
 
-    def put_array_in_s3(self, array, chunk_size, base_name, bucket, spread=False):
+    def put_array_in_s3(self, array, chunk_size, base_name, bucket, spread=False, codec=None):
         """Put array in S3.
 
         :param ndarray array: array to be put into S3
@@ -85,6 +92,7 @@ class S3LIO(object):
         :param str base_name: The base name for the S3 key
         :param str bucket: S3 bucket to use
         :param bool spread: Flag to use a deterministic hash as a prefix.
+        :param str codec: codec to encode chunks with, see :meth:`S3AIO.resolve_codec`.
         :return: Returns the a a dict of (keys, indices, chunk ids)
         """
         idx = list(self.chunk_indices_nd(array.shape, chunk_size))
@@ -92,10 +100,10 @@ class S3LIO(object):
         keys = [base_name + '_' + str(i) for i in chunk_ids]
         if spread:
             keys = [hashlib.md5(k.encode('utf-8')).hexdigest()[0:6] + '_' + k for k in keys]
-        self.shard_array_to_s3(array, idx, bucket, keys)
+        self.shard_array_to_s3(array, idx, bucket, keys, codec)
         return list(zip(keys, idx, chunk_ids))
 
-    def put_array_in_s3_mp(self, array, chunk_size, base_name, bucket, spread=False):
+    def put_array_in_s3_mp(self, array, chunk_size, base_name, bucket, spread=False, codec=None):
         """Put array in S3 in parallel.
 
         :param ndarray array: array to be put into S3
@@ -103,81 +111,68 @@ class S3LIO(object):
         :param str base_name: The base name for the S3 key
         :param str bucket: S3 bucket to use
         :param bool spread: Flag to use a deterministic hash as a prefix.
+        :param str codec: codec to encode chunks with, see :meth:`S3AIO.resolve_codec`.
         :return: Returns the a a dict of (keys, indices, chunk ids)
         """
         idx = list(self.chunk_indices_nd(array.shape, chunk_size))
         keys = [base_name + '_' + str(i) for i in range(len(idx))]
         if spread:
             keys = [hashlib.md5(k.encode('utf-8')).hexdigest()[0:6] + '_' + k for k in keys]
-        self.shard_array_to_s3_mp(array, idx, bucket, keys)
+        self.shard_array_to_s3_mp(array, idx, bucket, keys, codec)
         return list(zip(keys, idx))
 
-    def shard_array_to_s3(self, array, indices, s3_bucket, s3_keys):
+    def shard_array_to_s3(self, array, indices, s3_bucket, s3_keys, codec=None):
         """Shard array to S3.
 
         :param ndarray array: array to be put into S3
         :param list indices: indices corrsponding to the s3 keys
         :param str s3_bucket: S3 bucket to use
         :param list s3_keys: List of S3 keys corresponding to the indices.
+        :param str codec: codec to encode chunks with, see :meth:`S3AIO.resolve_codec`.
         """
         # todo: multiprocess put_bytes or if large put_bytes_mpu
+        codec = self.s3aio.resolve_codec(codec)
         for s3_key, index in zip(s3_keys, indices):
-            if sys.version_info >= (3, 5):
-                data = bytes(array[index].data)
-            else:
-                data = bytes(np.ascontiguousarray(array[index]).data)
-
-            if self.enable_compression:
-                cctx = zstd.ZstdCompressor(level=9, write_content_size=True)
-                data = cctx.compress(data)
-
+            data = encode_chunk(array[index], codec)
             self.s3aio.s3io.put_bytes(s3_bucket, s3_key, data)
 
-    def shard_array_to_s3_mp(self, array, indices, s3_bucket, s3_keys):
+    def shard_array_to_s3_mp(self, array, indices, s3_bucket, s3_keys, codec=None):
         """Shard array to S3 in parallel.
 
         :param ndarray array: array to be put into S3
         :param list indices: indices corrsponding to the s3 keys
         :param str s3_bucket: S3 bucket to use
         :param list s3_keys: List of S3 keys corresponding to the indices.
+        :param str codec: codec to encode chunks with, see :meth:`S3AIO.resolve_codec`.
         """
 
-        def work_shard_array_to_s3(s3_key, index, array_name, s3_bucket):
-            array = sa.attach(array_name)
-            if sys.version_info >= (3, 5):
-                data = bytes(array[index].data)
-            else:
-                data = bytes(np.ascontiguousarray(array[index]).data)
-
-            if self.enable_compression:
-                cctx = zstd.ZstdCompressor(level=9, write_content_size=True)
-                data = cctx.compress(data)
+        codec = self.s3aio.resolve_codec(codec)
 
+        def work_shard_array_to_s3(s3_key, index, array_ref, s3_bucket):
+            data = encode_chunk(read_shared(array_ref, index), codec)
             self.s3aio.s3io.put_bytes(s3_bucket, s3_key, data)
 
-        array_name = generate_array_name('SA3IO')
-        sa.create(array_name, shape=array.shape, dtype=array.dtype)
-        shared_array = sa.attach(array_name)
+        array_ref, shared_array = create_shared_array('SA3IO', array.shape, array.dtype)
         shared_array[:] = array
-        results = self.pool.map(work_shard_array_to_s3, s3_keys, indices, repeat(array_name), repeat(s3_bucket))
+        results = self.pool.map(work_shard_array_to_s3, s3_keys, indices, repeat(array_ref), repeat(s3_bucket))
 
-        sa.delete(array_name)
+        release_shared_array(array_ref)
 
-    def assemble_array_from_s3(self, array, indices, s3_bucket, s3_keys, dtype):
+    def assemble_array_from_s3(self, array, indices, s3_bucket, s3_keys, dtype, codec=None):
         """Reconstruct an array from S3.
 
         :param ndarray array: array to be put into S3
         :param list indices: indices corrsponding to the s3 keys
         :param str s3_bucket: S3 bucket to use
         :param list s3_keys: List of S3 keys corresponding to the indices.
+        :param numpy.dtype dtype: The data type of the data.
+        :param str codec: codec the chunks are stored with, see :meth:`S3AIO.resolve_codec`.
         :return: The assembled array.
         """
         # TODO: parallelize this
+        codec = self.s3aio.resolve_codec(codec)
         for s3_key, index in zip(s3_keys, indices):
-            b = self.s3aio.s3io.get_bytes(s3_bucket, s3_key)
-            if self.enable_compression:
-                cctx = zstd.ZstdDecompressor()
-                b = cctx.decompress(b)
+            b = decode_chunk(self.s3aio.s3io.get_bytes(s3_bucket, s3_key), codec, dtype)
             shape = tuple((i.stop - i.start) for i in index)
             array[index] = np.ndarray(shape, buffer=b, dtype=dtype)
         return array
@@ -243,7 +238,7 @@ class S3LIO(object):
     # integer index data retrieval.
     # pylint: disable=too-many-locals
     def get_data_unlabeled(self, base_location, macro_shape, micro_shape, dtype, array_slice, s3_bucket,
-                           use_hash=False):
+                           use_hash=False, codec=None):
         """Gets integer indexed data from S3.
 
         :param str base_location: The base location of the requested data.
@@ -253,12 +248,11 @@ class S3LIO(object):
         :param tuple array_slice: The requested nD array slice.
         :param str s3_bucket: The S3 bucket name.
         :param bool use_hash: Whether to prefix the key with a deterministic hash.
+        :param codec: codec the chunks are stored with, see :meth:`S3AIO.resolve_codec`, or a dict of
+            codecs by chunk id.
         :return: The nd array.
         """
         # TODO(csiro):
-        #     - use SharedArray for data
-        #     - multiprocess the for loop depending on slice size.
-        #     - not very efficient, redo
         #     - point retrieval via integer index instead of slicing operator.
         #
         # element_ids = [np.ravel_multi_index(tuple([s.start for s in s]), macro_shape) for s in slices]
@@ -282,6 +276,8 @@ class S3LIO(object):
         if use_hash:
             keys = [hashlib.md5(k.encode('utf-8')).hexdigest()[0:6] + '_' + k for k in keys]
 
+        codecs = [codec.get(i) if isinstance(codec, dict) else codec for i in chunk_ids]
+
         data = np.zeros(shape=[s.stop - s.start for s in array_slice], dtype=dtype)
 
         # calculate offsets
@@ -293,16 +289,22 @@ class S3LIO(object):
         size = [[s.stop - s.start for s in s] for s in data_slices]
         local_slices = [[slice(o, o + s) for o, s in zip(o, s)] for o, s in zip(origin, size)]
 
-        zipped = zip(keys, data_slices, local_slices, chunk_shapes, repeat(offset))
+        zipped = zip(keys, data_slices, local_slices, chunk_shapes, codecs)
+
+        # get the slices concurrently and populate the data array, slices don't overlap.
+        # Decoding happens on the worker threads, zlib, zstd and lz4 release the GIL.
+        # boto3 sessions are not thread safe, so each fetch uses its own.
+        def fetch(s3_key, data_slice, local_slice, shape, chunk_codec):
+            data[data_slice] = self.s3aio.get_slice(local_slice, shape, dtype, s3_bucket, s3_key, chunk_codec,
+                                                    new_session=True)
 
-        # get the slices and populate the data array.
-        for s3_key, data_slice, local_slice, shape, offset in zipped:
-            data[data_slice] = self.s3aio.get_slice_by_bbox(local_slice, shape, dtype, s3_bucket, s3_key)
+        for future in [self.io_pool.submit(fetch, *args) for args in zipped]:
+            future.result()
 
         return data
 
     def get_data_unlabeled_mp(self, base_location, macro_shape, micro_shape, dtype, array_slice, s3_bucket,
-                              use_hash=False):
+                              use_hash=False, codec=None):
         """Gets integer indexed data from S3 in parallel.
 
         :param str base_location: The base location of the requested data.
@@ -312,19 +314,20 @@ class S3LIO(object):
         :param tuple array_slice: The requested nD array slice.
         :param str s3_bucket: The S3 bucket name.
         :param bool use_hash: Whether to prefix the key with a deterministic hash.
+        :param codec: codec the chunks are stored with, see :meth:`S3AIO.resolve_codec`, or a dict of
+            codecs by chunk id.
         :return: The nd array.
         """
 
         # TODO(csiro):
-        #     - use SharedArray for data
         #     - multiprocess the for loop depending on slice size.
         #     - not very efficient, redo
         #     - point retrieval via integer index instead of slicing operator.
         #
         # element_ids = [np.ravel_multi_index(tuple([s.start for s in s]), macro_shape) for s in slices]
-        def work_data_unlabeled(array_name, s3_key, data_slice, local_slice, shape, offset):
-            result = sa.attach(array_name)
-            result[data_slice] = self.s3aio.get_slice_by_bbox(local_slice, shape, dtype, s3_bucket, s3_key)
+        def work_data_unlabeled(array_ref, s3_key, data_slice, local_slice, shape, chunk_codec):
+            write_shared(array_ref, data_slice,
+                         self.s3aio.get_slice_by_bbox(local_slice, shape, dtype, s3_bucket, s3_key, chunk_codec))
 
         # data slices for each chunk
         slices = list(self.chunk_indices_nd(macro_shape, micro_shape, array_slice))
@@ -345,11 +348,10 @@ class S3LIO(object):
         if use_hash:
             keys = [hashlib.md5(k.encode('utf-8')).hexdigest()[0:6] + '_' + k for k in keys]
 
+        codecs = [codec.get(i) if isinstance(codec, dict) else codec for i in chunk_ids]
+
         # create shared array
-        # Use a filename to be able to work on mac + windows as well as linux
-        array_name = generate_array_name('S3LIO')
-        sa.create(array_name, shape=[s.stop - s.start for s in array_slice], dtype=dtype)
-        data = sa.attach(array_name)
+        array_ref, data = create_shared_array('S3LIO', [s.stop - s.start for s in array_slice], dtype)
 
         # calculate offsets
         offset = tuple([i.start for i in array_slice])
@@ -360,11 +362,9 @@ class S3LIO(object):
         size = [[s.stop - s.start for s in s] for s in data_slices]
         local_slices = [[slice(o, o + s) for o, s in zip(o, s)] for o, s in zip(origin, size)]
 
-        zipped = zip(keys, data_slices, local_slices, chunk_shapes, repeat(offset))
-
-        self.pool.map(work_data_unlabeled, repeat(array_name), keys, data_slices, local_slices, chunk_shapes,
-                      repeat(offset))
+        self.pool.map(work_data_unlabeled, repeat(array_ref), keys, data_slices, local_slices, chunk_shapes,
+                      codecs)
 
-        sa.delete(array_name)
+        release_shared_array(array_ref)
 
         return data
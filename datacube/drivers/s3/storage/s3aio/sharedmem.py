@@ -0,0 +1,161 @@
+"""
+Shared memory arrays and worker processes for parallel S3 array IO.
+
+Arrays live in :mod:`multiprocessing.shared_memory` segments on Python 3.8+, and in ``SharedArray``
+segments on older versions. Worker processes are started once per pool size and reused by every call.
+
+"""
+import os
+import sys
+import threading
+import uuid
+from collections import namedtuple
+
+import numpy as np
+from pathos.multiprocessing import ProcessingPool
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:  # Python < 3.8
+    shared_memory = resource_tracker = None
+    import SharedArray as sa
+
+#: Handle to a shared array that can be passed to worker processes.
+SharedArrayRef = namedtuple('SharedArrayRef', ['name', 'shape', 'dtype'])
+
+_LOCK = threading.Lock()
+_POOL_LOCK = threading.Lock()
+_POOLS = {}
+_SEGMENTS = {}  # name -> SharedMemory, created by this process and not yet released
+
+
+def worker_pool(num_workers):
+    """Process pool with ``num_workers`` workers, started on first use and shared by all callers."""
+    with _POOL_LOCK:
+        pool = _POOLS.get(num_workers)
+        if pool is None:
+            if resource_tracker is not None:
+                # workers have to share our resource tracker, their own would destroy segments on exit
+                resource_tracker.ensure_running()
+            pool = _POOLS[num_workers] = ProcessingPool(num_workers)
+        return pool
+
+
+def generate_array_name(basename):
+    array_name = '_'.join([basename, str(uuid.uuid4()), str(os.getpid())])
+
+    if sys.platform == 'darwin':
+        return 'file://' + array_name
+    else:
+        return array_name
+
+
+class _Segment(object):
+    """Exposes a shared memory segment to numpy, and unmaps it once no array uses it any more.
+
+    Arrays built on ``SharedMemory.buf`` do not keep the mapping alive, closing it would leave them dangling.
+    """
+
+    def __init__(self, shm, shape, dtype):
+        self.shm = shm
+        self.__array_interface__ = dict(version=3, shape=shape, typestr=dtype.str, descr=dtype.descr,
+                                        data=(np.frombuffer(shm.buf, dtype=np.uint8).ctypes.data, False))
+
+    def __del__(self):
+        self.shm.close()
+
+
+def create_shared_array(basename, shape, dtype):
+    """Allocate a zero filled array in shared memory.
+
+    Worker processes access it through the returned reference with :func:`read_shared`
+    and :func:`write_shared`. Call :func:`release_shared_array` once workers are done with it.
+
+    :param str basename: Prefix of the segment name.
+    :param tuple shape: Shape of the array.
+    :param numpy.dtype dtype: Data type of the array.
+    :return: ``(ref, array)``, ``array`` is a view of the shared memory in this process.
+    """
+    shape = tuple(int(n) for n in np.atleast_1d(shape))
+    dtype = np.dtype(dtype)
+
+    if shared_memory is None:
+        ref = SharedArrayRef(generate_array_name(basename), shape, dtype)
+        return ref, sa.create(ref.name, shape=shape, dtype=dtype)
+
+    # short names, macOS limits them to 31 characters
+    name = '{}_{}'.format(basename[:8], uuid.uuid4().hex[:16])
+    shm = shared_memory.SharedMemory(name=name, create=True,
+                                     size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    with _LOCK:
+        _SEGMENTS[shm.name] = shm
+
+    return SharedArrayRef(shm.name, shape, dtype), np.asarray(_Segment(shm, shape, dtype))
+
+
+def release_shared_array(ref):
+    """Remove a shared array created with :func:`create_shared_array`.
+
+    Views of it in this process stay valid, memory is freed once the last of them is gone.
+    """
+    if shared_memory is None:
+        sa.delete(ref.name)
+        return
+
+    with _LOCK:
+        shm = _SEGMENTS.pop(ref.name)
+    shm.unlink()
+
+
+def _attach(ref):
+    shm = shared_memory.SharedMemory(name=ref.name)
+    return shm, np.ndarray(ref.shape, dtype=ref.dtype, buffer=shm.buf)
+
+
+def write_shared(ref, index, value):
+    """Set ``array[index] = value`` on a shared array, from any process."""
+    if shared_memory is None:
+        sa.attach(ref.name)[index] = value
+        return
+
+    shm, array = _attach(ref)
+    try:
+        array[index] = value
+    finally:
+        del array
+        shm.close()
+
+
+def read_shared(ref, index=Ellipsis):
+    """Copy of ``array[index]`` of a shared array, from any process."""
+    if shared_memory is None:
+        return np.array(sa.attach(ref.name)[index])
+
+    shm, array = _attach(ref)
+    try:
+        return np.array(array[index])
+    finally:
+        del array
+        shm.close()
+
+
+def list_shared_arrays(prefixes):
+    """Names of shared arrays whose name starts with any of ``prefixes``, Linux only."""
+    return [f for f in os.listdir("/dev/shm") if f.startswith(tuple(prefixes))]
+
+
+def delete_shared_array(name):
+    """Remove a shared array by name, whichever process created it."""
+    if shared_memory is None:
+        sa.delete(name)
+        return
+
+    with _LOCK:
+        shm = _SEGMENTS.get(name)
+    if shm is not None:
+        release_shared_array(SharedArrayRef(name, None, None))
+        return
+
+    shm = shared_memory.SharedMemory(name=name)
+    shm.unlink()
+    shm.close()
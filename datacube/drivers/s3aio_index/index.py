@@ -1,10 +1,14 @@
 """S3 indexing module."""
 
 import logging
-from uuid import uuid4
+import threading
+from collections import namedtuple
+from itertools import islice
+from uuid import UUID, uuid4
 
+import cachetools
 import numpy as np
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, distinct, func
 
 from datacube.drivers.postgres._core import pg_exists
 from datacube.drivers.s3aio_index.schema import S3_DATASET, S3_DATASET_CHUNK, S3_DATASET_MAPPING, S3_METADATA
@@ -14,6 +18,18 @@ from datacube.index.index import Index
 _LOG = logging.getLogger(__name__)
 FORMAT = 'aio'
 
+#: Number of datasets whose s3 metadata is fetched with a single query while building search results
+S3_METADATA_PAGE_SIZE = 500
+#: Number of datasets whose s3 metadata is cached by each process, and for how many seconds
+S3_METADATA_CACHE_SIZE = 100000
+S3_METADATA_CACHE_TTL = 600
+#: Datasets without s3 metadata may be written to s3 by another process at any time, so they
+#: are only remembered for long enough to build a page of search results
+S3_METADATA_EMPTY_CACHE_TTL = 10
+
+#: An `s3_dataset` record
+S3Dataset = namedtuple('S3Dataset', [column.name for column in S3_DATASET.columns])
+
 
 class S3DatabaseException(Exception):
     """Raised on errors to do with the S3 block specific database"""
@@ -67,11 +83,29 @@ class S3AIOIndex(Index):
         return "S3Index<db={!r}>".format(self._db)
 
 
+def _pages(iterable, size):
+    iterable = iter(iterable)
+    while True:
+        page = list(islice(iterable, size))
+        if not page:
+            return
+        yield page
+
+
 class DatasetResource(BaseDatasetResource):
     """The s3 dataset resource extends the postgres one by writing
     additional s3 information to specific tables.
+
+    The s3 metadata of search results is fetched a page at a time, and
+    cached, see :meth:`_get_s3_metadata`.
     """
 
+    def __init__(self, db, dataset_type_resource):
+        super(DatasetResource, self).__init__(db, dataset_type_resource)
+        self._s3_metadata_cache = cachetools.TTLCache(S3_METADATA_CACHE_SIZE, S3_METADATA_CACHE_TTL)
+        self._empty_s3_metadata_cache = cachetools.TTLCache(S3_METADATA_CACHE_SIZE, S3_METADATA_EMPTY_CACHE_TTL)
+        self._s3_metadata_lock = threading.Lock()
+
     def add(self, dataset, with_lineage=None, **kwargs):
         saved_dataset = super(DatasetResource, self).add(dataset, with_lineage=with_lineage, **kwargs)
 
@@ -80,6 +114,16 @@ class DatasetResource(BaseDatasetResource):
             self.add_datasets_to_s3_tables([dataset.id], storage_metadata)
         return saved_dataset
 
+    def add_many(self, datasets, with_lineage=True, batch_size=1000, **kwargs):
+        datasets = list(datasets)
+        n = super(DatasetResource, self).add_many(datasets, with_lineage=with_lineage, batch_size=batch_size)
+
+        for dataset in datasets:
+            if dataset.format == FORMAT:
+                storage_metadata = kwargs['storage_metadata']  # It's an error to not include this
+                self.add_datasets_to_s3_tables([dataset.id], storage_metadata)
+        return n
+
     def add_multiple(self, datasets, with_lineage=None):
         """Index several datasets.
 
@@ -224,6 +268,11 @@ class DatasetResource(BaseDatasetResource):
                 # Add mappings
                 self._add_s3_dataset_mappings(transaction, s3_dataset_id, band, dataset_refs)
 
+        with self._s3_metadata_lock:
+            for dataset_ref in dataset_refs:
+                self._s3_metadata_cache.pop(dataset_ref, None)
+                self._empty_s3_metadata_cache.pop(dataset_ref, None)
+
     def _make(self, dataset_res, full_info=False, product=None):
         """
         :rtype Dataset
@@ -234,6 +283,23 @@ class DatasetResource(BaseDatasetResource):
         self._extend_dataset_with_s3_metadata(dataset)
         return dataset
 
+    def _make_many(self, query_result, product=None):
+        for page in _pages(query_result, S3_METADATA_PAGE_SIZE):
+            self._get_s3_metadata([dataset_res.id for dataset_res in page])
+            yield from super(DatasetResource, self)._make_many(page, product)
+
+    def _make_intersecting(self, query_result, geopolygon, product=None):
+        for page in _pages(query_result, S3_METADATA_PAGE_SIZE):
+            self._get_s3_metadata([dataset_res.id for dataset_res in page])
+            yield from super(DatasetResource, self)._make_intersecting(page, geopolygon, product)
+
+    def bulk_get(self, ids):
+        datasets = []
+        for page in _pages(ids, S3_METADATA_PAGE_SIZE):
+            self._get_s3_metadata([UUID(id_) if isinstance(id_, str) else id_ for id_ in page])
+            datasets.extend(super(DatasetResource, self).bulk_get(page))
+        return datasets
+
     def _extend_dataset_with_s3_metadata(self, dataset):
         """Extend the dataset doc with driver specific index data.
 
@@ -247,15 +313,100 @@ class DatasetResource(BaseDatasetResource):
         """
         dataset.s3_metadata = {}
         if dataset.measurements:
+            s3_metadata = self._get_s3_metadata([dataset.id])[dataset.id]
+            dataset.s3_metadata = {band: s3_metadata[band]
+                                   for band in dataset.measurements.keys() if band in s3_metadata}
+
+    def _get_s3_metadata(self, dataset_refs):
+        """The s3 metadata of several datasets, from the cache or from the database.
+
+        Metadata missing from the cache is fetched with a single
+        query, see :meth:`_fetch_s3_metadata`, and cached for
+        `S3_METADATA_CACHE_TTL` seconds. Datasets without s3 metadata
+        are only cached for `S3_METADATA_EMPTY_CACHE_TTL` seconds, as
+        another process may add it in the meantime.
+
+        :param list dataset_refs: The dataset ids.
+        :return: Dictionary of `{band: {'s3_dataset': ..., 'codec': ...}}`
+          by dataset id.
+        """
+        found = {}
+        with self._s3_metadata_lock:
+            for dataset_ref in dataset_refs:
+                s3_metadata = self._s3_metadata_cache.get(dataset_ref,
+                                                          self._empty_s3_metadata_cache.get(dataset_ref))
+                if s3_metadata is not None:
+                    found[dataset_ref] = s3_metadata
+
+        missing = [dataset_ref for dataset_ref in dataset_refs if dataset_ref not in found]
+        if missing:
             with self._db.begin() as transaction:
-                for band in dataset.measurements.keys():
-                    s3_datasets = self._get_s3_dataset(transaction, dataset.id, band)
-                    for s3_dataset in s3_datasets:
-                        dataset.s3_metadata[band] = {
-                            's3_dataset': s3_dataset,
-                            # TODO(csiro): commenting this out for now, not using it yet.
-                            # 's3_chunks': transaction.get_s3_dataset_chunk(s3_dataset.id)
-                        }
+                fetched = self._fetch_s3_metadata(transaction, missing)
+            with self._s3_metadata_lock:
+                for dataset_ref, s3_metadata in fetched.items():
+                    if s3_metadata:
+                        self._s3_metadata_cache[dataset_ref] = s3_metadata
+                    else:
+                        self._empty_s3_metadata_cache[dataset_ref] = s3_metadata
+            found.update(fetched)
+        return found
+
+    def _fetch_s3_metadata(self, _connection, dataset_refs):
+        """Fetch the s3 metadata of several datasets with a single query.
+
+        The codec of each s3 dataset is aggregated over its chunks by
+        the same query. Chunks are only looked up individually for the
+        rare s3 datasets whose chunks were stored with different codecs.
+
+        :param list dataset_refs: The dataset ids.
+        :return: Dictionary of `{band: {'s3_dataset': ..., 'codec': ...}}`
+          by dataset id, empty for datasets without s3 metadata.
+        """
+        mapped = select([S3_DATASET_MAPPING.c.s3_dataset_id]).where(S3_DATASET_MAPPING.c.dataset_ref.in_(dataset_refs))
+        # count NULL, the codec of chunks written before codecs were recorded, as a codec
+        codec = func.coalesce(S3_DATASET_CHUNK.c.compression_scheme, '')
+        codecs = select(
+            [S3_DATASET_CHUNK.c.s3_dataset_id,
+             func.count(distinct(codec)).label('codec_count'),
+             func.min(codec).label('codec')]
+        ).where(
+            S3_DATASET_CHUNK.c.s3_dataset_id.in_(mapped)
+        ).group_by(
+            S3_DATASET_CHUNK.c.s3_dataset_id
+        ).alias('codecs')
+
+        rows = _connection.execute(
+            select(
+                [S3_DATASET_MAPPING.c.dataset_ref,
+                 S3_DATASET_MAPPING.c.band.label('mapping_band'),
+                 codecs.c.codec_count,
+                 codecs.c.codec] +
+                list(S3_DATASET.columns)
+            ).select_from(
+                S3_DATASET_MAPPING.join(
+                    S3_DATASET, S3_DATASET_MAPPING.c.s3_dataset_id == S3_DATASET.c.id
+                ).outerjoin(
+                    codecs, codecs.c.s3_dataset_id == S3_DATASET.c.id
+                )
+            ).where(
+                S3_DATASET_MAPPING.c.dataset_ref.in_(dataset_refs)
+            )
+        ).fetchall()
+
+        s3_metadata = {dataset_ref: {} for dataset_ref in dataset_refs}
+        for row in rows:
+            s3_dataset = S3Dataset(*[row[column] for column in S3_DATASET.columns])
+            if row['codec_count'] is not None and row['codec_count'] > 1:
+                codec = self._get_s3_dataset_codec(_connection, s3_dataset.id)
+            else:
+                codec = row['codec'] or None
+            s3_metadata[row['dataset_ref']][row['mapping_band']] = {
+                's3_dataset': s3_dataset,
+                'codec': codec,
+                # TODO(csiro): commenting this out for now, not using it yet.
+                # 's3_chunks': transaction.get_s3_dataset_chunk(s3_dataset.id)
+            }
+        return s3_metadata
 
     ### S3 specific functions
     # See .tables for description of each column
@@ -359,6 +510,25 @@ class DatasetResource(BaseDatasetResource):
         )
         return res.inserted_primary_key[0]
 
+    def _get_s3_dataset_codec(self, _connection, s3_dataset_id):
+        """Codec the chunks of an s3 dataset are stored with.
+
+        :type s3_dataset_id: uuid.UUID
+        :return: The codec shared by all chunks, or a dict of codecs by
+          chunk id if chunks were stored with different codecs.
+        """
+        codecs = _connection.execute(
+            select(
+                [S3_DATASET_CHUNK.c.compression_scheme]
+            ).where(
+                S3_DATASET_CHUNK.c.s3_dataset_id == s3_dataset_id,
+            ).distinct()
+        ).fetchall()
+        if len(codecs) <= 1:
+            return codecs[0][0] if codecs else None
+        return {chunk.chunk_id: chunk.compression_scheme
+                for chunk in self._get_s3_dataset_chunk(_connection, s3_dataset_id)}
+
     def _get_s3_dataset_chunk(self, _connection, s3_dataset_id):
         """:type s3_dataset_id: uuid.UUID"""
         return _connection.execute(
@@ -4,8 +4,18 @@ Useful functions for Datacube users
 Not used internally, those should go in `utils.py`
 """
 
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import dask
+import dask.array as da
 import numpy as np
 import rasterio
+import rasterio.shutil
+import toolz
+from dask.array.core import slices_from_chunks
+from rasterio.enums import Resampling
 
 DEFAULT_PROFILE = {
     'blockxsize': 256,
@@ -16,6 +26,10 @@ DEFAULT_PROFILE = {
     'nodata': 0.0,
     'tiled': True}
 
+COG_PROFILE = dict(DEFAULT_PROFILE,
+                   blockxsize=512,
+                   blockysize=512)
+
 
 def write_geotiff(filename, dataset, profile_override=None, time_index=None):
     """
@@ -31,6 +45,104 @@ def write_geotiff(filename, dataset, profile_override=None, time_index=None):
         The same function can be achieved by calling `dataset.isel(time=<time_index>)` before passing
  in your dataset. It was removed because it made the function much less useful for more advanced cases.''')
 
+    profile = _geotiff_profile(dataset, DEFAULT_PROFILE, profile_override)
+
+    with rasterio.open(str(filename), 'w', **profile) as dest:
+        if hasattr(dataset, 'data_vars'):
+            for bandnum, data in enumerate(dataset.data_vars.values(), start=1):
+                dest.write(data.data, bandnum)
+
+
+def write_cog(filename, dataset, profile_override=None,
+              overview_levels=None, overview_resampling='nearest',
+              blocks_in_flight=4):
+    """
+    Write an ODC style xarray.Dataset to a Cloud Optimised GeoTIFF.
+
+    Dask backed bands are never loaded in full: chunks are computed ``blocks_in_flight``
+    at a time (in parallel, using the active dask scheduler) and written to disk as they
+    arrive. The image is first written to a temporary tiled GeoTIFF next to ``filename``,
+    overviews are built from that file by GDAL one level at a time, and the result is
+    then copied into COG layout (overviews and tiles ordered for ranged reads).
+
+    .. warning::
+
+        COG layout puts overviews in front of the full resolution image, so GDAL can not
+        produce it in one pass. Every pixel is written twice, and while the copy is being
+        made the temporary file and the output both exist: allow for roughly twice the
+        size of the output (plus overviews) in free space next to ``filename``.
+
+    To write several files in parallel use :func:`write_cogs`.
+
+    :param filename: Output filename
+    :param dataset: xarray dataset containing one or more 2d bands to write to a file.
+    :param profile_override: option dict, overrides rasterio file creation options.
+    :param overview_levels: Overview decimation factors, default is powers of 2 until
+                            the overview fits into a single block, use ``[]`` to disable.
+    :param overview_resampling: Resampling method used for overviews, e.g. ``nearest``, ``average``
+    :param blocks_in_flight: Number of dask chunks computed at the same time, bounds memory use.
+    """
+    if blocks_in_flight < 1:
+        raise ValueError('blocks_in_flight must be at least 1')
+
+    profile = _geotiff_profile(dataset, COG_PROFILE, profile_override)
+    bands = list(dataset.data_vars.values())
+    if any(band.ndim != 2 for band in bands):
+        raise ValueError('Can only write 2d bands, use `dataset.isel(time=<time_index>)` to select a time slice')
+
+    if overview_levels is None:
+        overview_levels = _default_overview_levels((profile['height'], profile['width']),
+                                                   max(profile['blockxsize'], profile['blockysize']))
+
+    filename = Path(str(filename))
+    with tempfile.TemporaryDirectory(dir=str(filename.parent), prefix='.tmp-cog-') as tmpdir:
+        tmp_filename = str(Path(tmpdir)/filename.name)
+
+        with rasterio.open(tmp_filename, 'w', **profile) as dest:
+            for bandnum, band in enumerate(bands, start=1):
+                _write_blocks(dest, bandnum, band.data,
+                              block_shape=(profile['blockysize'], profile['blockxsize']),
+                              blocks_in_flight=blocks_in_flight)
+
+            if overview_levels:
+                dest.build_overviews(overview_levels, Resampling[overview_resampling.lower()])
+
+        creation_opts = {k: v for k, v in profile.items()
+                         if k not in ('driver', 'width', 'height', 'count', 'dtype',
+                                      'crs', 'transform', 'nodata')}
+        rasterio.shutil.copy(tmp_filename, str(filename),
+                             driver='GTiff',
+                             copy_src_overviews=True,
+                             **creation_opts)
+
+
+def write_cogs(outputs, threads=4, **kwargs):
+    """
+    Write several ODC style xarray.Datasets to Cloud Optimised GeoTIFFs in parallel.
+
+    Each file is written by :func:`write_cog`, at most ``threads`` files at the same time.
+    Up to ``threads * blocks_in_flight`` chunks are held in memory, and every file being
+    written needs its own temporary disk space, see :func:`write_cog`.
+
+    :param outputs: Iterable of ``(filename, dataset)`` pairs
+    :param threads: Maximum number of files being written at the same time
+    :param kwargs: Passed on to :func:`write_cog`
+    :return: List of filenames written, in the same order as ``outputs``
+    """
+    if threads < 1:
+        raise ValueError('threads must be at least 1')
+
+    outputs = list(outputs)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(write_cog, filename, dataset, **kwargs)
+                   for filename, dataset in outputs]
+        for future in futures:
+            future.result()
+
+    return [filename for filename, _ in outputs]
+
+
+def _geotiff_profile(dataset, default_profile, profile_override=None):
     profile_override = profile_override or {}
 
     geobox = getattr(dataset, 'geobox', None)
@@ -44,7 +156,7 @@ def write_geotiff(filename, dataset, profile_override=None, time_index=None):
     except AttributeError:
         dtypes = [dataset.dtype]
 
-    profile = DEFAULT_PROFILE.copy()
+    profile = default_profile.copy()
     height, width = geobox.shape
 
     profile.update({
@@ -58,11 +170,55 @@ def write_geotiff(filename, dataset, profile_override=None, time_index=None):
     profile.update(profile_override)
 
     _calculate_blocksize(profile)
+    return profile
 
-    with rasterio.open(str(filename), 'w', **profile) as dest:
-        if hasattr(dataset, 'data_vars'):
-            for bandnum, data in enumerate(dataset.data_vars.values(), start=1):
-                dest.write(data.data, bandnum)
+
+def _default_overview_levels(shape, blocksize):
+    levels = []
+    level = 2
+    while max(shape) > blocksize*(level // 2):
+        levels.append(level)
+        level *= 2
+    return levels
+
+
+def _aligned_chunks(chunks, block_size):
+    """ Merge consecutive chunks along one axis so that chunk boundaries fall on tiff
+        block boundaries where possible.
+
+        Chunks are never split: every output chunk depends on its own source chunks only,
+        so computing output chunks in separate batches never recomputes a source chunk.
+    """
+    out = []
+    size = 0
+    max_size = max(max(chunks), block_size)
+    for chunk in chunks:
+        size += chunk
+        if size % block_size == 0 or size >= max_size:
+            out.append(size)
+            size = 0
+    if size:
+        out.append(size)
+    return tuple(out)
+
+
+def _write_blocks(dest, bandnum, data, block_shape, blocks_in_flight):
+    """ Write a 2d array into band ``bandnum`` of an open rasterio dataset,
+        computing dask arrays chunk by chunk.
+    """
+    if not isinstance(data, da.Array):
+        dest.write(np.asarray(data), bandnum)
+        return
+
+    # Chunks that cover whole tiff blocks avoid read-modify-write of partial blocks,
+    # merging only so that source chunks are not shared between batches
+    data = data.rechunk(tuple(_aligned_chunks(chunks, bs)
+                              for chunks, bs in zip(data.chunks, block_shape)))
+
+    for batch in toolz.partition_all(blocks_in_flight, slices_from_chunks(data.chunks)):
+        blocks = dask.compute(*[data[roi] for roi in batch])
+        for (ys, xs), block in zip(batch, blocks):
+            dest.write(block, bandnum, window=((ys.start, ys.stop), (xs.start, xs.stop)))
 
 
 def _calculate_blocksize(profile):
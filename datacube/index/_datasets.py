@@ -4,17 +4,19 @@ API for dataset indexing, access and search.
 """
 import logging
 import warnings
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from itertools import islice
 from typing import Any, Iterable, Set, Tuple, Union, List
 from uuid import UUID
 
 from datacube.model import Dataset, DatasetType
 from datacube.model.utils import flatten_datasets
-from datacube.utils import jsonify_document, changes, cached_property
+from datacube.utils import jsonify_document, changes, cached_property, geometry
 from datacube.utils.changes import get_doc_changes
 from . import fields
 
 import json
+import numpy
 from datacube.drivers.postgres._fields import SimpleDocField, DateDocField
 from datacube.drivers.postgres._schema import DATASET
 from sqlalchemy import select, func
@@ -23,6 +25,40 @@ from datacube.model.fields import Field
 _LOG = logging.getLogger(__name__)
 
 
+def _footprint(geom):
+    """
+    Outer rings of ``geom`` in EPSG:4326 as lists of (lon, lat) points, one per polygon.
+
+    Dropping holes only ever makes the footprint bigger, so searches stay conservative.
+
+    :type geom: datacube.utils.geometry.Geometry
+    :rtype: list[list[(float, float)]]
+    """
+    if geom is None or geom.is_empty:
+        return []
+
+    geom = geom.to_crs(geometry.CRS('EPSG:4326'), wrapdateline=True)
+    coords = geom.json['coordinates']
+    if geom.type == 'Polygon':
+        return [coords[0]]
+    if geom.type == 'MultiPolygon':
+        return [poly[0] for poly in coords]
+    return []
+
+
+def _as_column(values):
+    """
+    Numeric values as a numeric array, anything else as an array of objects.
+    """
+    if values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return numpy.array(values)
+
+    column = numpy.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        column[i] = v
+    return column
+
+
 # It's a public api, so we can't reorganise old methods.
 # pylint: disable=too-many-public-methods, too-many-lines
 
@@ -50,6 +86,10 @@ class DatasetSpatialMixin(object):
         return Dataset.bounds.__get__(self)
 
 
+class _GridSpatial(namedtuple('_GridSpatial', ['id', 'grid_spatial']), DatasetSpatialMixin):
+    pass
+
+
 class DatasetResource(object):
     """
     :type _db: datacube.drivers.postgres._connections.PostgresDb
@@ -158,6 +198,7 @@ class DatasetResource(object):
 
         def process_bunch(dss, main_ds, transaction):
             edges = []
+            with_footprints = self._db.has_dataset_footprints()
 
             # First insert all new datasets
             for ds in dss:
@@ -165,6 +206,8 @@ class DatasetResource(object):
                 if is_new:
                     edges.extend((name, ds.id, src.id)
                                  for name, src in ds.sources.items())
+                    if with_footprints:
+                        transaction.insert_dataset_footprint(ds.id, _footprint(ds.extent))
 
             # Second insert lineage graph edges
             for ee in edges:
@@ -209,6 +252,75 @@ class DatasetResource(object):
 
         return dataset
 
+    def add_many(self, datasets, with_lineage=True, batch_size=1000, **kwargs):
+        """
+        Add several datasets to the index, skipping those already present.
+
+        Unlike calling :meth:`add` for each dataset, datasets are written in batches:
+        each batch is one transaction with a handful of multi-row inserts for datasets,
+        lineage and locations. Extra keyword arguments (e.g. ``storage_metadata``) are
+        ignored, like they are by :meth:`add`.
+
+        :param Iterable[Dataset] datasets: datasets to add
+        :param bool with_lineage: True -- also add lineage datasets that are missing, False -- lineage
+                                  datasets are expected to be in the index already
+        :param int batch_size: number of datasets to add per transaction
+        :return: number of datasets that were added, including lineage datasets
+        :rtype: int
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size must be positive')
+
+        n = 0
+        datasets = iter(datasets)
+        while True:
+            batch = list(islice(datasets, batch_size))
+            if not batch:
+                return n
+            n += self._add_batch(batch, with_lineage)
+
+    def _add_batch(self, datasets, with_lineage):
+        top_level = OrderedDict((ds.id, ds) for ds in datasets)
+
+        dss = OrderedDict()
+        for ds in top_level.values():
+            if with_lineage:
+                for id_, copies in flatten_datasets(ds).items():
+                    dss.setdefault(id_, copies[0])
+            else:
+                dss.setdefault(ds.id, ds)
+
+        with self._db.connect() as connection:
+            present = set(connection.datasets_intersection(list(dss)))
+
+        for id_ in present.intersection(top_level):
+            _LOG.warning('Dataset %s is already in the database', id_)
+
+        dss = [ds for ds in dss.values() if ds.id not in present]
+        if not dss:
+            return 0
+
+        _LOG.info('Indexing %d datasets', len(dss))
+
+        with self._db.begin() as transaction:
+            added = transaction.insert_datasets([(ds.metadata_doc_without_lineage(), ds.id, ds.type.id)
+                                                 for ds in dss])
+            dss = [ds for ds in dss if ds.id in added]
+
+            transaction.insert_dataset_sources([(name, ds.id, src.id)
+                                                for ds in dss
+                                                for name, src in (ds.sources or {}).items()])
+
+            # Every add is essentially an append to the front of a stack, so add in reverse order
+            transaction.insert_dataset_locations([(ds.id, uri)
+                                                  for ds in top_level.values() if ds.id in added and ds.uris
+                                                  for uri in ds.uris[::-1] if uri is not None])
+
+            if self._db.has_dataset_footprints():
+                transaction.insert_dataset_footprints([(ds.id, _footprint(ds.extent)) for ds in dss])
+
+        return len(dss)
+
     def search_product_duplicates(self, product: DatasetType, *args) -> Iterable[Tuple[Any, Set[UUID]]]:
         """
         Find dataset ids who have duplicates of the given set of field names.
@@ -296,6 +408,8 @@ class DatasetResource(object):
         with self._db.begin() as transaction:
             if not transaction.update_dataset(dataset.metadata_doc_without_lineage(), dataset.id, product.id):
                 raise ValueError("Failed to update dataset %s..." % dataset.id)
+            if self._db.has_dataset_footprints():
+                transaction.insert_dataset_footprint(dataset.id, _footprint(dataset.extent))
 
         self._ensure_new_locations(dataset, existing)
 
@@ -502,6 +616,21 @@ class DatasetResource(object):
         """
         return (self._make(dataset, product=product) for dataset in query_result)
 
+    def _make_intersecting(self, query_result, geopolygon, product=None):
+        """
+        Datasets from ``query_result`` intersecting ``geopolygon``, skipping the check for rows
+        that had their footprint checked by the database already.
+
+        :rtype: __generator[Dataset]
+        """
+        for dataset_res in query_result:
+            dataset = self._make(dataset_res, product=product)
+            if getattr(dataset_res, 'footprint_checked', False):
+                yield dataset
+            elif dataset.extent is not None and geometry.intersects(geopolygon,
+                                                                    dataset.extent.to_crs(geopolygon.crs)):
+                yield dataset
+
     def search_by_metadata(self, metadata):
         """
         Perform a search using arbitrary metadata, returning results as Dataset objects.
@@ -519,15 +648,26 @@ class DatasetResource(object):
         """
         Perform a search, returning results as Dataset objects.
 
+        If ``geopolygon`` is given only datasets with an extent intersecting it are returned.
+        This is checked by the database for datasets with a recorded footprint, and on the
+        client for the rest. It doesn't replace ``lat``/``lon`` search terms, which are still
+        needed to narrow down the search by the indexed fields.
+
         :param Union[str,float,Range,list] query:
         :param int limit: Limit number of datasets
         :rtype: __generator[Dataset]
         """
         source_filter = query.pop('source_filter', None)
+        geopolygon = query.pop('geopolygon', None)
         for product, datasets in self._do_search_by_product(query,
                                                             source_filter=source_filter,
-                                                            limit=limit):
-            yield from self._make_many(datasets, product)
+                                                            limit=limit,
+                                                            geopolygon=geopolygon,
+                                                            stream=True):
+            if geopolygon is None:
+                yield from self._make_many(datasets, product)
+            else:
+                yield from self._make_intersecting(datasets, geopolygon, product)
 
     def search_by_product(self, **query):
         """
@@ -557,7 +697,8 @@ class DatasetResource(object):
         for _, results in self._do_search_by_product(query,
                                                      return_fields=True,
                                                      select_field_names=field_names,
-                                                     limit=limit):
+                                                     limit=limit,
+                                                     stream=True):
 
             for columns in results:
                 yield result_type(*columns)
@@ -632,7 +773,11 @@ class DatasetResource(object):
     # pylint: disable=too-many-locals
     def _do_search_by_product(self, query, return_fields=False, select_field_names=None,
                               with_source_ids=False, source_filter=None,
-                              limit=None):
+                              limit=None, geopolygon=None, stream=False):
+        """
+        :param bool stream: Fetch results in batches from a server-side cursor. Results of each product must then
+                            be consumed before moving on to the next one.
+        """
         if source_filter:
             product_queries = list(self._get_product_queries(source_filter))
             if not product_queries:
@@ -651,6 +796,8 @@ class DatasetResource(object):
         if not product_queries:
             raise ValueError('No products match search terms: %r' % query)
 
+        footprint = _footprint(geopolygon) if geopolygon is not None else None
+
         for q, product in product_queries:
             dataset_fields = product.metadata_type.dataset_fields
             query_exprs = tuple(fields.to_expressions(dataset_fields.get, **q))
@@ -663,14 +810,15 @@ class DatasetResource(object):
                 else:
                     select_fields = tuple(dataset_fields[field_name]
                                           for field_name in select_field_names)
-            with self._db.connect() as connection:
+            with (self._db.stream() if stream else self._db.connect()) as connection:
                 yield (product,
                        connection.search_datasets(
                            query_exprs,
                            source_exprs,
                            select_fields=select_fields,
                            limit=limit,
-                           with_source_ids=with_source_ids
+                           with_source_ids=with_source_ids,
+                           footprint=footprint if footprint and self._db.has_dataset_footprints() else None
                        ))
 
     def _do_count_by_product(self, query):
@@ -720,7 +868,7 @@ class DatasetResource(object):
         :param dict[str,str|float|datacube.model.Range] query:
         :rtype: __generator[dict]
         """
-        for _, results in self._do_search_by_product(query, return_fields=True):
+        for _, results in self._do_search_by_product(query, return_fields=True, stream=True):
             for columns in results:
                 yield dict(columns)
 
@@ -812,23 +960,80 @@ class DatasetResource(object):
                 class DatasetLight(result_type):
                     __slots__ = ()
 
-            with self._db.connect() as connection:
+            with self._db.stream() as connection:
                 results = connection.search_unique_datasets(
                     query_exprs,
                     select_fields=select_fields,
                     limit=limit
                 )
 
-            for result in results:
-                field_values = dict()
-                for i_, field in enumerate(select_fields):
-                    # We need to load the simple doc fields
-                    if isinstance(field, SimpleDocField):
-                        field_values[field.name] = json.loads(result[i_])
-                    else:
-                        field_values[field.name] = result[i_]
+                for result in results:
+                    field_values = dict()
+                    for i_, field in enumerate(select_fields):
+                        # We need to load the simple doc fields
+                        if isinstance(field, SimpleDocField):
+                            field_values[field.name] = json.loads(result[i_])
+                        else:
+                            field_values[field.name] = result[i_]
+
+                    yield DatasetLight(**field_values)
+
+    def search_returning_columns(self, field_names: tuple, custom_offsets=None, limit=None,
+                                 with_pandas=True, **query):
+        """
+        Perform a search, returning the requested fields as columns, one row per dataset.
+
+        Nothing is built per dataset: rows are streamed from the database straight into arrays,
+        which makes this suitable for planning over very large numbers of datasets.
+
+        Fields are resolved as for :meth:`search_returning_datasets_light`, with the
+        exception of ``extent``, which is returned as the WKB of the valid-data polygon of each
+        dataset in EPSG:4326 (None when unknown).
+
+        :param field_names: A tuple of field names to return, ``extent`` is supported as well
+        :param custom_offsets: A dictionary of offsets in the metadata doc for custom fields
+        :param limit: Number of datasets returned per product.
+        :param with_pandas: return a Pandas DataFrame, otherwise a dictionary of numpy arrays
+        :rtype: pandas.DataFrame or dict[str, numpy.ndarray]
+        """
+        assert field_names
+
+        columns = OrderedDict((name, []) for name in field_names)
+
+        for product, query_exprs in self.make_query_expr(query, custom_offsets):
+            select_fields = self.make_select_fields(product, field_names, custom_offsets)
+            if 'extent' in columns and not any(f.name == 'id' for f in select_fields):
+                select_fields.append(product.metadata_type.dataset_fields['id'])
+
+            with self._db.stream() as connection:
+                results = connection.search_unique_datasets(
+                    query_exprs,
+                    select_fields=select_fields,
+                    limit=limit
+                )
 
-                yield DatasetLight(**field_values)
+                for result in results:
+                    values = {}
+                    for i_, field in enumerate(select_fields):
+                        if isinstance(field, SimpleDocField):
+                            values[field.name] = json.loads(result[i_])
+                        else:
+                            values[field.name] = result[i_]
+
+                    for name, column in columns.items():
+                        if name == 'extent':
+                            extent = _GridSpatial(values['id'], values.get('grid_spatial')).extent
+                            column.append(None if extent is None else
+                                          extent.to_crs(geometry.CRS('EPSG:4326'), wrapdateline=True).wkb)
+                        else:
+                            column.append(values.get(name))
+
+        columns = OrderedDict((name, _as_column(values)) for name, values in columns.items())
+        if not with_pandas:
+            return columns
+
+        import pandas
+        return pandas.DataFrame(columns, columns=list(columns))
 
     def make_select_fields(self, product, field_names, custom_offsets):
         """
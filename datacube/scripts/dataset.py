@@ -3,6 +3,7 @@ import datetime
 import logging
 import sys
 from collections import OrderedDict
+from itertools import islice
 from typing import Iterable, Mapping, MutableMapping, Any
 
 import click
@@ -176,14 +177,31 @@ def index_cmd(index, product_names,
         run_it(dataset_paths)
 
 
-def index_datasets(dss, index, auto_add_lineage, dry_run):
-    for dataset in dss:
-        _LOG.info('Matched %s', dataset)
-        if not dry_run:
-            try:
-                index.datasets.add(dataset, with_lineage=auto_add_lineage)
-            except (ValueError, MissingRecordError) as e:
-                _LOG.error('Failed to add dataset %s: %s', dataset.local_uri, e)
+def index_datasets(dss, index, auto_add_lineage, dry_run, batch_size=1000):
+    def matched(dss):
+        for dataset in dss:
+            _LOG.info('Matched %s', dataset)
+            yield dataset
+
+    dss = matched(dss)
+
+    while True:
+        batch = list(islice(dss, batch_size))
+        if not batch:
+            break
+
+        if dry_run:
+            continue
+
+        try:
+            index.datasets.add_many(batch, with_lineage=auto_add_lineage)
+        except (ValueError, MissingRecordError):
+            # Nothing from this batch was added, retry one at a time to find the culprits
+            for dataset in batch:
+                try:
+                    index.datasets.add(dataset, with_lineage=auto_add_lineage)
+                except (ValueError, MissingRecordError) as e:
+                    _LOG.error('Failed to add dataset %s: %s', dataset.local_uri, e)
 
 
 def parse_update_rules(keys_that_can_change):
@@ -1,7 +1,11 @@
 import time
+import hashlib
 import logging
+import queue
+import threading
 import click
 import cachetools
+import dask
 import itertools
 import sys
 from copy import deepcopy
@@ -20,6 +24,7 @@ from datacube.ui import click as ui
 from datacube.utils import read_documents
 from datacube.utils.uris import normalise_path
 from datacube.ui.task_app import check_existing_files, load_tasks as load_tasks_, save_tasks as save_tasks_
+from datacube.ui.task_app import TaskLedger
 from datacube.drivers import storage_writer_by_name
 
 from datacube.ui.click import cli
@@ -91,6 +96,14 @@ def get_variable_params(config):
     return variable_params
 
 
+def get_dask_chunks(config):
+    """
+    Chunking used to load tile data lazily, ``storage.dask_chunks`` when configured,
+    otherwise one time slice at a time.
+    """
+    return config['storage'].get('dask_chunks', {'time': 1})
+
+
 def get_app_metadata(config_file):
     doc = {
         'lineage': {
@@ -182,7 +195,14 @@ def load_config_from_file(path):
     return config
 
 
-def create_task_list(index, output_type, year, source_type, config):
+def create_task_list(index, output_type, year, source_type, config, ledger=None):
+    """
+    Find tiles of the source product that are missing from the output product.
+
+    When a :class:`TaskLedger` is supplied, planned tasks are recorded in it as they are generated.
+    Tiles the ledger already knows about with unchanged sources are taken from the ledger without
+    looking up their lineage again, and tiles already written or indexed are skipped.
+    """
     config['taskfile_utctime'] = int(time.time())
 
     query = {}
@@ -215,8 +235,95 @@ def create_task_list(index, output_type, year, source_type, config):
             tile.sources.values[i] = update_sources(tile.sources.values[i])
         return task
 
-    tasks = (update_task(task) for task in tasks if check_valid(**task))
-    return tasks
+    tasks = (task for task in tasks if check_valid(**task))
+    if ledger is None:
+        return (update_task(task) for task in tasks)
+
+    previous_config = ledger.get_meta('config', config)
+    ledger.set_meta('config', config)
+    return _plan_with_ledger(ledger, tasks, update_task, previous_config)
+
+
+def task_key(tile_index):
+    return ','.join(str(i) for i in tile_index)
+
+
+def tile_fingerprint(tile):
+    """ Digest of the time and source dataset ids of every time slice of a tile """
+    digest = hashlib.sha1()
+    for time_, sources in zip(tile.sources.time.values, tile.sources.values):
+        digest.update(str(time_).encode('utf8'))
+        for id_ in sorted(str(dataset.id) for dataset in sources):
+            digest.update(id_.encode('utf8'))
+    return digest.hexdigest()
+
+
+def _remove_partial_output(config, task):
+    file_path = get_filename(config, task['tile_index'], task['tile'].sources)
+    if file_path.exists():
+        _LOG.warning('Removing output of an unfinished task: %s', file_path)
+        file_path.unlink()
+
+
+def _plan_with_ledger(ledger, tasks, update_task, previous_config):
+    ledger.set_meta('plan_complete', False)
+
+    for task in tasks:
+        key = task_key(task['tile_index'])
+        fingerprint = tile_fingerprint(task['tile'])
+        known = ledger.lookup(key)
+
+        if known is None:
+            task = update_task(task)
+            ledger.add(key, fingerprint, task)
+            yield task
+            continue
+
+        known_fingerprint, state = known
+        unchanged = known_fingerprint == fingerprint
+
+        if state == ledger.RUNNING or (state == ledger.WRITTEN and not unchanged):
+            _remove_partial_output(previous_config, ledger.get_task(key))
+
+        if not unchanged:
+            task = update_task(task)
+            ledger.add(key, fingerprint, task)
+            yield task
+        elif state not in (ledger.WRITTEN, ledger.INDEXED):
+            yield ledger.get_task(key)
+
+    ledger.set_meta('plan_complete', True)
+
+
+def resume_or_plan(ledger, index, output_type, year, source_type, config):
+    """
+    Resume an unfinished ingest recorded in the task ledger, or plan a new one.
+
+    Ingest is resumed without querying the index when planning had completed for the same
+    configuration and years, and some tasks are yet to be written. Otherwise tasks are planned
+    with :func:`create_task_list`, a ledger recorded for a different configuration is discarded.
+
+    :return: (config, tasks)
+    """
+    request = (deepcopy(config), year)
+    recorded = ledger.get_meta('request')
+
+    if recorded != request:
+        if recorded is not None:
+            _LOG.warning('Ingest configuration has changed, discarding task ledger: %s', ledger.filename)
+        ledger.clear()
+        ledger.set_meta('request', request)
+    elif ledger.get_meta('plan_complete'):
+        counts = ledger.counts()
+        unfinished = counts[ledger.PLANNED] + counts[ledger.RUNNING] + counts[ledger.FAILED]
+        if unfinished or counts[ledger.WRITTEN]:
+            _LOG.info('Resuming ingest from task ledger %s: %s', ledger.filename, counts)
+            config = ledger.get_meta('config')
+            for task in ledger.tasks(ledger.RUNNING):
+                _remove_partial_output(config, task)
+            return config, ledger.tasks(ledger.PLANNED, ledger.RUNNING, ledger.FAILED)
+
+    return config, create_task_list(index, output_type, year, source_type, config, ledger=ledger)
 
 
 def ingest_work(config, source_type, output_type, tile, tile_index):
@@ -245,7 +352,8 @@ def ingest_work(config, source_type, output_type, tile, tile_index):
 
         data = Datacube.load_data(tile.sources, tile.geobox, measurements,
                                   resampling=resampling,
-                                  fuse_func=fuse_func)
+                                  fuse_func=fuse_func,
+                                  dask_chunks=get_dask_chunks(config))
 
     nudata = data.rename(namemap)
     file_path = get_filename(config, tile_index, tile.sources)
@@ -273,10 +381,13 @@ def ingest_work(config, source_type, output_type, tile, tile_index):
         'complevel': 9,
     }
 
-    storage_metadata = driver.write_dataset_to_storage(nudata, file_path,
-                                                       global_attributes=global_attributes,
-                                                       variable_params=variable_params,
-                                                       storage_config=config['storage'])
+    # Data is read chunk by chunk as it is written out. Chunks are computed in the
+    # current process only, the task is already running under the ingest executor.
+    with dask.config.set(scheduler='synchronous'):
+        storage_metadata = driver.write_dataset_to_storage(nudata, file_path,
+                                                           global_attributes=global_attributes,
+                                                           variable_params=variable_params,
+                                                           storage_config=config['storage'])
 
     if (storage_metadata is not None) and len(storage_metadata) > 0:
         datasets.attrs['storage_metadata'] = storage_metadata
@@ -288,22 +399,93 @@ def ingest_work(config, source_type, output_type, tile, tile_index):
 
 def _index_datasets(index, results):
     n = 0
+    plain = []
     for datasets in results:
-        extra_args = {}
         # datasets is an xarray.DataArray
         if 'storage_metadata' in datasets.attrs:
-            extra_args['storage_metadata'] = datasets.attrs['storage_metadata']
+            # storage metadata is per storage unit, these can not be merged
+            index.datasets.add_many(datasets.values, with_lineage=False,
+                                    storage_metadata=datasets.attrs['storage_metadata'])
+            n += len(datasets.values)
+        else:
+            plain.extend(datasets.values)
 
-        for dataset in datasets.values:
-            index.datasets.add(dataset, with_lineage=False, **extra_args)
-            n += 1
+    if plain:
+        index.datasets.add_many(plain, with_lineage=False)
+        n += len(plain)
     return n
 
 
-def process_tasks(index, config, source_type, output_type, tasks, queue_size, executor):
+_INDEX_STOP = object()
+
+
+def _index_stage(index, results, batch_size, status, ledger=None):
+    """
+    Index completed results taken from the ``results`` queue until a stop marker is received.
+
+    Queue items are ``(task key, result)`` pairs. Everything already queued is indexed in one go,
+    up to ``batch_size`` results at a time. When a bulk insert fails every result of that batch
+    is retried on its own, so that one bad storage unit doesn't take others down with it.
+    """
+    def index_batch(batch):
+        n = _index_datasets(index, [result for _, result in batch])
+        if ledger is not None:
+            ledger.set_state([key for key, _ in batch], ledger.INDEXED)
+        return n
+
+    done = False
+    while not done:
+        batch = [results.get()]
+        while len(batch) < batch_size and batch[-1] is not _INDEX_STOP:
+            try:
+                batch.append(results.get_nowait())
+            except queue.Empty:
+                break
+
+        if batch[-1] is _INDEX_STOP:
+            batch.pop()
+            done = True
+
+        if not batch:
+            continue
+
+        try:
+            status['index_successful'] += index_batch(batch)
+        except Exception:  # pylint: disable=broad-except
+            if len(batch) == 1:
+                _LOG.exception('Failed to index storage unit file')
+                status['index_failed'] += 1
+            else:
+                for item in batch:
+                    try:
+                        status['index_successful'] += index_batch([item])
+                    except Exception:  # pylint: disable=broad-except
+                        _LOG.exception('Failed to index storage unit file')
+                        status['index_failed'] += 1
+
+        _LOG.info('Storage unit files indexed (Successful: %s, Failed: %s)',
+                  status['index_successful'], status['index_failed'])
+
+
+def process_tasks(index, config, source_type, output_type, tasks, queue_size, executor,
+                  index_batch_size=100, ledger=None):
+    """
+    Run ingest tasks, indexing results as they complete.
+
+    Exactly ``queue_size`` tasks are kept in flight while there is work left. Completed results
+    are handed over to a separate indexing thread through a bounded queue and are indexed in bulk.
+    If indexing falls behind by more than ``queue_size`` results, submission of new tasks waits.
+
+    When a :class:`TaskLedger` is supplied, progress of every task is recorded in it, and results
+    written by an earlier run but not yet indexed are indexed first.
+
+    :return: (number of datasets indexed, number of storage units that failed to index)
+    """
     # pylint: disable=too-many-locals
     def submit_task(task):
         _LOG.info('Submitting task: %s', task['tile_index'])
+        if ledger is not None:
+            ledger.set_state([task_key(task['tile_index'])], ledger.RUNNING)
         return executor.submit(ingest_work,
                                config=config,
                                source_type=source_type,
@@ -311,51 +493,62 @@ def process_tasks(index, config, source_type, output_type, tasks, queue_size, ex
                                **task)
 
     pending = []
+    pending_keys = {}  # id(future) -> task key
 
     # Count of storage unit/s creation successful/failed
     nc_successful = nc_failed = 0
 
-    # Count of storage unit/s indexed successfully or failed to index
-    index_successful = index_failed = 0
+    # Count of storage unit/s indexed successfully or failed to index, updated by the indexing thread
+    status = {'index_successful': 0, 'index_failed': 0}
+
+    to_index = queue.Queue(maxsize=queue_size)
+    indexer = threading.Thread(target=_index_stage,
+                               args=(index, to_index, index_batch_size, status, ledger),
+                               name='ingest-index',
+                               daemon=True)
+    indexer.start()
 
     tasks = iter(tasks)
 
-    while True:
-        pending += [submit_task(task) for task in itertools.islice(tasks, queue_size)]
-        if len(pending) == 0:
-            break
+    try:
+        if ledger is not None:
+            for key, result in ledger.results():
+                to_index.put((key, result))
+
+        while True:
+            for task in itertools.islice(tasks, queue_size - len(pending)):
+                future = submit_task(task)
+                pending_keys[id(future)] = task_key(task['tile_index'])
+                pending.append(future)
+            if len(pending) == 0:
+                break
 
-        nc_completed, failed, pending = executor.get_ready(pending)
-        nc_successful += len(nc_completed)
+            future, pending = executor.next_completed(pending, None)
+            key = pending_keys.pop(id(future))
 
-        for future in failed:
             try:
-                executor.result(future)
+                result = executor.result(future)
             except Exception as err:  # pylint: disable=broad-except
                 _LOG.exception('Failed to create storage unit file (Exception: %s) ', str(err), exc_info=True)
                 nc_failed += 1
-
-        _LOG.info('Storage unit file creation status (Created_Count: %s, Failed_Count: %s)',
-                  nc_successful,
-                  nc_failed)
-
-        if not nc_completed:
-            time.sleep(1)
-            continue
-
-        try:
-            # TODO: ideally we wouldn't block here indefinitely
-            # maybe limit gather to 50-100 results and put the rest into a index backlog
-            # this will also keep the queue full
-            results = executor.results(nc_completed)
-            index_successful += _index_datasets(index, results)
-        except Exception as err:  # pylint: disable=broad-except
-            _LOG.exception('Failed to index storage unit file (Exception: %s)', str(err), exc_info=True)
-            index_failed += 1
-
-        _LOG.info('Storage unit files indexed (Successful: %s, Failed: %s)', index_successful, index_failed)
-
-    return index_successful, index_failed
+                if ledger is not None:
+                    ledger.set_state([key], ledger.FAILED)
+            else:
+                nc_successful += 1
+                if ledger is not None:
+                    ledger.set_state([key], ledger.WRITTEN, result=result)
+                to_index.put((key, result))  # blocks when indexing can not keep up
+            finally:
+                executor.release(future)
+
+            _LOG.info('Storage unit file creation status (Created_Count: %s, Failed_Count: %s)',
+                      nc_successful,
+                      nc_failed)
+    finally:
+        to_index.put(_INDEX_STOP)
+        indexer.join()
+
+    return status['index_successful'], status['index_failed']
 
 
 def _validate_year(ctx, param, value):
@@ -393,6 +586,8 @@ def get_driver_from_config(config):
 @click.option('--dry-run', '-d', is_flag=True, default=False, help='Check if everything is ok')
 @click.option('--allow-product-changes', is_flag=True, default=False,
               help='Allow the output product definition to be updated if it differs.')
+@click.option('--ledger', 'ledger_file', help='Record progress in the specified file, and resume from it',
+              type=click.Path(dir_okay=False))
 @ui.executor_cli_options
 @ui.pass_index(app_name='datacube-ingest')
 def ingest_cmd(index,
@@ -403,8 +598,14 @@ def ingest_cmd(index,
                load_tasks,
                dry_run,
                allow_product_changes,
+               ledger_file,
                executor):
     # pylint: disable=too-many-locals
+    ledger = None
+
+    if ledger_file and (not config_file or dry_run or save_tasks):
+        click.echo('--ledger can only be used with --config-file when processing tasks')
+        sys.exit(-1)
 
     if config_file:
         config = load_config_from_file(config_file)
@@ -412,7 +613,11 @@ def ingest_cmd(index,
         source_type, output_type = ensure_output_type(index, config, driver.format,
                                                       allow_product_changes=allow_product_changes)
 
-        tasks = create_task_list(index, output_type, year, source_type, config)
+        if ledger_file:
+            ledger = TaskLedger(ledger_file)
+            config, tasks = resume_or_plan(ledger, index, output_type, year, source_type, config)
+        else:
+            tasks = create_task_list(index, output_type, year, source_type, config)
     elif load_tasks:
         config, tasks = load_tasks_(load_tasks)
         driver = get_driver_from_config(config)
@@ -427,7 +632,10 @@ def ingest_cmd(index,
     elif save_tasks:
         save_tasks_(config, tasks, save_tasks)
     else:
-        successful, failed = process_tasks(index, config, source_type, output_type, tasks, queue_size, executor)
+        successful, failed = process_tasks(index, config, source_type, output_type, tasks, queue_size, executor,
+                                           ledger=ledger)
+        if ledger is not None:
+            ledger.close()
         click.echo('%d successful, %d failed' % (successful, failed))
 
         sys.exit(failed)
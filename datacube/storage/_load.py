@@ -5,13 +5,14 @@ Important functions are:
 
 """
 import logging
+import threading
 from collections import OrderedDict
 import numpy as np
 from xarray.core.dataarray import DataArray as XrDataArray
 from xarray.core.dataset import Dataset as XrDataset
 from typing import (
     Union, Optional, Callable,
-    List, Any, Iterator, Iterable, Mapping, Tuple
+    List, Any, Iterator, Iterable, Mapping, Tuple, Dict
 )
 
 from datacube.utils import ignore_exceptions_if
@@ -23,9 +24,66 @@ from . import DataSource, BandInfo
 
 _LOG = logging.getLogger(__name__)
 
+# Fuser is called as ``fuse_func(dst, src)`` and must update ``dst`` in place. ``src`` is
+# a scratch view owned by the loader, it is discarded after the call, so fusers are free to
+# modify it (e.g. use it as a workspace) instead of allocating temporaries.
+#
+# Fusers that set attribute ``first_valid = True`` promise that fusing into an all-nodata
+# ``dst`` is a plain copy, this allows reading the first source straight into the output.
 FuserFunction = Callable[[np.ndarray, np.ndarray], Any]  # pylint: disable=invalid-name
 ProgressFunction = Callable[[int, int], Any]  # pylint: disable=invalid-name
 
+_SCRATCH = threading.local()
+
+
+def scratch_buffer(name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+    """ Thread-local scratch array, reused across calls with the same ``name``.
+
+    Storage is grown as needed and never shrinks, content of the returned array is
+    undefined. The array is only valid until the next call with the same ``name``
+    from the same thread, so don't hold on to it.
+    """
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape))
+    buffers = getattr(_SCRATCH, 'buffers', None)
+    if buffers is None:
+        buffers = _SCRATCH.buffers = {}
+
+    key = (name, dtype)
+    buf = buffers.get(key)
+    if buf is None or buf.size < size:
+        buf = buffers[key] = np.empty(size, dtype=dtype)
+
+    return buf[:size].reshape(shape)
+
+
+def fuse_first_valid_int(dst: np.ndarray, src: np.ndarray, nodata) -> None:
+    """ In-place "first valid wins" fuser for integer data.
+
+        Pixels of ``dst`` equal to ``nodata`` are replaced with pixels from ``src``,
+        with no temporary arrays allocated.
+    """
+    if nodata is None:
+        return
+    mask = scratch_buffer('fuse_mask', dst.shape, 'bool')
+    np.equal(dst, nodata, out=mask)
+    np.copyto(dst, src, where=mask)
+
+
+def fuse_first_valid_float(dst: np.ndarray, src: np.ndarray, nodata) -> None:
+    """ In-place "first valid wins" fuser for floating point data.
+
+        Pixels of ``dst`` that are NaN or equal to ``nodata`` are replaced with pixels
+        from ``src``, with no temporary arrays allocated.
+    """
+    mask = scratch_buffer('fuse_mask', dst.shape, 'bool')
+    np.isnan(dst, out=mask)
+    if nodata is not None and not np.isnan(nodata):
+        mask2 = scratch_buffer('fuse_mask2', dst.shape, 'bool')
+        np.equal(dst, nodata, out=mask2)
+        np.logical_or(mask, mask2, out=mask)
+    np.copyto(dst, src, where=mask)
+
 
 def _default_fuser(dst: np.ndarray, src: np.ndarray, dst_nodata) -> None:
     """ Overwrite only those pixels in `dst` with `src` that are "not valid"
@@ -33,7 +91,12 @@ def _default_fuser(dst: np.ndarray, src: np.ndarray, dst_nodata) -> None:
         For every pixel in dst that equals to dst_nodata replace it with pixel
         from src.
     """
-    np.copyto(dst, src, where=invalid_mask(dst, dst_nodata))
+    if dst.dtype.kind == 'f':
+        fuse_first_valid_float(dst, src, dst_nodata)
+    elif dst.dtype.kind in 'iu':
+        fuse_first_valid_int(dst, src, dst_nodata)
+    else:
+        np.copyto(dst, src, where=invalid_mask(dst, dst_nodata))
 
 
 def reproject_and_fuse(datasources: List[DataSource],
@@ -61,24 +124,28 @@ def reproject_and_fuse(datasources: List[DataSource],
     def copyto_fuser(dest: np.ndarray, src: np.ndarray) -> None:
         _default_fuser(dest, src, dst_nodata)
 
+    copyto_fuser.first_valid = True  # type: ignore
     fuse_func = fuse_func or copyto_fuser
 
     destination.fill(dst_nodata)
     if len(datasources) == 0:
         return destination
-    elif len(datasources) == 1:
+
+    # First source can go straight into the output, as long as fuser doesn't mind
+    direct = 1 if getattr(fuse_func, 'first_valid', False) else 0
+    for n_so_far, source in enumerate(datasources[:direct], 1):
         with ignore_exceptions_if(skip_broken_datasets):
-            with datasources[0].open() as rdr:
+            with source.open() as rdr:
                 read_time_slice(rdr, destination, dst_gbox, resampling, dst_nodata)
 
         if progress_cbk:
-            progress_cbk(1, 1)
+            progress_cbk(n_so_far, len(datasources))
 
-        return destination
-    else:
+    if len(datasources) > direct:
         # Multiple sources, we need to fuse them together into a single array
-        buffer_ = np.full(destination.shape, dst_nodata, dtype=destination.dtype)
-        for n_so_far, source in enumerate(datasources, 1):
+        buffer_ = scratch_buffer('fuse_src', destination.shape, destination.dtype)
+        buffer_.fill(dst_nodata)
+        for n_so_far, source in enumerate(datasources[direct:], direct + 1):
             with ignore_exceptions_if(skip_broken_datasets):
                 with source.open() as rdr:
                     roi = read_time_slice(rdr, buffer_, dst_gbox, resampling, dst_nodata)
@@ -90,7 +157,7 @@ def reproject_and_fuse(datasources: List[DataSource],
             if progress_cbk:
                 progress_cbk(n_so_far, len(datasources))
 
-        return destination
+    return destination
 
 
 def _coord_to_xr(name: str, c: Coordinate) -> XrDataArray:
@@ -125,12 +192,57 @@ def _allocate_storage(coords: Mapping[str, XrDataArray],
     return xx
 
 
+def _run_bounded(submit: Callable[[Any], Any],
+                 jobs: Iterable[Any],
+                 max_in_flight: int,
+                 backlog: Callable[[], int] = lambda: 0) -> Iterator[Tuple[Any, Any]]:
+    """ Call ``submit(job)``, which should return a :class:`concurrent.futures.Future`, for
+        every job, keeping at most ``max_in_flight`` jobs outstanding at any one time.
+
+        Jobs that completed but are still held by the caller count towards the limit,
+        ``backlog()`` should return how many there are.
+
+        Yields ``(job, future)`` in completion order.
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+
+    jobs = iter(jobs)
+    in_flight = {}
+
+    def top_up():
+        while len(in_flight) + backlog() < max_in_flight:
+            for job in jobs:
+                in_flight[submit(job)] = job
+                break
+            else:
+                return
+
+    top_up()
+    while in_flight:
+        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        for fut in done:
+            yield in_flight.pop(fut), fut
+        top_up()
+
+
 def xr_load(sources: XrDataArray,
             geobox: GeoBox,
             measurements: List[Measurement],
             driver: ReaderDriver,
             driver_ctx_prev: Optional[Any] = None,
-            skip_broken_datasets: bool = False) -> Tuple[XrDataset, Any]:
+            skip_broken_datasets: bool = False,
+            max_in_flight: int = 1) -> Tuple[XrDataset, Any]:
+    """ Load all ``sources`` into freshly allocated storage using reader ``driver``.
+
+    :param max_in_flight: Maximum number of bands being loaded at the same time, across all
+                          (time, measurement) groups. With the default of 1 bands are loaded
+                          one after another. Otherwise each band is opened, read and
+                          reprojected as one job on a pool of that many threads (raw reads
+                          still go through the driver, so a driver with a single worker
+                          will serialise them). Results are fused in the same order as the
+                          datasets within each group, so output does not depend on
+                          completion order.
+    """
     # pylint: disable=too-many-locals
     from ._read import read_time_slice_v2
 
@@ -149,22 +261,67 @@ def xr_load(sources: XrDataArray,
     groups = list(all_groups())
     ctx = driver.new_load_context(just_bands(groups), driver_ctx_prev)
 
-    # TODO: run upto N concurrently
-    for m, idx, bbi in groups:
-        dst = out[m.name].values[idx]
-        dst[:] = m.nodata
-        resampling = m.get('resampling_method', 'nearest')
-        fuse_func = m.get('fuser', None)
+    def read_band(m: Measurement, rdr_future, scratch: Optional[np.ndarray] = None):
+        with ignore_exceptions_if(skip_broken_datasets):
+            rdr = rdr_future.result()
+            return read_time_slice_v2(rdr, geobox, m.get('resampling_method', 'nearest'), m.nodata,
+                                      out=scratch)
+        return None, None
 
-        for band in bbi:
-            rdr = driver.open(band, ctx).result()
+    def fuse(m: Measurement, dst: np.ndarray, pix: Optional[np.ndarray], roi) -> None:
+        if pix is None:
+            return
 
-            pix, roi = read_time_slice_v2(rdr, geobox, resampling, m.nodata)
+        fuse_func = m.get('fuser', None)
+        if fuse_func:
+            fuse_func(dst[roi], pix)
+        else:
+            _default_fuser(dst[roi], pix, m.nodata)
 
-            if pix is not None:
-                if fuse_func:
-                    fuse_func(dst[roi], pix)
-                else:
-                    _default_fuser(dst[roi], pix, m.nodata)
+    dsts = []
+    for m, idx, _ in groups:
+        dst = out[m.name].values[idx]
+        dst[:] = m.nodata
+        dsts.append(dst)
+
+    if max_in_flight <= 1:
+        for (m, _, bbi), dst in zip(groups, dsts):
+            for band in bbi:
+                scratch = scratch_buffer('load_band', geobox.shape, m.dtype)
+                fuse(m, dst, *read_band(m, driver.open(band, ctx), scratch))
+        return out, ctx
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Bands are loaded concurrently and can complete out of order, but fusing must happen
+    # in dataset order within each group, so results that arrive early are parked until
+    # their turn comes. Parked results count towards ``max_in_flight``: a slow band holds
+    # back new loads rather than letting finished ones pile up in memory. Each result owns
+    # its pixels (no thread-local scratch), since it can outlive the job that produced it.
+    next_to_fuse = [0]*len(groups)
+    parked = [{} for _ in groups]  # type: List[Dict[int, Any]]
+    n_parked = [0]
+
+    jobs = ((g_idx, b_idx)
+            for g_idx, (_, _, bbi) in enumerate(groups)
+            for b_idx in range(len(bbi)))
+
+    def load_band(job: Tuple[int, int]):
+        g_idx, b_idx = job
+        m, _, bbi = groups[g_idx]
+        return read_band(m, driver.open(bbi[b_idx], ctx))
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        loads = _run_bounded(lambda job: pool.submit(load_band, job), jobs, max_in_flight, lambda: n_parked[0])
+        for (g_idx, b_idx), fut in loads:
+            parked[g_idx][b_idx] = fut.result()
+            n_parked[0] += 1
+            m = groups[g_idx][0]
+
+            while next_to_fuse[g_idx] in parked[g_idx]:
+                pix, roi = parked[g_idx].pop(next_to_fuse[g_idx])
+                n_parked[0] -= 1
+                fuse(m, dsts[g_idx], pix, roi)
+                next_to_fuse[g_idx] += 1
 
     return out, ctx
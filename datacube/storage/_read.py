@@ -2,7 +2,7 @@
 """
 from affine import Affine
 import numpy as np
-from typing import Tuple
+from typing import Tuple, Optional
 
 from ..utils.math import is_almost_int, valid_mask
 
@@ -81,7 +81,18 @@ def can_paste(rr, stol=1e-3, ttol=1e-2):
     return True, None
 
 
-def pick_read_scale(scale: float, rdr=None, tol=1e-3):
+def pick_read_scale(scale: float, rdr=None, tol=1e-3, ovr_tol=0.1):
+    """ Pick integer decimation factor to read source data at.
+
+    When reader reports available overviews (``rdr.overviews``), and the
+    coarsest overview not coarser than ``scale`` is within ``ovr_tol``
+    (relative) of it, read scale is snapped to that overview, so that pixels
+    are read straight out of that overview level and any remaining scaling is
+    done by the warper with the requested resampling method. Scales further
+    away from any overview level are left alone, GDAL picks overviews for
+    decimated reads by itself and snapping down further would only read more
+    pixels.
+    """
     assert scale > 0
     # First find nearest integer scale
     #    Scale down to nearest integer, unless we can scale up by less than tol
@@ -98,9 +109,13 @@ def pick_read_scale(scale: float, rdr=None, tol=1e-3):
 
     scale = int(scale)
 
-    if rdr is not None:
-        # TODO: check available overviews in rdr
-        pass
+    overviews = getattr(rdr, 'overviews', None) if rdr is not None else None
+    if overviews and scale > 1 and scale not in overviews:
+        usable = [ovr for ovr in overviews if ovr <= scale]
+        if usable and (scale - max(usable)) <= ovr_tol*scale:
+            # e.g. scale=17, overviews=(2, 4, 8, 16, 32) -> 16
+            #  but scale=37 stays 37
+            scale = max(usable)
 
     return scale
 
@@ -181,10 +196,14 @@ def read_time_slice(rdr,
 def read_time_slice_v2(rdr,
                        dst_gbox: GeoBox,
                        resampling: Resampling,
-                       dst_nodata: Nodata) -> Tuple[np.ndarray,
-                                                    Tuple[slice, slice]]:
+                       dst_nodata: Nodata,
+                       out: Optional[np.ndarray] = None) -> Tuple[np.ndarray,
+                                                                  Tuple[slice, slice]]:
     """ From opened reader object read into `dst`
 
+    :param out: Optional contiguous scratch array with at least as many pixels as
+                ``dst_gbox``, used when pixels have to be reprojected, returned pixels
+                might be a view into it. A fresh array is allocated when not supplied.
     :returns: pixels read and ROI of dst_gbox that was affected
     """
     # pylint: disable=too-many-locals
@@ -238,7 +257,12 @@ def read_time_slice_v2(rdr,
         if scale > 1:
             src_gbox = gbx.zoom_out(src_gbox, scale)
 
-        dst = np.full(dst_gbox.shape, dst_nodata, dtype=rdr.dtype)
+        n = dst_gbox.shape[0]*dst_gbox.shape[1]
+        if out is not None and out.dtype == rdr.dtype and out.flags.c_contiguous and out.size >= n:
+            dst = out.reshape(-1)[:n].reshape(dst_gbox.shape)
+            dst.fill(dst_nodata)
+        else:
+            dst = np.full(dst_gbox.shape, dst_nodata, dtype=rdr.dtype)
         pix = rdr.read(*norm_read_args(rr.roi_src, src_gbox.shape)).result()
 
         if rr.transform.linear is not None:
@@ -10,13 +10,13 @@ import numpy as np
 from affine import Affine
 import rasterio
 from urllib.parse import urlparse
-from typing import Optional, Iterator
+from typing import Optional, Iterator, Tuple
 
 from datacube.utils import datetime_to_seconds_since_1970
 from datacube.utils import geometry
 from datacube.utils.math import num2numpy
 from datacube.utils import uri_to_local_path, get_part_from_uri
-from datacube.utils.rio import activate_from_config
+from datacube.utils.rio import activate_from_config, rio_handle_pool
 from . import DataSource, GeoRasterReader, RasterShape, RasterWindow, BandInfo
 
 _LOG = logging.getLogger(__name__)
@@ -76,6 +76,10 @@ class BandDataSource(GeoRasterReader):
     def shape(self) -> RasterShape:
         return self.source.shape
 
+    @property
+    def overviews(self) -> Tuple[int, ...]:
+        return tuple(self.source.ds.overviews(self.source.bidx))
+
     def read(self, window: Optional[RasterWindow] = None,
              out_shape: Optional[RasterShape] = None) -> Optional[np.ndarray]:
         """Read data in the native format, returning a numpy array
@@ -125,6 +129,10 @@ class OverrideBandDataSource(GeoRasterReader):
     def shape(self) -> RasterShape:
         return self.source.shape
 
+    @property
+    def overviews(self) -> Tuple[int, ...]:
+        return tuple(self.source.ds.overviews(self.source.bidx))
+
     def read(self, window: Optional[RasterWindow] = None,
              out_shape: Optional[RasterShape] = None) -> Optional[np.ndarray]:
         """Read data in the native format, returning a native array
@@ -164,7 +172,7 @@ class RasterioDataSource(DataSource):
 
         try:
             _LOG.debug("opening %s", self.filename)
-            with rasterio.open(self.filename, sharing=False) as src:
+            with rio_handle_pool().checkout(self.filename, lock=lock) as src:
                 override = False
 
                 transform = src.transform
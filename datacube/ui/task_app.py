@@ -10,6 +10,8 @@ import re
 from pathlib import Path
 import pandas as pd
 import pickle
+import sqlite3
+import threading
 
 from datacube.ui import click as dc_ui
 from datacube.utils import read_documents
@@ -77,6 +79,117 @@ def load_tasks(taskfile):
     return config, stream
 
 
+class TaskLedger(object):
+    """
+    Persistent record of tasks and their progress, kept in a local SQLite file.
+
+    Every task is stored under a unique string key, together with a fingerprint of its
+    inputs and its current state, one of :attr:`STATES`. Arbitrary picklable values can
+    also be stored against string keys with :meth:`get_meta`/:meth:`set_meta`.
+
+    Safe to use from several threads of the same process.
+    """
+    PLANNED = 'planned'
+    RUNNING = 'running'
+    WRITTEN = 'written'
+    INDEXED = 'indexed'
+    FAILED = 'failed'
+    STATES = (PLANNED, RUNNING, WRITTEN, INDEXED, FAILED)
+
+    def __init__(self, filename):
+        self.filename = str(filename)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.filename, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta '
+                               '(key TEXT PRIMARY KEY, value BLOB)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS task '
+                               '(key TEXT PRIMARY KEY, fingerprint TEXT, state TEXT, '
+                               'task BLOB, result BLOB, updated REAL)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def _execute(self, sql, *args):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, args).fetchall()
+
+    def get_meta(self, key, default=None):
+        rows = self._execute('SELECT value FROM meta WHERE key = ?', key)
+        return pickle.loads(rows[0][0]) if rows else default
+
+    def set_meta(self, key, value):
+        self._execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                      key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+    def clear(self):
+        """ Forget all tasks and meta values """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM meta')
+            self._conn.execute('DELETE FROM task')
+
+    def lookup(self, key):
+        """
+        :return: ``(fingerprint, state)`` of a recorded task, or ``None``
+        """
+        rows = self._execute('SELECT fingerprint, state FROM task WHERE key = ?', key)
+        return tuple(rows[0]) if rows else None
+
+    def get_task(self, key):
+        rows = self._execute('SELECT task FROM task WHERE key = ?', key)
+        return pickle.loads(rows[0][0]) if rows else None
+
+    def add(self, key, fingerprint, task):
+        """ Record a new task, or replace an existing one, in the planned state """
+        self._execute('INSERT OR REPLACE INTO task (key, fingerprint, state, task, result, updated) '
+                      'VALUES (?, ?, ?, ?, NULL, ?)',
+                      key, fingerprint, self.PLANNED, pickle.dumps(task, pickle.HIGHEST_PROTOCOL), time.time())
+
+    def set_state(self, keys, state, result=None):
+        """
+        Move tasks to a new state.
+
+        :param keys: sequence of task keys
+        :param state: one of :attr:`STATES`
+        :param result: value to store against every task, only kept while in the ``written`` state
+        """
+        if state not in self.STATES:
+            raise ValueError('Unknown task state: {}'.format(state))
+        if state != self.WRITTEN:
+            result = None
+        blob = None if result is None else pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.executemany('UPDATE task SET state = ?, result = ?, updated = ? WHERE key = ?',
+                                   [(state, blob, now, key) for key in keys])
+
+    def tasks(self, *states):
+        """ Iterate over tasks in any of the given states, in planning order """
+        marks = ','.join('?' * len(states))
+        rows = self._execute('SELECT task FROM task WHERE state IN ({}) ORDER BY rowid'.format(marks), *states)
+        return (pickle.loads(task) for task, in rows)
+
+    def results(self):
+        """ Iterate over ``(key, result)`` of all tasks in the ``written`` state """
+        rows = self._execute('SELECT key, result FROM task WHERE state = ? ORDER BY rowid', self.WRITTEN)
+        return ((key, pickle.loads(result)) for key, result in rows)
+
+    def counts(self):
+        """
+        :return: dict of state -> number of tasks in that state
+        """
+        counts = dict.fromkeys(self.STATES, 0)
+        counts.update(self._execute('SELECT state, count(*) FROM task GROUP BY state'))
+        return counts
+
+
 # This is a function, so it's valid to be lowercase.
 #: pylint: disable=invalid-name
 app_config_option = click.option('--app-config', help='App configuration file',
@@ -9,6 +9,9 @@ from ._base import (
     Geometry,
     GeoBox,
     bbox_union,
+    bboxes_union,
+    bboxes_intersect,
+    batch_to_crs,
     intersects,
     scaled_down_geobox,
     point,
@@ -46,6 +49,7 @@ from .tools import (
     compute_reproject_roi,
     split_translation,
     compute_axis_overlap,
+    polygon_grid_mask,
     w_,
 )
 
@@ -62,6 +66,9 @@ __all__ = [
     "Geometry",
     "GeoBox",
     "bbox_union",
+    "bboxes_union",
+    "bboxes_intersect",
+    "batch_to_crs",
     "intersects",
     "point",
     "multipoint",
@@ -96,6 +103,7 @@ __all__ = [
     "native_pix_transform",
     "compute_reproject_roi",
     "split_translation",
+    "polygon_grid_mask",
     "warp_affine",
     "rio_reproject",
     "w_",
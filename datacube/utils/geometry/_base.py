@@ -1,8 +1,10 @@
 import functools
 import itertools
 import math
+import struct
+import threading
 from collections import namedtuple, OrderedDict
-from typing import Tuple, Callable, Iterable, List
+from typing import Tuple, Callable, Iterable, List, Optional
 
 import cachetools
 import numpy
@@ -89,31 +91,47 @@ def _make_crs(crs_str):
     return crs
 
 
+_CRS_INTERNED = cachetools.LRUCache(maxsize=1024)  # type: cachetools.LRUCache
+_CRS_INTERNED_LOCK = threading.Lock()
+
+
 class CRS(object):
     """
     Wrapper around `osr.SpatialReference` providing a more pythonic interface
 
+    Instances are interned: constructing a CRS from a string that was seen recently
+    returns the same (immutable) object.
     """
 
+    def __new__(cls, crs_str):
+        if isinstance(crs_str, CRS):
+            return crs_str
+
+        with _CRS_INTERNED_LOCK:
+            crs = _CRS_INTERNED.get(crs_str)
+        if crs is not None:
+            return crs
+
+        crs = super(CRS, cls).__new__(cls)
+        crs.crs_str = crs_str
+        crs._crs = _make_crs(crs_str)  # pylint: disable=protected-access
+
+        with _CRS_INTERNED_LOCK:
+            return _CRS_INTERNED.setdefault(crs_str, crs)
+
     def __init__(self, crs_str):
         """
 
         :param crs_str: string representation of a CRS, often an EPSG code like 'EPSG:4326'
         :raises: InvalidCRSError
         """
-        if isinstance(crs_str, CRS):
-            crs_str = crs_str.crs_str
-        self.crs_str = crs_str
-        self._crs = _make_crs(crs_str)
+        # Everything is done in __new__
 
     def __getitem__(self, item):
         return self._crs.GetAttrValue(item)
 
-    def __getstate__(self):
-        return {'crs_str': self.crs_str}
-
-    def __setstate__(self, state):
-        self.__init__(state['crs_str'])
+    def __reduce__(self):
+        return (CRS, (self.crs_str,))
 
     @property
     def wkt(self):
@@ -229,6 +247,11 @@ class CRS(object):
         return self._crs.IsSame(other._crs) != 1  # pylint: disable=protected-access
 
 
+# OGR transformation objects are not safe to use from several threads at once, so the calling
+# thread is part of the key: a thread never gets a transformer another live thread is using.
+@cachetools.cached(cachetools.LRUCache(maxsize=256),
+                   key=lambda src_crs, dst_crs: (src_crs.crs_str, dst_crs.crs_str, threading.get_ident()),
+                   lock=threading.Lock())
 def mk_osr_point_transform(src_crs, dst_crs):
     return osr.CoordinateTransformation(src_crs._crs, dst_crs._crs)  # pylint: disable=protected-access
 
@@ -456,6 +479,10 @@ class Geometry(object):
     def wkt(self):
         return getattr(self._geom, 'ExportToIsoWkt', self._geom.ExportToWkt)()
 
+    @property
+    def wkb(self):
+        return bytes(getattr(self._geom, 'ExportToIsoWkb', self._geom.ExportToWkb)())
+
     @property
     def json(self):
         return self.__geo_interface__
@@ -958,6 +985,10 @@ class GeoBox(object):
                 and self.transform == other.transform
                 and self.crs == other.crs)
 
+    def __hash__(self):
+        # CRS equality is fuzzy (same CRS can be spelled differently), so leave it out of the hash
+        return hash((self.shape, self.affine))
+
 
 def scaled_down_geobox(src_geobox, scaler: int):
     """Given a source geobox and integer scaler compute geobox of a scaled down image.
@@ -1014,3 +1045,158 @@ def bbox_union(bbs: Iterable[BoundingBox]) -> BoundingBox:
         T = max(t, T)
 
     return BoundingBox(L, B, R, T)
+
+
+def bboxes_union(bbs: numpy.ndarray) -> BoundingBox:
+    """ Vectorised version of :func:`bbox_union`
+
+    :param bbs: ``(N, 4)`` array of ``(left, bottom, right, top)``, rows with NaNs are ignored
+    """
+    bbs = numpy.asarray(bbs, dtype='float64').reshape(-1, 4)
+    if bbs.shape[0] == 0:
+        return bbox_union([])
+
+    l, b = (numpy.fmin.reduce(bbs[:, i]) for i in (0, 1))
+    r, t = (numpy.fmax.reduce(bbs[:, i]) for i in (2, 3))
+    return BoundingBox(float(l), float(b), float(r), float(t))
+
+
+def bboxes_intersect(bbs: numpy.ndarray, bbox: BoundingBox) -> numpy.ndarray:
+    """ Check which of the bounding boxes overlap with ``bbox``, all at once.
+
+    Boxes that only share an edge or a corner with ``bbox`` are considered overlapping, same as
+    :func:`intersects`, so this is a safe pre-filter for it.
+
+    :param bbs: ``(N, 4)`` array of ``(left, bottom, right, top)``
+    :returns: Boolean array of length ``N``
+    """
+    bbs = numpy.asarray(bbs, dtype='float64').reshape(-1, 4)
+    l, b, r, t = bbox
+    return (bbs[:, 0] <= r) & (bbs[:, 2] >= l) & (bbs[:, 1] <= t) & (bbs[:, 3] >= b)
+
+
+def _wkb_coord_blocks(wkb, offset: int, out: List[Tuple[int, int]]) -> int:
+    """ Find all runs of 2d coordinates inside little-endian WKB.
+
+    Appends ``(byte offset, number of points)`` for every run to ``out``.
+
+    :returns: Offset of the first byte past the geometry starting at ``offset``
+    """
+    if wkb[offset] != 1:
+        raise ValueError('Expect little-endian WKB')
+    gtype, = struct.unpack_from('<I', wkb, offset + 1)
+    offset += 5
+
+    if gtype == 1:  # Point
+        out.append((offset, 1))
+        return offset + 16
+
+    n, = struct.unpack_from('<I', wkb, offset)
+    offset += 4
+
+    if gtype == 2:  # LineString
+        out.append((offset, n))
+        return offset + 16*n
+
+    if gtype == 3:  # Polygon
+        for _ in range(n):
+            npts, = struct.unpack_from('<I', wkb, offset)
+            out.append((offset + 4, npts))
+            offset += 4 + 16*npts
+        return offset
+
+    if gtype in (4, 5, 6, 7):  # Multi* and GeometryCollection
+        for _ in range(n):
+            offset = _wkb_coord_blocks(wkb, offset, out)
+        return offset
+
+    raise ValueError('Unsupported WKB geometry type: %d' % gtype)
+
+
+def batch_to_crs(geoms: Iterable[Geometry],
+                 crs: CRS,
+                 resolution: Optional[float] = None) -> Tuple[List[Geometry], numpy.ndarray]:
+    """ Convert many geometries to a different CRS at once.
+
+    Same as calling ``g.to_crs(crs, resolution)`` on every geometry, except that points
+    of all geometries sharing a source CRS are packed into one array and reprojected
+    with a single call, and bounding boxes are computed from that array without
+    going back to OGR.
+
+    :param geoms: Geometries, possibly in different CRSs
+    :param crs: CRS to convert to
+    :param resolution: Subdivide geometries such that no segment is longer than this,
+                       default depends on the source CRS like in :meth:`Geometry.to_crs`
+    :returns: Geometries in ``crs`` (in the same order) and ``(N, 4)`` array of their
+              bounding boxes as ``(left, bottom, right, top)``, NaN for empty geometries.
+    """
+    # pylint: disable=too-many-locals,protected-access
+    geoms = list(geoms)
+    out = [None]*len(geoms)  # type: List[Geometry]
+    bbs = numpy.full((len(geoms), 4), numpy.nan)
+
+    groups = OrderedDict()  # type: OrderedDict
+    for i, geom in enumerate(geoms):
+        groups.setdefault(geom.crs.crs_str, []).append(i)
+
+    for idx in groups.values():
+        src_crs = geoms[idx[0]].crs
+
+        if src_crs == crs:
+            for i in idx:
+                out[i] = geoms[i]
+                if not geoms[i].is_empty:
+                    x0, x1, y0, y1 = geoms[i]._geom.GetEnvelope()
+                    bbs[i] = (x0, y0, x1, y1)
+            continue
+
+        res = resolution
+        if res is None:
+            res = 1 if src_crs.geographic else 100000
+
+        wkbs, blocks, parts = [], [], []
+        npoints = numpy.zeros(len(idx), dtype='int64')
+        for n, i in enumerate(idx):
+            clone = geoms[i]._geom.Clone()
+            clone.FlattenTo2D()
+            clone.Segmentize(res)
+            # Segmentize can cause issues with polygons using GDAL 2.4.1
+            # See: https://github.com/OSGeo/gdal/issues/1414
+            clone.CloseRings()
+
+            wkb = bytearray(clone.ExportToWkb(ogr.wkbNDR))
+            blks = []  # type: List[Tuple[int, int]]
+            _wkb_coord_blocks(wkb, 0, blks)
+            for off, npts in blks:
+                parts.append(numpy.frombuffer(wkb, dtype='<f8', count=2*npts, offset=off))
+            npoints[n] = sum(npts for _, npts in blks)
+            wkbs.append(wkb)
+            blocks.append(blks)
+
+        if parts:
+            xy = numpy.concatenate(parts).reshape(-1, 2)
+            x, y = mk_point_transformer(src_crs, crs)(xy[:, 0], xy[:, 1])
+            xy = numpy.stack([x, y], axis=1).ravel()
+        else:
+            xy = numpy.zeros(0, dtype='float64')
+
+        pos = 0
+        for wkb, blks in zip(wkbs, blocks):
+            for off, npts in blks:
+                numpy.frombuffer(wkb, dtype='<f8', count=2*npts, offset=off)[:] = xy[pos:pos + 2*npts]
+                pos += 2*npts
+
+        for i, wkb in zip(idx, wkbs):
+            out[i] = _make_geom_from_ogr(ogr.CreateGeometryFromWkb(bytes(wkb)), crs)
+
+        non_empty = numpy.nonzero(npoints)[0]
+        if len(non_empty) > 0:
+            starts = numpy.concatenate([[0], numpy.cumsum(npoints)[:-1]])[non_empty]
+            xx, yy = xy[0::2], xy[1::2]
+            rows = numpy.asarray(idx)[non_empty]
+            bbs[rows, 0] = numpy.fmin.reduceat(xx, starts)
+            bbs[rows, 1] = numpy.fmin.reduceat(yy, starts)
+            bbs[rows, 2] = numpy.fmax.reduceat(xx, starts)
+            bbs[rows, 3] = numpy.fmax.reduceat(yy, starts)
+
+    return out, bbs
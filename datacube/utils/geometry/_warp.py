@@ -1,9 +1,10 @@
-from typing import Union, Optional
+from typing import Union, Optional, Tuple
 import rasterio.warp
 import rasterio.crs
 import numpy as np
 from affine import Affine
 from . import GeoBox
+from ..math import valid_mask
 
 Resampling = Union[str, int, rasterio.warp.Resampling]  # pylint: disable=invalid-name
 Nodata = Optional[Union[int, float]]  # pylint: disable=invalid-name
@@ -87,6 +88,171 @@ def warp_affine_rio(src: np.ndarray,
     return dst0
 
 
+def _np_resampling(resampling: Resampling) -> Optional[str]:
+    """
+    :returns: Name of the resampling method if it is supported by :func:`warp_affine_np`, None otherwise
+    """
+    if isinstance(resampling, str):
+        name = resampling.lower()
+    else:
+        try:
+            name = rasterio.warp.Resampling(resampling).name
+        except ValueError:
+            return None
+
+    return name if name in ('nearest', 'average', 'mode') else None
+
+
+def _np_axis_plan(s: float, t: float,
+                  n_src: int, n_dst: int,
+                  nearest: bool,
+                  tol: float = 1e-6) -> Optional[Tuple[slice, np.ndarray]]:
+    """
+    Work out which source pixels contribute to each destination pixel along one axis.
+
+    :param s: scale, dst pixel -> src pixel, must be a non-zero integer (negative for flips)
+    :param t: translation, dst pixel -> src pixel, must be an integer unless ``nearest``
+    :returns: (dst_slice, src_idx) where ``src_idx`` is an ``(N, k)`` integer array of
+              source pixels for every destination pixel in ``dst_slice``, or None if
+              transform doesn't qualify
+    """
+    k = int(round(abs(s)))
+    if k < 1 or abs(abs(s) - k) > tol:
+        return None
+
+    jj = np.arange(n_dst)
+    lo = t + np.minimum(s*jj, s*(jj + 1))  # start of the dst pixel footprint in src pixels
+    inside = (lo > -tol) & (lo + k < n_src + tol)
+
+    if nearest:
+        # pixel that contains the centre of the destination pixel
+        centre = t + s*(jj + 0.5)
+        idx = np.floor(centre + tol).astype('int64')
+
+        # GDAL treats centres that fall on a pixel edge differently near
+        # image boundaries, leave those cases to GDAL
+        if not inside.all() and (np.abs(centre - np.round(centre)) < tol).any():
+            return None
+
+        ok = (idx >= 0) & (idx < n_src)
+        idx = idx.reshape(-1, 1)
+    else:
+        # partially covered pixels are handled differently by GDAL,
+        # only do the simple case of all pixels being fully inside
+        if abs(t - round(t)) > tol or not inside.all():
+            return None
+
+        ok = inside
+        idx = np.round(lo).astype('int64').reshape(-1, 1) + np.arange(k)
+
+    jj = np.nonzero(ok)[0]
+    if len(jj) == 0:
+        return slice(0, 0), idx[:0]
+
+    return slice(int(jj[0]), int(jj[-1]) + 1), idx[jj]
+
+
+def _np_mode(pix: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Most common valid value along the last axis.
+
+    Ties are resolved like GDAL does: winner is the value that reaches the top
+    count first when scanning in order.
+
+    :returns: (mode, has_valid)
+    """
+    order = np.argsort(pix, axis=-1, kind='mergesort')
+    pix_sorted = np.take_along_axis(pix, order, axis=-1)
+
+    # n-th occurrence of the same value, counted in scan order
+    pos = np.broadcast_to(np.arange(pix.shape[-1]), pix.shape)
+    run_start = np.zeros(pix.shape, dtype='int64')
+    run_start[..., 1:] = np.where(pix_sorted[..., 1:] != pix_sorted[..., :-1], pos[..., 1:], 0)
+    run_start = np.maximum.accumulate(run_start, axis=-1)
+
+    occurrence = np.empty(pix.shape, dtype='int64')
+    np.put_along_axis(occurrence, order, pos - run_start + 1, axis=-1)
+    occurrence[~valid] = 0
+
+    best = np.argmax(occurrence, axis=-1)[..., np.newaxis]
+    mode = np.take_along_axis(pix, best, axis=-1)[..., 0]
+    has_valid = np.take_along_axis(occurrence, best, axis=-1)[..., 0] > 0
+    return mode, has_valid
+
+
+def warp_affine_np(src: np.ndarray,
+                   dst: np.ndarray,
+                   A: Affine,
+                   resampling: Resampling,
+                   src_nodata: Nodata = None,
+                   dst_nodata: Nodata = None,
+                   tol: float = 1e-6) -> Optional[np.ndarray]:
+    """
+    Perform Affine warp using numpy, only supports a narrow set of cases:
+
+    - ``A`` is integer scale (possibly with flips) plus translation, no rotation/shear
+    - nearest resampling (any translation), or average|mode resampling with integer
+      translation where every destination pixel is fully inside of the source image
+
+    These are common when reading from overviews or pasting with a pixel shift, and
+    are much cheaper than setting up a GDAL warper.
+
+    :param        src: image as ndarray
+    :param        dst: image as ndarray
+    :param          A: Affine transformm, maps from dst_coords to src_coords
+    :param resampling: str|rasterio.warp.Resampling resampling strategy
+    :param src_nodata: Value representing "no data" in the source image
+    :param dst_nodata: Value to represent "no data" in the destination image, defaults to ``src_nodata``, or 0
+
+    :returns: dst, or None if transform or resampling is not supported, ``dst`` is not modified in that case
+    """
+    # pylint: disable=too-many-locals
+    method = _np_resampling(resampling)
+    if method is None or src.ndim != 2 or dst.ndim != 2:
+        return None
+
+    if abs(A.b) > tol or abs(A.d) > tol:
+        return None
+
+    nearest = method == 'nearest'
+    plan_y = _np_axis_plan(A.e, A.f, src.shape[0], dst.shape[0], nearest, tol)
+    plan_x = _np_axis_plan(A.a, A.c, src.shape[1], dst.shape[1], nearest, tol)
+    if plan_y is None or plan_x is None:
+        return None
+
+    (ys, iy), (xs, ix) = plan_y, plan_x
+
+    # same as GDAL's INIT_DEST=NO_DATA, which is what rasterio asks for
+    if dst_nodata is None:
+        dst_nodata = src_nodata
+    dst[:] = 0 if dst_nodata is None else dst_nodata
+
+    (ny, ky), (nx, kx) = iy.shape, ix.shape
+    if ny == 0 or nx == 0:
+        return dst
+
+    pix = src[iy[:, :, np.newaxis, np.newaxis], ix[np.newaxis, np.newaxis, :, :]]
+    pix = pix.transpose(0, 2, 1, 3).reshape(ny, nx, ky*kx)
+    valid = valid_mask(pix, src_nodata)
+    out = dst[ys, xs]
+
+    if nearest:
+        np.copyto(out, pix[..., 0], where=valid[..., 0], casting='unsafe')
+    elif method == 'average':
+        total = np.where(valid, pix, 0).sum(axis=-1, dtype='float64')
+        count = valid.sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = total/count
+        if dst.dtype.kind in 'iub':
+            avg = np.floor(avg + 0.5)  # round half up, like GDAL
+        np.copyto(out, avg, where=count > 0, casting='unsafe')
+    else:
+        mode, has_valid = _np_mode(pix, valid)
+        np.copyto(out, mode, where=has_valid, casting='unsafe')
+
+    return dst
+
+
 def warp_affine(src: np.ndarray,
                 dst: np.ndarray,
                 A: Affine,
@@ -95,7 +261,11 @@ def warp_affine(src: np.ndarray,
                 dst_nodata: Nodata = None,
                 **kwargs) -> np.ndarray:
     """
-    Perform Affine warp using best available backend (GDAL via rasterio is the only one so far).
+    Perform Affine warp using best available backend.
+
+    Integer scale and translation only transforms with nearest, average or mode
+    resampling are done with numpy (see :func:`warp_affine_np`), everything else
+    uses GDAL via rasterio.
 
     :param        src: image as ndarray
     :param        dst: image as ndarray
@@ -108,6 +278,13 @@ def warp_affine(src: np.ndarray,
 
     :returns: dst
     """
+    if not kwargs:
+        out = warp_affine_np(src, dst, A, resampling,
+                             src_nodata=src_nodata,
+                             dst_nodata=dst_nodata)
+        if out is not None:
+            return out
+
     return warp_affine_rio(src, dst, A, resampling,
                            src_nodata=src_nodata,
                            dst_nodata=dst_nodata,
@@ -1,13 +1,14 @@
 """ Geometric operations on GeoBox class
 """
 
-from typing import Optional, Tuple, Dict, Iterable
+from typing import Optional, Tuple, Dict, Iterable, List, Any
 import itertools
 import math
+import numpy
 from affine import Affine
 
 from . import Geometry, GeoBox, BoundingBox
-from .tools import align_up
+from .tools import align_up, apply_affine, polygon_grid_mask
 from datacube.utils.math import clamp
 
 # pylint: disable=invalid-name
@@ -133,6 +134,15 @@ def affine_transform_pix(gbox: GeoBox, transform: Affine) -> GeoBox:
     return GeoBox(W, H, A, gbox.crs)
 
 
+def _polygon_rings(poly: Geometry) -> List[Any]:
+    """ All rings of a Polygon or MultiPolygon as lists of points.
+    """
+    coords = poly.json['coordinates']
+    if poly.type == 'Polygon':
+        return list(coords)
+    return [ring for part in coords for ring in part]
+
+
 class GeoboxTiles():
     """ Partition GeoBox into sub geoboxes
     """
@@ -226,7 +236,42 @@ class GeoboxTiles():
         """
         poly = polygon.to_crs(self._gbox.crs)
         yy, xx = self.range_from_bbox(poly.envelope)
-        for idx in itertools.product(yy, xx):
-            gbox = self[idx]
-            if gbox.extent.intersects(poly):
-                yield idx
+
+        if poly.type not in ('Polygon', 'MultiPolygon'):
+            for idx in itertools.product(yy, xx):
+                gbox = self[idx]
+                if gbox.extent.intersects(poly):
+                    yield idx
+            return
+
+        mask = self.tiles_mask(poly, yy, xx)
+        for iy, ix in zip(*numpy.nonzero(mask)):
+            yield (yy.start + int(iy), xx.start + int(ix))
+
+    def tiles_mask(self,
+                   polygon: Geometry,
+                   yy: Optional[range] = None,
+                   xx: Optional[range] = None) -> numpy.ndarray:
+        """ Compute which tiles intersect with a (multi-)polygon, all tiles at once.
+
+        :param polygon: Polygon in the same CRS as the base ``GeoBox``
+        :param yy: Rows of tiles to consider, default is all of them
+        :param xx: Columns of tiles to consider, default is all of them
+        :returns: Boolean mask of shape ``(len(yy), len(xx))``
+        """
+        NY, NX = self.shape
+        yy = range(NY) if yy is None else yy
+        xx = range(NX) if xx is None else xx
+
+        def edges(rr: range, tile_sz: int, total_sz: int) -> numpy.ndarray:
+            ee = numpy.arange(rr.start, rr.stop + 1, dtype='float64')*tile_sz
+            return numpy.minimum(ee, total_sz)
+
+        H, W = self._gbox.shape
+        h, w = self._tile_shape
+
+        A = ~self._gbox.transform
+        rings = [numpy.column_stack(apply_affine(A, *numpy.asarray(ring, dtype='float64')[:, :2].T))
+                 for ring in _polygon_rings(polygon) if len(ring) > 0]
+
+        return polygon_grid_mask(rings, edges(xx, w, W), edges(yy, h, H))
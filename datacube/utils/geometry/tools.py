@@ -1,5 +1,6 @@
 import numpy as np
 import collections
+import threading
 from types import SimpleNamespace
 from typing import Tuple
 from affine import Affine
@@ -192,6 +193,91 @@ def apply_affine(A: Affine, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, n
     return (x, y)
 
 
+def _axis_crossings(a0, a1, b0, b1, lines):
+    """ Find points where segments (a0, b0)->(a1, b1) cross lines ``a = lines[i]``.
+
+    :param lines: Sorted positions of the lines
+    :returns: (a, b) coordinates of all crossing points
+    """
+    lo = np.searchsorted(lines, np.minimum(a0, a1), side='left')
+    hi = np.searchsorted(lines, np.maximum(a0, a1), side='right')
+    n = np.where(a0 != a1, hi - lo, 0)
+
+    seg = np.repeat(np.arange(a0.shape[0]), n)
+    first = np.repeat(np.cumsum(n) - n, n)
+    a = lines[np.repeat(lo, n) + (np.arange(seg.shape[0]) - first)]
+
+    t = (a - a0[seg])/(a1[seg] - a0[seg])
+    b = b0[seg] + t*(b1[seg] - b0[seg])
+    return a, b
+
+
+def polygon_grid_mask(rings, xedges, yedges, eps=1e-6):
+    """ Find cells of a rectilinear grid that intersect with a polygon.
+
+    Cell ``(r, c)`` spans ``[xedges[c], xedges[c+1]] x [yedges[r], yedges[r+1]]``.
+    A cell intersects the polygon when polygon boundary passes through it
+    (touching counts), or when the whole cell is inside the polygon, which is
+    then decided by the cell centre. All cells are processed at once, cost is
+    linear in the number of polygon edges and grid lines they cross.
+
+    :param rings: Sequence of polygon rings, each an ``Nx2`` array of (x, y)
+                  points. Holes and multi-part polygons are handled with the
+                  even-odd rule.
+    :param xedges: Increasing cell boundaries along x, ``nx + 1`` values
+    :param yedges: Increasing cell boundaries along y, ``ny + 1`` values
+    :param eps: Points closer than that to a cell boundary touch both cells
+    :returns: Boolean array of shape ``(ny, nx)``
+    """
+    xedges = np.asarray(xedges, dtype='float64')
+    yedges = np.asarray(yedges, dtype='float64')
+    ny, nx = len(yedges) - 1, len(xedges) - 1
+    mask = np.zeros((ny, nx), dtype='bool')
+
+    segments = []
+    for ring in rings:
+        ring = np.asarray(ring, dtype='float64')[:, :2]
+        if ring.shape[0] == 0:
+            continue
+        if not (ring[0] == ring[-1]).all():
+            ring = np.vstack([ring, ring[:1]])
+        segments.append(np.hstack([ring[:-1], ring[1:]]))
+
+    if not segments or ny <= 0 or nx <= 0:
+        return mask
+
+    x0, y0, x1, y1 = np.vstack(segments).T
+
+    def mark(x, y):
+        for dx in (-eps, eps):
+            ix = np.searchsorted(xedges, x + dx, side='right') - 1
+            for dy in (-eps, eps):
+                iy = np.searchsorted(yedges, y + dy, side='right') - 1
+                ok = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+                mask[iy[ok], ix[ok]] = True
+
+    # Cells with polygon boundary passing through them: between any two
+    # consecutive points below a segment stays within one cell
+    mark(x0, y0)
+    mark(*_axis_crossings(x0, x1, y0, y1, xedges))
+    mark(*_axis_crossings(y0, y1, x0, x1, yedges)[::-1])
+
+    # Cells fully inside: even-odd test of cell centres, one scan line per row
+    cx = (xedges[:-1] + xedges[1:])*0.5
+    cy = (yedges[:-1] + yedges[1:])*0.5
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crosses = (y0[None, :] > cy[:, None]) != (y1[None, :] > cy[:, None])
+        xint = x0 + (cy[:, None] - y0)*(x1 - x0)/(y1 - y0)
+
+    for row in range(ny):
+        xs = np.sort(xint[row][crosses[row]])
+        n_right = xs.shape[0] - np.searchsorted(xs, cx, side='right')
+        mask[row] |= (n_right % 2) == 1
+
+    return mask
+
+
 def split_translation(t):
     """
     Split translation into pixel aligned and sub-pixel components.
@@ -552,6 +638,54 @@ def roi_from_points(xy, shape, padding=0, align=None):
     return to_roi(yy, xx)
 
 
+ReprojectRoiCacheInfo = collections.namedtuple('ReprojectRoiCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class _ReprojectRoiCache(object):
+    """ Bounded LRU cache of :func:`compute_reproject_roi` results with hit statistics.
+
+    Keyed on ``(src, dst, padding, align)``, so GeoBoxes need to be hashable. Entries
+    are shared by all threads and hold no ``transform``, as cross CRS transforms wrap
+    OGR objects that must not be used from several threads at once.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            rr = self._cache.get(key, None)
+            if rr is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return rr
+
+    def put(self, key, rr):
+        with self._lock:
+            self._cache[key] = rr
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def info(self):
+        with self._lock:
+            return ReprojectRoiCacheInfo(self.hits, self.misses, self.maxsize, len(self._cache))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+_REPROJECT_ROI_CACHE = _ReprojectRoiCache()
+
+
 def compute_reproject_roi(src, dst, padding=None, align=None):
     """Given two GeoBoxes find the region within the source GeoBox that overlaps
     with the destination GeoBox, and also compute the scale factor (>1 means
@@ -594,7 +728,26 @@ def compute_reproject_roi(src, dst, padding=None, align=None):
 
     For scale direction is: "scale > 1 --> shrink src to fit dst"
 
+    Results are cached per ``(src, dst, padding, align)``, see
+    :func:`compute_reproject_roi.cache_info` and :func:`compute_reproject_roi.cache_clear`.
+    Every call returns a fresh namespace, so callers are free to modify it, with a
+    ``.transform`` made for the calling thread.
     """
+    key = (src, dst, padding, align)
+    cached = _REPROJECT_ROI_CACHE.get(key)
+    if cached is None:
+        rr = _compute_reproject_roi(src, dst, padding, align)
+        _REPROJECT_ROI_CACHE.put(key, {k: v for k, v in vars(rr).items() if k != 'transform'})
+        return rr
+
+    return SimpleNamespace(transform=native_pix_transform(src, dst), **cached)
+
+
+compute_reproject_roi.cache_info = _REPROJECT_ROI_CACHE.info  # type: ignore
+compute_reproject_roi.cache_clear = _REPROJECT_ROI_CACHE.clear  # type: ignore
+
+
+def _compute_reproject_roi(src, dst, padding, align):
     pts_per_side = 5
 
     def compute_roi(src, dst, tr, pts_per_side, padding, align):
@@ -10,6 +10,11 @@ from ._rio import (
     set_default_rio_config,
     activate_from_config,
 )
+from ._pool import (
+    RioHandlePool,
+    rio_handle_pool,
+    configure_rio_handle_pool,
+)
 
 __all__ = (
     'activate_rio_env',
@@ -17,4 +22,7 @@ __all__ = (
     'get_rio_env',
     'set_default_rio_config',
     'activate_from_config',
+    'RioHandlePool',
+    'rio_handle_pool',
+    'configure_rio_handle_pool',
 )
@@ -0,0 +1,195 @@
+""" Process wide pool of open rasterio file handles
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, suppress
+from types import SimpleNamespace
+from typing import Any, Iterator, List, Optional, Tuple
+
+import rasterio
+from rasterio.io import DatasetReader
+
+from ._rio import get_rio_env
+
+HandleKey = Tuple[str, Tuple[Tuple[str, Any], ...], Any]  # pylint: disable=invalid-name
+
+_GDAL_SUBDATASET = re.compile(r'^[A-Za-z0-9]+:"(?P<path>.+)":[^"]*$')
+
+
+def _close(src: DatasetReader, lock: Optional[Any]) -> None:
+    with suppress() if lock is None else lock:
+        src.close()
+
+
+def _env_key() -> Tuple[Tuple[str, Any], ...]:
+    """ GDAL options active in the current thread, in a hashable form.
+    """
+    return tuple(sorted(get_rio_env(sanitize=False).items()))
+
+
+def _file_stamp(uri: str) -> Optional[Tuple[int, int]]:
+    """ Modification time and size for local files, so that handles to files
+        that were re-written are not reused. None for anything not on local disk.
+    """
+    m = _GDAL_SUBDATASET.match(uri)
+    path = m.group('path') if m else uri
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class RioHandlePool(object):
+    """ Bounded LRU cache of open :class:`rasterio.io.DatasetReader` handles.
+
+    Handles are keyed by URI, by the GDAL environment active in the calling
+    thread and, for local files, by modification time and size. A handle is
+    only ever used by one thread at a time: :meth:`checkout` takes it out of
+    the pool for the duration of the ``with`` block and returns it once the
+    block exits normally. Formats that are not thread safe (HDF5 based ones)
+    should supply a ``lock`` that is then also held whenever the pool closes
+    that handle.
+
+    Only idle handles are kept by the pool: when there are more than
+    ``max_size`` of them the least recently used are closed, and handles that
+    were idle for longer than ``max_age`` seconds are closed instead of being
+    reused.
+    """
+
+    def __init__(self, max_size: int = 64, max_age: Optional[float] = 300):
+        self._max_size = max_size
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._idle = OrderedDict()  # type: OrderedDict
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _check_pid(self) -> None:
+        # Handles inherited across fork are not safe to use, just forget them
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._idle = OrderedDict()
+            self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def _expired(self, now: float) -> List[Tuple[DatasetReader, Any]]:
+        expired = []
+        if self._max_age is None:
+            return expired
+
+        while self._idle:
+            k = next(iter(self._idle))
+            src, last_used, lock = self._idle[k]
+            if now - last_used < self._max_age:
+                break
+            del self._idle[k]
+            expired.append((src, lock))
+
+        self.evictions += len(expired)
+        return expired
+
+    def _take(self, key: HandleKey) -> Optional[DatasetReader]:
+        with self._lock:
+            self._check_pid()
+            to_close = self._expired(time.monotonic())
+
+            # most recently used first
+            k = next((k for k in reversed(self._idle) if k[0] == key), None)
+            if k is None:
+                self.misses += 1
+                src = None
+            else:
+                self.hits += 1
+                src, _, _ = self._idle.pop(k)
+
+        for h, h_lock in to_close:
+            _close(h, h_lock)
+
+        return src
+
+    def _give_back(self, key: HandleKey, src: DatasetReader, lock: Optional[Any]) -> None:
+        to_close = []
+        with self._lock:
+            self._check_pid()
+            self._idle[(key, id(src))] = (src, time.monotonic(), lock)
+
+            while len(self._idle) > self._max_size:
+                _, (h, _, h_lock) = self._idle.popitem(last=False)
+                to_close.append((h, h_lock))
+            self.evictions += len(to_close)
+
+        for h, h_lock in to_close:
+            _close(h, h_lock)
+
+    @contextmanager
+    def checkout(self, uri: str, lock: Optional[Any] = None) -> Iterator[DatasetReader]:
+        """ Get exclusive use of an open handle to ``uri``, opening the file if needed.
+
+        If the ``with`` block raises, the handle is closed rather than returned to the pool.
+
+        :param lock: Lock to hold when the pool closes this handle
+        """
+        key = (uri, _env_key(), _file_stamp(uri))
+        src = self._take(key)
+        if src is None:
+            src = rasterio.open(uri, 'r', sharing=False)
+
+        try:
+            yield src
+        except BaseException:
+            _close(src, lock)
+            raise
+
+        self._give_back(key, src, lock)
+
+    def stats(self) -> SimpleNamespace:
+        """ Hit/miss/eviction counters and number of idle handles currently held.
+        """
+        with self._lock:
+            return SimpleNamespace(hits=self.hits,
+                                   misses=self.misses,
+                                   evictions=self.evictions,
+                                   idle=len(self._idle))
+
+    def clear(self) -> None:
+        """ Close all idle handles.
+        """
+        with self._lock:
+            to_close = [(src, lock) for src, _, lock in self._idle.values()]
+            self._idle = OrderedDict()
+
+        for src, lock in to_close:
+            _close(src, lock)
+
+
+_POOL_LOCK = threading.Lock()
+_POOL = RioHandlePool()
+
+
+def rio_handle_pool() -> RioHandlePool:
+    """ Get process wide pool of open rasterio file handles.
+    """
+    return _POOL
+
+
+def configure_rio_handle_pool(max_size: int = 64, max_age: Optional[float] = 300) -> RioHandlePool:
+    """ Replace process wide pool of rasterio file handles with a new one.
+
+    Idle handles of the old pool are closed.
+
+    :param max_size: Maximum number of idle handles to keep open, 0 disables caching
+    :param max_age: Close handles that were not used for that many seconds, None -- never expire
+    """
+    global _POOL  # pylint: disable=global-statement
+
+    with _POOL_LOCK:
+        old, _POOL = _POOL, RioHandlePool(max_size=max_size, max_age=max_age)
+
+    old.clear()
+    return _POOL
@@ -5,16 +5,19 @@ products implementing the same interface.
 """
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from collections.abc import Mapping, Sequence
 from functools import reduce
 from typing import Any, Dict, List, cast
 
+import dask
 import numpy
 import xarray
 import yaml
+from dask import array as da
 
 from datacube import Datacube
-from datacube.api.core import select_datasets_inside_polygon, output_geobox, apply_aliases
+from datacube.api.core import select_datasets_inside_polygon, output_geobox, apply_aliases, _chunk_sizes
 from datacube.api.grid_workflow import _fast_slice
 from datacube.api.query import Query, query_group_by
 from datacube.model import Measurement, DatasetType
@@ -416,6 +419,9 @@ class Aggregate(VirtualProduct):
         return VirtualDatasetBox(result, grouped.geobox, grouped.product_definitions)
 
     def fetch(self, grouped: VirtualDatasetBox, **load_settings: Dict[str, Any]) -> xarray.Dataset:
+        if load_settings.get('dask_chunks') is not None:
+            return self._fetch_lazy(grouped, **load_settings)
+
         dim = self.get('dim', 'time')
 
         def xr_map(array, func):
@@ -435,6 +441,62 @@ class Aggregate(VirtualProduct):
         result.coords[dim].attrs.update(grouped.pile[dim].attrs)
         return result
 
+    def _fetch_lazy(self, grouped: VirtualDatasetBox, **load_settings: Dict[str, Any]) -> xarray.Dataset:
+        """
+        Dask backed version of `fetch`, with one task per group and spatial chunk.
+
+        Each task loads the input for its group and chunk, computes the statistic and keeps only the result,
+        so the input of a group is released once reduced and groups can be computed in parallel.
+        Spatial chunk sizes are taken from ``dask_chunks``, the whole extent is used for unspecified dimensions.
+        """
+        dim = self.get('dim', 'time')
+        dask_chunks = load_settings['dask_chunks']
+        input_settings = reject_keys(load_settings, ['dask_chunks'])
+
+        pile = grouped.pile
+        geobox = grouped.geobox
+        measurements = self.output_measurements(grouped.product_definitions)
+        names = list(measurements)
+
+        def chunk_size(name, size):
+            chunk = dask_chunks.get(name)
+            if isinstance(chunk, int) and chunk > 0:
+                return chunk
+            return size
+
+        grid_chunks = [_chunk_sizes(size, chunk_size(name, size))
+                       for name, size in zip(geobox.dimensions, geobox.shape)]
+        grid_starts = [numpy.cumsum((0,) + chunks[:-1]) for chunks in grid_chunks]
+        lead_shape = (1,) * len(pile.shape)
+
+        def statistic(box):
+            data = self._statistic.compute(self._input.fetch(box, **input_settings))
+            return [data[name].transpose(*geobox.dimensions).values
+                    .astype(measurements[name].dtype, copy=False).reshape(lead_shape + box.geobox.shape)
+                    for name in names]
+
+        tasks = numpy.empty(pile.shape + tuple(len(chunks) for chunks in grid_chunks), dtype=object)
+        for index in numpy.ndindex(tasks.shape):
+            group, grid_index = index[:len(pile.shape)], index[len(pile.shape):]
+            value = pile.values[group]
+            roi = tuple(slice(starts[i], starts[i] + chunks[i])
+                        for starts, chunks, i in zip(grid_starts, grid_chunks, grid_index))
+            box = VirtualDatasetBox(value.pile, geobox[roi], value.product_definitions)
+            tasks[index] = (dask.delayed(statistic)(box), lead_shape + box.geobox.shape)
+
+        def data_func(measurement):
+            i = names.index(measurement.name)
+            blocks = numpy.empty(tasks.shape, dtype=object)
+            for index in numpy.ndindex(tasks.shape):
+                task, shape = tasks[index]
+                blocks[index] = da.from_delayed(task[i], shape, dtype=measurement.dtype)
+            return da.block(blocks.tolist())
+
+        coords = OrderedDict((name, pile.coords[name]) for name in pile.dims)
+        result = Datacube.create_storage(coords, geobox, list(measurements.values()), data_func)
+        result.coords[dim].attrs.update(pile[dim].attrs)
+        return result
+
 
 class Collate(VirtualProduct):
     """ Stack observations from products with the same set of measurements. """
@@ -10,13 +10,19 @@ import sys
 from pathlib import Path
 from uuid import UUID
 
+import mock
 import pytest
+from affine import Affine
 from dateutil import tz
+from sqlalchemy import event
 
 from datacube.drivers.postgres import PostgresDb
 from datacube.index.exceptions import MissingRecordError
+from datacube.index import index_connect
 from datacube.index.index import Index
 from datacube.model import Dataset, MetadataType
+from datacube.testutils import mk_sample_product, geobox_to_gridspatial
+from datacube.utils import geometry
 
 _telemetry_uuid = UUID('4ec8fe97-e8b9-11e4-87ff-1040f381a756')
 _telemetry_dataset = {
@@ -147,6 +153,72 @@ def test_index_duplicate_dataset(index: Index, initialised_postgres_db: Postgres
     assert index.datasets.has(_telemetry_uuid)
 
 
+def test_has_dataset_footprints_is_cached(initialised_postgres_db: PostgresDb) -> None:
+    assert initialised_postgres_db.has_dataset_footprints()
+
+    with mock.patch('datacube.drivers.postgres._core.has_dataset_footprints') as lookup:
+        assert initialised_postgres_db.has_dataset_footprints()
+        lookup.assert_not_called()
+
+        initialised_postgres_db.init()
+        assert initialised_postgres_db.has_dataset_footprints()
+        lookup.assert_called_once()
+
+
+def _index_as_role(local_config, role):
+    """ Index connection that runs everything as the given (non-admin) role. """
+    index = index_connect(local_config, validate_connection=False)
+
+    @event.listens_for(index._db._engine, 'connect')
+    def set_role(dbapi_connection, connection_record):
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute('set role {}'.format(role))
+        dbapi_connection.commit()
+
+    return index
+
+
+def test_dataset_footprints_after_upgrade(index: Index,
+                                          initialised_postgres_db: PostgresDb,
+                                          local_config) -> None:
+    # Pretend this database predates the footprint table: init() will have to add it.
+    initialised_postgres_db._engine.execute('drop table agdc.dataset_footprint')
+    initialised_postgres_db.init()
+    assert initialised_postgres_db.has_dataset_footprints()
+
+    owner = initialised_postgres_db._engine.execute(
+        "select tableowner from pg_tables where schemaname = 'agdc' and tablename = 'dataset_footprint'"
+    ).scalar()
+    assert owner == 'agdc_admin'
+
+    product = index.products.add_document(mk_sample_product('footprint_test').definition)
+    geobox = geometry.GeoBox(100, 100, Affine(25, 0, 1500000, 0, -25, -3900000), geometry.CRS('EPSG:3577'))
+    dataset = Dataset(product, {
+        'id': '6a5f4d3e-2c1b-4a09-8f7e-6d5c4b3a2f10',
+        'format': {'name': 'GeoTiff'},
+        'image': {'bands': {}},
+        'time': '2018-06-29',
+        **geobox_to_gridspatial(geobox),
+    }, uris=['file:///tmp/footprint_test.tif'])
+
+    ingest_index = _index_as_role(local_config, 'agdc_ingest')
+    try:
+        ingest_index.datasets.add(dataset)
+    finally:
+        ingest_index.close()
+    assert index.datasets.has(dataset.id)
+
+    user_index = _index_as_role(local_config, 'agdc_user')
+    try:
+        found = user_index.datasets.search_eager(product='footprint_test', geopolygon=geobox.extent)
+        assert [ds.id for ds in found] == [dataset.id]
+
+        far_away = geometry.box(140, -10, 141, -9, geometry.CRS('EPSG:4326'))
+        assert user_index.datasets.search_eager(product='footprint_test', geopolygon=far_away) == []
+    finally:
+        user_index.close()
+
+
 def test_has_dataset(index: Index, telemetry_dataset: Dataset) -> None:
     assert index.datasets.has(_telemetry_uuid)
     assert index.datasets.has(str(_telemetry_uuid))
@@ -422,6 +422,21 @@ def test_search_limit(index, pseudo_ls8_dataset, pseudo_ls8_dataset2):
     assert len(datasets) == 2
 
 
+def test_search_streaming(index, pseudo_ls8_dataset, pseudo_ls8_dataset2):
+    expected = {pseudo_ls8_dataset.id, pseudo_ls8_dataset2.id}
+
+    for fetch_size in (0, 1):
+        index._db._fetch_size = fetch_size
+        assert {ds.id for ds in index.datasets.search()} == expected
+        assert {r.id for r in index.datasets.search_returning(('id',))} == expected
+        assert {r['id'] for r in index.datasets.search_summaries()} == expected
+
+        # Results don't need to be read to the end
+        datasets = index.datasets.search()
+        assert next(datasets).id in expected
+        datasets.close()
+
+
 def test_search_or_expressions(index: Index,
                                pseudo_ls8_type: DatasetType,
                                pseudo_ls8_dataset: Dataset,
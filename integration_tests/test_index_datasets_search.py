@@ -46,6 +46,21 @@ def test_index_datasets_search_light(index, tmpdir, clirunner,
     for dataset in results:
         assert dataset.zone == -55
 
+    # Test columnar results
+    df = index.datasets.search_returning_columns(field_names=('id', 'extent', 'zone'),
+                                                 custom_offsets={'zone': ['grid_spatial', 'projection', 'zone']},
+                                                 product='ls5_nbar_scene')
+    assert set(df.id) == set(valid_uuids)
+    assert (df.zone == -55).all()
+    assert all(isinstance(wkb, bytes) for wkb in df.extent)
+
+    columns = index.datasets.search_returning_columns(field_names=('id', 'uris'),
+                                                      product='ls5_nbar_scene',
+                                                      with_pandas=False)
+    assert set(columns) == {'id', 'uris'}
+    assert len(columns['id']) == len(valid_uuids)
+    assert all(len(uris) == 1 for uris in columns['uris'])
+
     # Test conditional queries involving custom fields
     results = list(index.datasets.search_returning_datasets_light(field_names=('id', 'zone'),
                                                                   custom_offsets={'zone': ['grid_spatial',
@@ -24,7 +24,7 @@ extras_require = {
     'doc': ['Sphinx', 'setuptools'],
     'replicas': ['paramiko', 'sshtunnel', 'tqdm'],
     'celery': ['celery>=4', 'redis'],
-    's3': ['boto3', 'SharedArray', 'pathos', 'zstandard'],
+    's3': ['boto3', 'SharedArray; python_version < "3.8"', 'pathos', 'zstandard'],
     'test': tests_require,
 }
 # An 'all' option, following ipython naming conventions.
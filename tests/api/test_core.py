@@ -85,8 +85,32 @@ def test_dask_chunks():
     assert _calculate_chunk_sizes(sources, geobox, {'y': -1, 'x': 3}) == ((1,), (6, 3))
     assert _calculate_chunk_sizes(sources, geobox, {'y': 2, 'x': 3}) == ((1,), (2, 3))
 
+    # spatial chunks are limited by memory budget
+    assert _calculate_chunk_sizes(sources, geobox, {}, itemsize=2, max_chunk_bytes=2*6*7) == ((1,), (6, 7))
+    assert _calculate_chunk_sizes(sources, geobox, {}, itemsize=2, max_chunk_bytes=2*4*4) == ((1,), (4, 4))
+    assert _calculate_chunk_sizes(sources, geobox, {'time': 2}, itemsize=2, max_chunk_bytes=2*4*4) == ((2,), (2, 4))
+    assert _calculate_chunk_sizes(sources, geobox, {'y': -1}, itemsize=2, max_chunk_bytes=2*4*4) == ((1,), (6, 2))
+    assert _calculate_chunk_sizes(sources, geobox, {'y': 3, 'x': 'auto'},
+                                  itemsize=1, max_chunk_bytes=6*3) == ((1,), (3, 6))
+
+    # and aligned to storage blocks where possible
+    assert _calculate_chunk_sizes(sources, geobox, {}, itemsize=1, max_chunk_bytes=5*5,
+                                  native_chunks=(2, 2)) == ((1,), (4, 6))
+    assert _calculate_chunk_sizes(sources, geobox, {}, itemsize=1, max_chunk_bytes=3*3,
+                                  native_chunks=(4, 4)) == ((1,), (3, 3))
+
     with pytest.raises(ValueError):
         _calculate_chunk_sizes(sources, geobox, {'x': "aouto"})
 
     with pytest.raises(KeyError):
         _calculate_chunk_sizes(sources, geobox, {'zz': 1})
+
+
+def test_chunk_sizes():
+    from datacube.api.core import _chunk_sizes
+
+    assert _chunk_sizes(10, 3) == (3, 3, 3, 1)
+    assert _chunk_sizes(10, 10) == (10,)
+    assert _chunk_sizes(10, 16) == (10,)
+    assert _chunk_sizes(1, 1) == (1,)
+    assert _chunk_sizes(0, 3) == (0,)
@@ -34,7 +34,7 @@ def test_gridworkflow():
     fakeindex = PickableMock()
     fakeindex._db = None
     fakeindex.datasets.get_field_names.return_value = ['time']  # permit query on time
-    fakeindex.datasets.search_eager.return_value = [fakedataset]
+    fakeindex.datasets.search.return_value = [fakedataset]
 
     # ------ test without padding ----
 
@@ -71,10 +71,10 @@ def test_gridworkflow():
     fakedataset2.extent = geometry.box(left=2*grid, bottom=-grid, right=3*grid, top=-2*grid, crs=fakecrs)
     fakedataset2.center_time = t
 
-    def search_eager(lat=None, lon=None, **kwargs):
+    def search(lat=None, lon=None, **kwargs):
         return [fakedataset, fakedataset2]
 
-    fakeindex.datasets.search_eager = search_eager
+    fakeindex.datasets.search = search
 
     # unpadded
     assert len(gw.list_tiles(**query)) == 2
@@ -173,7 +173,7 @@ def test_gridworkflow_with_time_depth():
 
     fakeindex = PickableMock()
     fakeindex.datasets.get_field_names.return_value = ['time']  # permit query on time
-    fakeindex.datasets.search_eager.return_value = list(make_fake_datasets(100))
+    fakeindex.datasets.search.return_value = list(make_fake_datasets(100))
 
     # ------ test with time dimension ----
 
@@ -419,6 +419,24 @@ def test_aggregate(dc, query, catalog):
     assert data.time.shape == (2,)
 
 
+def test_aggregate_lazy(dc, query, catalog):
+    aggr = catalog['mean_blue']
+
+    with mock.patch('datacube.virtual.impl.Datacube') as mock_datacube:
+        mock_datacube.load_data = load_data
+        mock_datacube.group_datasets = group_datasets
+        mock_datacube.create_storage = Datacube.create_storage
+        eager = aggr.load(dc, **query)
+        lazy = aggr.load(dc, dask_chunks={'x': 20, 'y': 20}, **query)
+
+    assert lazy.time.shape == (2,)
+    assert lazy.blue.chunks[0] == (1, 1)
+    assert all(chunk <= 20 for chunk in lazy.blue.chunks[1] + lazy.blue.chunks[2])
+    assert lazy.blue.dims == eager.blue.dims
+    assert lazy.blue.dtype == eager.blue.dtype
+    numpy.testing.assert_array_equal(lazy.blue.values, eager.blue.values)
+
+
 def test_register(dc, query):
     class BlueGreen(Transformation):
         def compute(self, data):
@@ -176,6 +176,7 @@ def test_rio_driver_open(data_folder):
     xx = src.read().result()
     assert xx.shape == src.shape
     assert xx.dtype == src.dtype
+    assert src.overviews == ()
 
     # check overrides
     bi = mk_band('b1', base, path="zeros_no_geo_int16_7x3.tif", format=GeoTIFF, nodata=None)
@@ -2,9 +2,12 @@ import numpy as np
 import pytest
 import sys
 
-sa = pytest.importorskip('SharedArray')
 s3aio = pytest.importorskip('datacube.drivers.s3.storage.s3aio')
 
+from datacube.drivers.s3.storage.s3aio.codec import encode_chunk, decode_chunk, parse_codec  # noqa: E402
+from datacube.drivers.s3.storage.s3aio.sharedmem import (create_shared_array, release_shared_array,  # noqa: E402
+                                                         read_shared, write_shared, worker_pool)
+
 
 class TestS3LIO(object):
     def test_create_s3lio(self, tmpdir):
@@ -88,6 +91,31 @@ class TestS3LIO(object):
         e = s.assemble_array_from_s3(e, idx, 'arrayio', keys, np.uint8)
         assert np.array_equal(x, e)
 
+    @pytest.mark.parametrize('codec', ['none', 'zstd:3', 'delta|shuffle|zlib'])
+    def test_put_array_in_s3_with_codec(self, tmpdir, codec):
+        s = s3aio.S3LIO(False, False, str(tmpdir), num_workers=2)
+        x = np.arange(4 * 6 * 6, dtype=np.uint16).reshape((4, 6, 6))
+        key_map = s.put_array_in_s3(x, (2, 4, 4), "base_name", 'arrayio', codec=codec)
+
+        e = np.empty_like(x)
+        e = s.assemble_array_from_s3(e, [a[1] for a in key_map], 'arrayio', [a[0] for a in key_map],
+                                     np.uint16, codec)
+        assert np.array_equal(x, e)
+
+        roi = (slice(1, 4), slice(1, 6), slice(3, 5))
+        d = s.get_data_unlabeled('base_name', x.shape, (2, 4, 4), np.uint16, roi, 'arrayio', codec=codec)
+        assert np.array_equal(x[roi], d)
+        d = s.get_data_unlabeled_mp('base_name', x.shape, (2, 4, 4), np.uint16, roi, 'arrayio', codec=codec)
+        assert np.array_equal(x[roi], d)
+
+        # codecs can differ per chunk
+        codecs = {chunk_id: 'zstd' if chunk_id % 2 else codec for _, _, chunk_id in key_map}
+        s.put_array_in_s3(x, (2, 4, 4), "base_name", 'arrayio', codec=codec)
+        for _, index, chunk_id in key_map[1::2]:
+            s.shard_array_to_s3(x, [index], 'arrayio', ['base_name_%d' % chunk_id], 'zstd')
+        d = s.get_data_unlabeled('base_name', x.shape, (2, 4, 4), np.uint16, roi, 'arrayio', codec=codecs)
+        assert np.array_equal(x[roi], d)
+
     def test_regular_index(self):
         s = s3aio.S3LIO()
         i = s.regular_index((-35 + 2 * 0.128, 149 + 2 * 0.128), ((-35, -34), (149, 150)), (4000, 4000))
@@ -127,6 +155,31 @@ class TestS3LIO(object):
                                     'arrayio')
         assert np.array_equal(x[1:3, 1:3, 1:3], d)
 
+    @pytest.mark.parametrize('enable_compression', [True, False])
+    def test_get_data_unlabeled_new_sessions(self, tmpdir, monkeypatch, enable_compression):
+        s = s3aio.S3LIO(enable_compression, False, str(tmpdir))
+
+        x = np.arange(4 * 4 * 4, dtype=np.uint8).reshape((4, 4, 4))
+        s.put_array_in_s3(x, (2, 2, 2), "base_name", 'arrayio')
+
+        # chunks are fetched from worker threads, which must not share the default boto3 session
+        new_sessions = []
+        s3io = s.s3aio.s3io
+
+        def record(method):
+            def wrapped(*args, new_session=False):
+                new_sessions.append(new_session)
+                return method(*args, new_session=new_session)
+            return wrapped
+
+        monkeypatch.setattr(s3io, 'get_bytes', record(s3io.get_bytes))
+        monkeypatch.setattr(s3io, 'get_byte_range', record(s3io.get_byte_range))
+
+        d = s.get_data_unlabeled('base_name', (4, 4, 4), (2, 2, 2), np.uint8, (slice(1, 3), slice(1, 3), slice(1, 3)),
+                                 'arrayio')
+        assert np.array_equal(x[1:3, 1:3, 1:3], d)
+        assert new_sessions and all(new_sessions)
+
 
 # S3AIO
 
@@ -199,7 +252,88 @@ class TestS3AOI(object):
         d = s.get_slice_by_bbox((slice(0, 2), slice(0, 4), slice(0, 4)), (4, 4, 4), np.uint8, 'arrayio', 'array444')
         assert np.array_equal(d, data[0:2, 0:4, 0:4])
 
-        # S3IO
+    def test_plan_byte_ranges(self):
+        from datacube.drivers.s3.storage.s3aio.s3aio import plan_byte_ranges
+
+        assert plan_byte_ranges([], 10, 100) == []
+        assert plan_byte_ranges([(0, 4)], 10, 100) == [(0, 4, [0])]
+        ranges = [(20, 24), (0, 4), (8, 12), (100, 104)]
+        assert plan_byte_ranges(ranges, 4, 100) == [(0, 12, [1, 2]), (20, 24, [0]), (100, 104, [3])]
+        assert plan_byte_ranges(ranges, 100, 100) == [(0, 24, [1, 2, 0]), (100, 104, [3])]
+        assert plan_byte_ranges([(0, 4), (2, 6)], 0, 100) == [(0, 6, [0, 1])]
+
+    @pytest.mark.parametrize('max_gap', [0, 4, 1 << 20])
+    def test_get_slice_byte_ranges(self, tmpdir, max_gap):
+        s = s3aio.S3IO(False, str(tmpdir))
+
+        data = np.arange(6 * 8 * 10, dtype=np.int16).reshape((6, 8, 10))
+        s.put_bytes("arrayio", "array6810", bytes(data.data))
+
+        s = s3aio.S3AIO(False, False, str(tmpdir), num_workers=4, max_gap=max_gap, max_request_size=64)
+
+        for roi in [(slice(1, 5), slice(2, 7), slice(3, 6)),
+                    (slice(0, 6), slice(0, 8), slice(4, 5)),
+                    (slice(2, 3), slice(0, 8), slice(0, 10))]:
+            d = s.get_slice(roi, data.shape, np.int16, 'arrayio', 'array6810')
+            assert np.array_equal(d, data[roi])
+
+
+# Codecs
+
+@pytest.mark.parametrize('dtype', ['uint8', 'int16', 'uint16', 'int64'])
+@pytest.mark.parametrize('codec', ['none', 'zlib', 'zstd:1', 'shuffle', 'delta', 'delta|shuffle|zstd:9',
+                                   'shuffle|zlib:9'])
+def test_codec_roundtrip(codec, dtype):
+    info = np.iinfo(dtype)
+    data = np.random.RandomState(0).randint(info.min, info.max, size=(3, 50, 40), dtype=dtype)
+    data[0] = info.max
+    encoded = encode_chunk(data[:, 5:25], codec)
+    decoded = np.frombuffer(decode_chunk(encoded, codec, dtype), dtype=dtype)
+    assert np.array_equal(decoded.reshape((3, 20, 40)), data[:, 5:25])
+
+
+def test_codec_compression():
+    # smooth reflectance-like data compresses much better once filtered
+    y, x = np.mgrid[0:256, 0:256]
+    data = (2000 + 10 * x + 3 * y).astype(np.uint16)
+    assert len(encode_chunk(data, 'none')) == data.nbytes
+    assert len(encode_chunk(data, 'delta|shuffle|zstd')) < len(encode_chunk(data, 'zstd'))
+
+
+def test_parse_codec():
+    assert parse_codec(None) == []
+    assert parse_codec('none') == []
+    assert parse_codec('shuffle|zstd') == [('shuffle', None), ('zstd', 9)]
+    assert parse_codec('delta | zlib:1') == [('delta', None), ('zlib', 1)]
+
+    with pytest.raises(ValueError):
+        parse_codec('shuffle|gzip')
+    with pytest.raises(ValueError):
+        encode_chunk(np.zeros(4, dtype=np.float32), 'delta')
+
+
+# Shared memory
+
+
+def test_shared_array():
+    ref, array = create_shared_array('S3_test', (4, 5), np.int16)
+    assert array.shape == (4, 5) and array.dtype == np.int16
+    assert not array.any()
+
+    pool = worker_pool(2)
+    assert worker_pool(2) is pool
+
+    pool.map(write_shared, [ref] * 4, range(4), [np.arange(5) + 10 * i for i in range(4)])
+    expected = np.arange(5) + 10 * np.arange(4)[:, None]
+    assert np.array_equal(array, expected)
+    assert pool.map(read_shared, [ref, ref], [1, (slice(None), 2)])[1].tolist() == [2, 12, 22, 32]
+
+    # stays valid after release
+    release_shared_array(ref)
+    assert np.array_equal(array, expected)
+
+
+# S3IO
 
 
 class TestS3IO(object):
@@ -300,12 +434,12 @@ class TestS3IO(object):
         s.delete_created_arrays()
         assert not s.list_created_arrays()
 
-        sa.create("S3_test_upload", shape=(20), dtype=np.uint8)
+        ref, data = create_shared_array("S3_test", (20,), np.uint8)
         assert len(s.list_created_arrays())
-        data = sa.attach("S3_test_upload")
         data[:] = np.arange(20, dtype=np.uint8)
-        s.put_bytes_mpu_mp_shm("arrayio", "1234test", "S3_test_upload", 10)
-        sa.delete('S3_test_upload')
+        s.put_bytes_mpu_mp_shm("arrayio", "1234test", ref, 10)
+        release_shared_array(ref)
+        assert not s.list_created_arrays()
 
         assert s.bucket_exists('arrayio')
         assert s.object_exists('arrayio', '1234test')
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import cachetools
+
+from datacube.drivers.s3aio_index import index as s3_index
+from datacube.index._datasets import DatasetResource as BaseDatasetResource
+
+
+class FakeDb(object):
+    @contextmanager
+    def begin(self):
+        yield None
+
+
+def test_s3_metadata_lookups_are_batched_and_cached(monkeypatch):
+    ids = [uuid4() for _ in range(7)]
+    fetches = []
+
+    def fake_fetch(self, connection, dataset_refs):
+        fetches.append(list(dataset_refs))
+        return {ref: {'green': {'s3_dataset': ref, 'codec': 'zstd'}} if ref != ids[3] else {}
+                for ref in dataset_refs}
+
+    def fake_make(self, dataset_res, full_info=False, product=None):
+        return SimpleNamespace(id=dataset_res.id, measurements={'green': {}, 'blue': {}})
+
+    monkeypatch.setattr(s3_index, 'S3_METADATA_PAGE_SIZE', 3)
+    monkeypatch.setattr(s3_index.DatasetResource, '_fetch_s3_metadata', fake_fetch)
+    monkeypatch.setattr(BaseDatasetResource, '_make', fake_make)
+
+    resource = s3_index.DatasetResource(FakeDb(), None)
+    now = [0]
+    resource._empty_s3_metadata_cache = cachetools.TTLCache(100, s3_index.S3_METADATA_EMPTY_CACHE_TTL,
+                                                            timer=lambda: now[0])
+    rows = [SimpleNamespace(id=id_) for id_ in ids]
+
+    datasets = list(resource._make_many(iter(rows)))
+    assert fetches == [ids[0:3], ids[3:6], ids[6:7]]
+    assert [ds.id for ds in datasets] == ids
+    assert datasets[0].s3_metadata == {'green': {'s3_dataset': ids[0], 'codec': 'zstd'}}
+    assert datasets[3].s3_metadata == {}
+
+    # cached, including datasets without s3 metadata
+    del fetches[:]
+    assert [ds.id for ds in resource._make_many(rows)] == ids
+    assert resource._make(rows[3]).s3_metadata == {}
+    assert fetches == []
+
+    # datasets without s3 metadata are soon looked up again, another process could have added it
+    now[0] += s3_index.S3_METADATA_EMPTY_CACHE_TTL + 1
+    list(resource._make_many(rows))
+    assert fetches == [[ids[3]]]
+    del fetches[:]
+
+    # adding s3 metadata for a dataset invalidates it
+    resource.add_datasets_to_s3_tables([ids[3]], {})
+    list(resource._make_many(rows))
+    assert fetches == [[ids[3]]]
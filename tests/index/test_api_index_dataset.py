@@ -6,12 +6,15 @@ from collections import namedtuple
 from contextlib import contextmanager
 from copy import deepcopy
 
+import numpy as np
 import pytest
 from uuid import UUID
 
-from datacube.index._datasets import DatasetResource
+from datacube.index._datasets import DatasetResource, _footprint, _as_column
 from datacube.index.exceptions import DuplicateRecordError
 from datacube.model import DatasetType, MetadataType, Dataset
+from datacube.testutils import mk_sample_product, geobox_to_gridspatial
+from datacube.utils import geometry
 from datacube.utils.changes import DocumentMismatchError
 
 _nbar_uuid = UUID('f2f12372-8366-11e5-817e-1040f381a756')
@@ -168,6 +171,8 @@ class MockDb(object):
     def __init__(self):
         self.dataset = {}
         self.dataset_source = set()
+        self.dataset_footprint = {}
+        self.dataset_location = []
 
     @contextmanager
     def begin(self):
@@ -201,6 +206,30 @@ class MockDb(object):
     def insert_dataset_source(self, classifier, dataset_id, source_dataset_id):
         self.dataset_source.add((classifier, dataset_id, source_dataset_id))
 
+    def insert_datasets(self, datasets):
+        added = set()
+        for metadata_doc, dataset_id, dataset_type_id in datasets:
+            if dataset_id not in self.dataset:
+                self.insert_dataset(metadata_doc, dataset_id, dataset_type_id)
+                added.add(dataset_id)
+        return added
+
+    def insert_dataset_sources(self, edges):
+        for edge in edges:
+            self.insert_dataset_source(*edge)
+
+    def insert_dataset_locations(self, locations):
+        self.dataset_location.extend(locations)
+
+    def insert_dataset_footprints(self, footprints):
+        self.dataset_footprint.update(footprints)
+
+    def has_dataset_footprints(self):
+        return True
+
+    def insert_dataset_footprint(self, dataset_id, footprint):
+        self.dataset_footprint[dataset_id] = footprint
+
 
 class MockTypesResource(object):
     def __init__(self, type_):
@@ -225,6 +254,9 @@ def test_index_dataset():
     # Three datasets (ours and the two embedded source datasets)
     assert len(mock_db.dataset) == 3
 
+    # No extent available for any of them
+    assert mock_db.dataset_footprint == {_nbar_uuid: [], _ortho_uuid: [], _telemetry_uuid: []}
+
     # Our three datasets should be linked together
     # Nbar -> Ortho -> Telemetry
     assert len(mock_db.dataset_source) == 2
@@ -239,6 +271,32 @@ def test_index_dataset():
     assert len(mock_db.dataset_source) == 2
 
 
+def test_index_dataset_add_many():
+    mock_db = MockDb()
+    mock_types = MockTypesResource(_EXAMPLE_DATASET_TYPE)
+    datasets = DatasetResource(mock_db, mock_types)
+
+    ortho = _EXAMPLE_NBAR_DATASET.sources['ortho']
+    assert datasets.add_many([ortho], batch_size=1) == 2
+    assert set(mock_db.dataset) == {_ortho_uuid, _telemetry_uuid}
+    assert mock_db.dataset_location == [(_ortho_uuid, 'file://test.zzz')]
+
+    # Already present datasets are skipped, new ones are added with lineage links
+    assert datasets.add_many([ortho, _EXAMPLE_NBAR_DATASET, _EXAMPLE_NBAR_DATASET]) == 1
+    assert set(mock_db.dataset) == {_nbar_uuid, _ortho_uuid, _telemetry_uuid}
+    assert mock_db.dataset_source == {
+        ('ortho', _nbar_uuid, _ortho_uuid),
+        ('satellite_telemetry_data', _ortho_uuid, _telemetry_uuid)
+    }
+    assert mock_db.dataset_location == [(_ortho_uuid, 'file://test.zzz'), (_nbar_uuid, 'file://test.zzz')]
+    assert set(mock_db.dataset_footprint) == set(mock_db.dataset)
+
+    assert datasets.add_many([_EXAMPLE_NBAR_DATASET]) == 0
+
+    with pytest.raises(ValueError):
+        datasets.add_many([ortho], batch_size=0)
+
+
 def test_index_already_ingested_source_dataset():
     mock_db = MockDb()
     mock_types = MockTypesResource(_EXAMPLE_DATASET_TYPE)
@@ -265,3 +323,57 @@ def test_index_two_levels_already_ingested():
     dataset = datasets.add(_EXAMPLE_NBAR_DATASET)
     assert len(mock_db.dataset) == 3
     assert len(mock_db.dataset_source) == 2
+
+
+def test_dataset_footprint():
+    assert _footprint(None) == []
+
+    epsg4326 = geometry.CRS('EPSG:4326')
+    pts = [(130, -10), (130, -20), (140, -20), (140, -10), (130, -10)]
+    assert _footprint(geometry.polygon(pts, epsg4326)) == [[list(pt) for pt in pts]]
+
+    hole = [(131, -11), (131, -12), (132, -12), (132, -11), (131, -11)]
+    assert len(_footprint(geometry.polygon(pts, epsg4326, hole))) == 1
+
+    poly = geometry.multipolygon([[pts], [[(x + 20, y) for x, y in pts]]], epsg4326)
+    assert len(_footprint(poly)) == 2
+
+    poly = geometry.box(1000000, -2000000, 1100000, -1900000, geometry.CRS('EPSG:3577'))
+    (ring,) = _footprint(poly)
+    lon, lat = zip(*ring)
+    assert 130 < min(lon) < max(lon) < 140
+    assert -20 < min(lat) < max(lat) < -10
+
+
+def test_search_filters_by_footprint():
+    product = mk_sample_product('sample')
+    crs = geometry.CRS('EPSG:4326')
+    query = geometry.box(130, -20, 131, -19, crs)
+    inside = geometry.GeoBox.from_geopolygon(geometry.box(130.5, -19.5, 130.6, -19.4, crs), (-0.1, 0.1), crs)
+    outside = geometry.GeoBox.from_geopolygon(geometry.box(135, -19.5, 135.1, -19.4, crs), (-0.1, 0.1), crs)
+
+    Record = namedtuple('Record', DatasetRecord._fields + ('footprint_checked',))
+
+    def record(gbox, checked):
+        return Record(id=None, metadata=geobox_to_gridspatial(gbox), dataset_type_ref=None, uris=None,
+                      added=None, added_by=None, archived=None, footprint_checked=checked)
+
+    datasets = DatasetResource(MockDb(), MockTypesResource(product))
+
+    # Rows checked by the database are trusted, others are checked on the client
+    rows = [record(outside, True), record(inside, False), record(outside, False)]
+    result = list(datasets._make_intersecting(rows, query, product))
+    assert len(result) == 2
+    assert result[1].extent.boundingbox == inside.extent.boundingbox
+
+
+def test_as_column():
+    assert _as_column([1, 2.5]).dtype == np.float64
+    assert _as_column([1, 2]).dtype.kind == 'i'
+
+    col = _as_column([(1, 2), None, True])
+    assert col.dtype == object
+    assert col.shape == (3,)
+    assert col[0] == (1, 2)
+
+    assert _as_column([]).shape == (0,)
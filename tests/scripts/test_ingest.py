@@ -0,0 +1,141 @@
+from types import SimpleNamespace
+
+import numpy as np
+import xarray as xr
+
+from datacube.executor import SerialExecutor
+from datacube.index._datasets import DatasetResource
+from datacube.scripts import ingest
+from datacube.testutils import mk_sample_dataset
+from datacube.ui.task_app import TaskLedger
+from tests.index.test_api_index_dataset import MockDb
+
+
+class FakeDatasets(object):
+    def __init__(self):
+        self.calls = []
+
+    def add_many(self, datasets, with_lineage=True, **kwargs):
+        datasets = list(datasets)
+        if 'bad' in datasets:
+            raise ValueError('Failed to index')
+        self.calls.append(datasets)
+        return len(datasets)
+
+
+class FakeIndex(object):
+    def __init__(self):
+        self.datasets = FakeDatasets()
+
+
+def test_process_tasks(monkeypatch):
+    def fake_ingest_work(config, source_type, output_type, tile, tile_index):
+        if tile == 'fail':
+            raise IOError('Failed to write')
+        return xr.DataArray([tile], dims=('time',))
+
+    monkeypatch.setattr(ingest, 'ingest_work', fake_ingest_work)
+
+    tiles = ['a', 'b', 'fail', 'bad', 'c']
+    tasks = [dict(tile=tile, tile_index=(i, 0)) for i, tile in enumerate(tiles)]
+    index = FakeIndex()
+
+    successful, failed = ingest.process_tasks(index, {}, None, None, tasks,
+                                              queue_size=2, executor=SerialExecutor())
+    assert successful == 3
+    assert failed == 1
+
+    indexed = sorted(ds for call in index.datasets.calls for ds in call)
+    assert indexed == ['a', 'b', 'c']
+
+    # nothing to do
+    assert ingest.process_tasks(index, {}, None, None, [],
+                                queue_size=2, executor=SerialExecutor()) == (0, 0)
+
+
+def test_index_datasets_with_storage_metadata():
+    # the plain postgres index ignores storage metadata, rather than failing
+    mock_db = MockDb()
+    index = SimpleNamespace(datasets=DatasetResource(mock_db, None))
+
+    dss = [mk_sample_dataset([dict(name='a')], id='3a1df9e0-8484-44fc-8102-79184eab85d{}'.format(i))
+           for i in range(3)]
+    with_metadata = xr.DataArray(np.array(dss[:2], dtype=object), dims=('time',),
+                                 attrs={'storage_metadata': {'bands': {}}})
+    plain = xr.DataArray(np.array(dss[2:], dtype=object), dims=('time',))
+
+    assert ingest._index_datasets(index, [with_metadata, plain]) == 3
+    assert set(mock_db.dataset) == {ds.id for ds in dss}
+
+
+def mk_tile(*ids):
+    sources = np.empty(1, dtype=object)
+    sources[0] = tuple(SimpleNamespace(id=id_) for id_ in ids)
+    return SimpleNamespace(sources=xr.DataArray(sources, dims=('time',),
+                                                coords={'time': [np.datetime64('2001-02-03')]}))
+
+
+def test_process_tasks_with_ledger(monkeypatch, tmpdir):
+    def fake_ingest_work(config, source_type, output_type, tile, tile_index):
+        if tile == 'fail':
+            raise IOError('Failed to write')
+        return xr.DataArray([tile], dims=('time',))
+
+    monkeypatch.setattr(ingest, 'ingest_work', fake_ingest_work)
+
+    ledger = TaskLedger(str(tmpdir.join('ledger.db')))
+    tasks = [dict(tile=tile, tile_index=(i, 0)) for i, tile in enumerate(['a', 'fail', 'bad'])]
+    for task in tasks:
+        ledger.add(ingest.task_key(task['tile_index']), '', task)
+
+    # written by an earlier run, but not indexed yet
+    ledger.add('9,0', '', dict(tile='z', tile_index=(9, 0)))
+    ledger.set_state(['9,0'], TaskLedger.WRITTEN, result=xr.DataArray(['z'], dims=('time',)))
+
+    index = FakeIndex()
+    successful, failed = ingest.process_tasks(index, {}, None, None, tasks,
+                                              queue_size=2, executor=SerialExecutor(), ledger=ledger)
+    assert (successful, failed) == (2, 1)
+    assert sorted(ds for call in index.datasets.calls for ds in call) == ['a', 'z']
+
+    assert ledger.lookup('0,0')[1] == TaskLedger.INDEXED
+    assert ledger.lookup('1,0')[1] == TaskLedger.FAILED
+    assert ledger.lookup('2,0')[1] == TaskLedger.WRITTEN
+    assert ledger.lookup('9,0')[1] == TaskLedger.INDEXED
+
+
+def test_plan_with_ledger(tmpdir):
+    config = {'location': str(tmpdir),
+              'file_path_template': '{tile_index[0]}_{tile_index[1]}_{start_time}_v{version}.nc',
+              'taskfile_utctime': 1}
+
+    def update_task(task):
+        task['updated'] = True
+        return task
+
+    def plan(ledger, tiles):
+        tasks = [dict(tile=tile, tile_index=(i, 0)) for i, tile in enumerate(tiles)]
+        return list(ingest._plan_with_ledger(ledger, iter(tasks), update_task, config))
+
+    ledger = TaskLedger(str(tmpdir.join('ledger.db')))
+    tasks = plan(ledger, [mk_tile('a'), mk_tile('b'), mk_tile('c'), mk_tile('d')])
+    assert len(tasks) == 4
+    assert all(task['updated'] for task in tasks)
+    assert ledger.get_meta('plan_complete') is True
+    assert ledger.counts()[TaskLedger.PLANNED] == 4
+
+    # fingerprint depends on source ids only, not on their order
+    assert ingest.tile_fingerprint(mk_tile('a', 'b')) == ingest.tile_fingerprint(mk_tile('b', 'a'))
+    assert ingest.tile_fingerprint(mk_tile('a')) != ingest.tile_fingerprint(mk_tile('b'))
+
+    ledger.set_state(['0,0'], TaskLedger.INDEXED)
+    ledger.set_state(['1,0'], TaskLedger.WRITTEN)
+    ledger.set_state(['2,0'], TaskLedger.RUNNING)
+    partial = ingest.get_filename(config, (2, 0), tasks[2]['tile'].sources)
+    partial.write_bytes(b'partial')
+
+    # unchanged tiles: indexed and written ones are skipped, others come from the ledger
+    tasks = plan(ledger, [mk_tile('a'), mk_tile('b'), mk_tile('c'), mk_tile('d2')])
+    assert [task['tile_index'] for task in tasks] == [(2, 0), (3, 0)]
+    assert not partial.exists()
+    assert ledger.counts() == {'planned': 1, 'running': 1, 'written': 1, 'indexed': 1, 'failed': 0}
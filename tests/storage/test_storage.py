@@ -1,4 +1,5 @@
 from contextlib import contextmanager
+from threading import Thread
 
 import mock
 import netCDF4
@@ -15,7 +16,8 @@ from datacube.testutils.io import RasterFileDataSource
 from datacube.storage import BandInfo
 from datacube.drivers.netcdf import create_netcdf_storage_unit, write_dataset_to_netcdf, Variable
 from datacube.storage import reproject_and_fuse
-from datacube.storage._rio import RasterDatasetDataSource
+from datacube.storage._rio import RasterDatasetDataSource, _HDF5_LOCK
+from datacube.drivers.netcdf._write import write_variable
 from datacube.storage._read import read_time_slice
 from datacube.utils.geometry import GeoBox
 
@@ -44,6 +46,43 @@ def test_write_dataset_to_netcdf(tmpnetcdf_filename, odc_style_xr_dataset):
         assert var.getncattr('abc') == 'xyz'
 
 
+def test_write_dataset_to_netcdf_dask(tmpnetcdf_filename, odc_style_xr_dataset):
+    xx = odc_style_xr_dataset.chunk({'latitude': 30, 'longitude': 45})
+    assert xx.B10.chunks is not None
+
+    write_dataset_to_netcdf(xx, tmpnetcdf_filename,
+                            variable_params={'B10': {'zlib': True, 'chunksizes': (15, 45)}})
+
+    with netCDF4.Dataset(tmpnetcdf_filename) as nco:
+        nco.set_auto_mask(False)
+        var = nco.variables['B10']
+        assert var.chunking() == [15, 45]
+        assert (var[:] == odc_style_xr_dataset['B10'].values).all()
+
+
+def test_write_variable_holds_hdf5_lock():
+    import dask.array as da
+
+    class FakeVariable:
+        def __init__(self):
+            self.locked = []
+
+        def __setitem__(self, roi, value):
+            # lock should not be available to other threads while writing
+            acquired = []
+            t = Thread(target=lambda: acquired.append(_HDF5_LOCK.acquire(blocking=False)))
+            t.start()
+            t.join()
+            self.locked.append(not acquired[0])
+
+    xx = np.arange(12, dtype='int16').reshape(3, 4)
+    for data in (xx, da.from_array(xx, chunks=(2, 2))):
+        ncvar = FakeVariable()
+        write_variable(ncvar, data)
+        assert len(ncvar.locked) > 0
+        assert all(ncvar.locked)
+
+
 def test_first_source_is_priority_in_reproject_and_fuse():
     crs = epsg4326
     shape = (2, 2)
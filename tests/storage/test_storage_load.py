@@ -4,7 +4,10 @@
 import numpy as np
 
 from datacube.storage._load import (
-    xr_load, _default_fuser
+    xr_load, _default_fuser,
+    scratch_buffer,
+    fuse_first_valid_int,
+    fuse_first_valid_float,
 )
 
 from datacube.api.core import Datacube
@@ -39,6 +42,46 @@ def test_default_fuser():
     assert np.all(dest == src1)
 
 
+def test_first_valid_fusers():
+    dest = np.array([[-1, 2], [-1, -1]], dtype='int16')
+    fuse_first_valid_int(dest, np.array([[3, 3], [-1, 4]], dtype='int16'), -1)
+    assert dest.tolist() == [[3, 2], [-1, 4]]
+
+    fuse_first_valid_int(dest, np.full((2, 2), 7, dtype='int16'), None)
+    assert dest.tolist() == [[3, 2], [-1, 4]]
+
+    dest = np.array([[np.nan, 2], [-1, -1]], dtype='float32')
+    fuse_first_valid_float(dest, np.array([[3, 3], [5, np.nan]], dtype='float32'), -1)
+    np.testing.assert_array_equal(dest, [[3, 2], [5, np.nan]])
+
+    fuse_first_valid_float(dest, np.full((2, 2), 7, dtype='float32'), np.nan)
+    np.testing.assert_array_equal(dest, [[3, 2], [5, 7]])
+
+
+def test_scratch_buffer():
+    import threading
+
+    a = scratch_buffer('test', (10, 20), 'int16')
+    assert a.shape == (10, 20)
+    assert a.dtype == np.int16
+
+    b = scratch_buffer('test', (5, 3), 'int16')
+    assert b.shape == (5, 3)
+    assert np.shares_memory(a, b)
+
+    assert not np.shares_memory(a, scratch_buffer('test', (10, 20), 'float32'))
+    assert not np.shares_memory(a, scratch_buffer('other', (10, 20), 'int16'))
+
+    c = scratch_buffer('test', (100, 20), 'int16')
+    assert c.shape == (100, 20)
+
+    other_thread = []
+    t = threading.Thread(target=lambda: other_thread.append(scratch_buffer('test', (5, 3), 'int16')))
+    t.start()
+    t.join()
+    assert not np.shares_memory(c, other_thread[0])
+
+
 def test_new_xr_load(data_folder):
     base = "file://" + str(data_folder) + "/metadata.yml"
 
@@ -76,3 +119,111 @@ def test_new_xr_load(data_folder):
 
     np.testing.assert_array_equal(im[0], xx.a.values[0])
     np.testing.assert_array_equal(im[1], xx.b.values[0])
+
+
+def test_xr_load_concurrent(data_folder):
+    base = "file://" + str(data_folder) + "/metadata.yml"
+
+    rdr = mk_rio_driver()
+
+    band_a = dict(name='a', path='test.tif')
+    band_b = dict(name='b', band=2, path='test.tif')
+
+    dss = [mk_sample_dataset([band_a, band_b], base,
+                             id='3a1df9e0-8484-44fc-8102-79184eab85d{}'.format(i),
+                             timestamp='2018-06-2{}'.format(i // 2))
+           for i in range(5)]
+
+    sources = Datacube.group_datasets(dss, 'time')
+    assert sources.shape == (3,)
+
+    _, meta = rio_slurp(str(data_folder) + '/test.tif')
+    measurements = [dss[0].type.measurements[n] for n in ('a', 'b')]
+
+    xx, _ = xr_load(sources, meta.gbox, measurements, rdr)
+    yy, _ = xr_load(sources, meta.gbox, measurements, rdr, max_in_flight=3)
+
+    assert xx.a.shape == yy.a.shape
+    np.testing.assert_array_equal(xx.a.values, yy.a.values)
+    np.testing.assert_array_equal(xx.b.values, yy.b.values)
+
+
+def test_xr_load_concurrent_reads_overlap(data_folder):
+    import threading
+    from concurrent.futures import Future
+
+    base = "file://" + str(data_folder) + "/metadata.yml"
+    band_a = dict(name='a', path='test.tif')
+    dss = [mk_sample_dataset([band_a], base,
+                             id='3a1df9e0-8484-44fc-8102-79184eab85d{}'.format(i))
+           for i in range(2)]
+
+    sources = Datacube.group_datasets(dss, 'time')
+    assert sources.shape == (1,)
+
+    _, meta = rio_slurp(str(data_folder) + '/test.tif')
+    measurements = [dss[0].type.measurements['a']]
+
+    # Neither read can finish until the other one has started
+    both_reading = threading.Barrier(2, timeout=10)
+
+    class BlockingReader(object):
+        def __init__(self, rdr):
+            self._rdr = rdr
+
+        def __getattr__(self, name):
+            return getattr(self._rdr, name)
+
+        def read(self, *args, **kwargs):
+            both_reading.wait()
+            return self._rdr.read(*args, **kwargs)
+
+    class BlockingDriver(object):
+        def __init__(self, driver):
+            self._driver = driver
+
+        def new_load_context(self, bands, old_ctx):
+            return self._driver.new_load_context(bands, old_ctx)
+
+        def open(self, band, ctx):
+            fut = Future()
+            fut.set_result(BlockingReader(self._driver.open(band, ctx).result()))
+            return fut
+
+    xx, _ = xr_load(sources, meta.gbox, measurements, mk_rio_driver())
+    yy, _ = xr_load(sources, meta.gbox, measurements, BlockingDriver(mk_rio_driver()), max_in_flight=2)
+
+    assert not both_reading.broken
+    np.testing.assert_array_equal(xx.a.values, yy.a.values)
+
+
+def test_run_bounded():
+    from concurrent.futures import ThreadPoolExecutor
+    from datacube.storage._load import _run_bounded
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        rr = [(job, fut.result()) for job, fut in _run_bounded(lambda x: pool.submit(lambda: x*10), range(7), 2)]
+
+    assert sorted(rr) == [(i, i*10) for i in range(7)]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert list(_run_bounded(pool.submit, [], 2)) == []
+
+    # completed jobs held by the caller count towards the limit
+    held = []
+    submitted = []
+    n_released = [0]
+
+    def submit(x):
+        assert len(submitted) - n_released[0] < 3
+        submitted.append(x)
+        return pool.submit(lambda: x)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for _, fut in _run_bounded(submit, range(10), 3, lambda: len(held)):
+            held.append(fut.result())
+            if len(held) == 3 or len(submitted) == 10:
+                n_released[0] += len(held)
+                del held[:]
+
+    assert sorted(submitted) == list(range(10))
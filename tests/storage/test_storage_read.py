@@ -35,6 +35,31 @@ def test_pick_read_scale():
     assert pick_read_scale(1.99999) == 2
 
 
+def test_pick_read_scale_overviews():
+    from types import SimpleNamespace
+
+    rdr = SimpleNamespace(overviews=(2, 4, 8, 16, 32))
+    assert pick_read_scale(0.7, rdr) == 1
+    assert pick_read_scale(1.3, rdr) == 1
+    assert pick_read_scale(2.2, rdr) == 2
+    assert pick_read_scale(4, rdr) == 4
+    assert pick_read_scale(15.9999, rdr) == 16
+    assert pick_read_scale(17, rdr) == 16
+    assert pick_read_scale(35.1, rdr) == 32
+
+    # in between levels: not close enough to snap down to an overview
+    assert pick_read_scale(3.2, rdr) == 3
+    assert pick_read_scale(12, rdr) == 12
+    assert pick_read_scale(37, rdr) == 37
+    assert pick_read_scale(37, rdr, ovr_tol=0.2) == 32
+
+    rdr = SimpleNamespace(overviews=(4, 8))
+    assert pick_read_scale(3, rdr) == 3
+    assert pick_read_scale(7.5, rdr) == 7
+
+    assert pick_read_scale(7.5, SimpleNamespace(overviews=())) == 7
+
+
 def test_can_paste():
     src = AlbersGS.tile_geobox((17, -40))
 
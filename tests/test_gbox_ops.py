@@ -163,6 +163,15 @@ def test_gbox_tiles():
 
     assert list(tt.tiles(gbox[:h, :w].extent)) == [(0, 0)]
 
+    # compare against tile by tile intersection check
+    poly = geometry.polygon([(-3.3, 2.5), (12.7, 0.4), (30, 8.6), (5.1, 14.2), (-3.3, 2.5)], epsg3857)
+    expect = [idx for idx in np.ndindex(tt.shape) if tt[idx].extent.intersects(poly)]
+    assert list(tt.tiles(poly)) == expect
+    assert tt.tiles_mask(poly).sum() == len(expect)
+
+    poly = poly.to_crs(geometry.CRS('EPSG:4326'))
+    assert list(tt.tiles(poly)) == expect
+
     (H, W) = (11, 22)
     (h, w) = (10, 20)
     tt = gbx.GeoboxTiles(GeoBox(W, H, A, epsg3857), (h, w))
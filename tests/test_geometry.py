@@ -9,6 +9,9 @@ from datacube.utils.geometry import (
     GeoBox,
     BoundingBox,
     bbox_union,
+    bboxes_union,
+    bboxes_intersect,
+    batch_to_crs,
     decompose_rws,
     affine_from_pts,
     get_scale_at_point,
@@ -107,6 +110,10 @@ def test_props():
     assert bool(pt) is True
     assert pt.__nonzero__() is True
 
+    wkb = box1.wkb
+    assert isinstance(wkb, bytes)
+    assert osgeo.ogr.CreateGeometryFromWkb(wkb).Equal(box1._geom)
+
 
 def test_tests():
     box1 = geometry.box(10, 10, 30, 30, crs=epsg4326)
@@ -199,6 +206,52 @@ def test_bbox_union():
     bb = bbox_union(iter([b2, b1]*10))
     assert bb == BoundingBox(0, 1, 11, 22)
 
+    bbs = np.asarray([b1, b2, [np.nan]*4])
+    assert bboxes_union(bbs) == BoundingBox(0, 1, 11, 22)
+    assert bboxes_union(bbs[:0]) == bbox_union([])
+
+    assert bboxes_intersect(bbs, BoundingBox(10.5, 7, 12, 8)).tolist() == [False, True, False]
+    assert bboxes_intersect(bbs, BoundingBox(-1, 0, 1, 2)).tolist() == [True, False, False]
+    assert bboxes_intersect(bbs, BoundingBox(20, 20, 30, 30)).tolist() == [False, False, False]
+
+    # touching boxes are kept, same as `intersects`
+    assert bboxes_intersect(bbs, BoundingBox(10, 1, 12, 2)).tolist() == [True, False, False]
+    assert bboxes_intersect(bbs, BoundingBox(10.5, 22, 12, 30)).tolist() == [False, True, False]
+    assert bboxes_intersect(bbs, BoundingBox(11, 22, 12, 23)).tolist() == [False, True, False]
+    assert bboxes_intersect(bbs, BoundingBox(-5, -5, 0, 1)).tolist() == [True, False, False]
+
+
+def test_batch_to_crs():
+    geoms = [geometry.box(1, 2, 10, 20, epsg3577),
+             geometry.polygon([(0, 0), (3, 0), (3, 3), (0, 3), (0, 0)], epsg3577,
+                              [(1, 1), (2, 1), (2, 2), (1, 1)]),
+             geometry.box(130, -30, 131, -29, epsg4326),
+             geometry.multipolygon([[[(0, 0), (1, 0), (1, 1), (0, 0)]],
+                                    [[(5, 5), (6, 5), (6, 6), (5, 5)]]], epsg3577),
+             geometry.point(10, 20, epsg3577),
+             geometry.box(-1, -2, 0, 3, epsg4326)]
+
+    for crs in (epsg4326, epsg3857):
+        out, bbs = batch_to_crs(geoms, crs)
+        assert len(out) == len(geoms)
+        assert bbs.shape == (len(geoms), 4)
+
+        for g, g_, bb in zip(geoms, out, bbs):
+            expect = g.to_crs(crs)
+            assert g_.crs == crs
+            assert g_.type == expect.type
+            assert np.allclose(bb, expect.boundingbox)
+            assert np.allclose(g_.boundingbox, expect.boundingbox)
+            assert g_.area == pytest.approx(expect.area)
+
+    out, bbs = batch_to_crs(geoms[2:3], epsg4326)
+    assert out[0] is geoms[2]
+    assert bbs.tolist() == [[130, -30, 131, -29]]
+
+    out, bbs = batch_to_crs([], epsg4326)
+    assert out == []
+    assert bbs.shape == (0, 4)
+
 
 def test_unary_union():
     box1 = geometry.box(10, 10, 30, 30, crs=epsg4326)
@@ -499,6 +552,10 @@ def test_geobox():
     assert gbox.buffered(10, 0).shape == (gbox.height + 2*1, gbox.width)
     assert gbox.buffered(30, 20).shape == (gbox.height + 2*3, gbox.width + 2*2)
 
+    assert hash(gbox) == hash(geometry.GeoBox(w, h, A, epsg3577))
+    assert hash(gbox[:, :]) == hash(gbox)
+    assert len({gbox, gbox[:, :], g2}) == 2
+
 
 @pytest.mark.xfail(tuple(int(i) for i in osgeo.__version__.split('.')) < (2, 2),
                    reason='Fails under GDAL 2.1')
@@ -636,6 +693,20 @@ def test_crs():
         assert 'Not a valid CRS:' in str(e)
 
 
+def test_crs_interned():
+    from datacube.utils.geometry._base import mk_osr_point_transform
+    CRS = geometry.CRS
+
+    assert CRS('EPSG:3577') is CRS('EPSG:3577')
+    assert CRS(epsg3577) is epsg3577
+    assert pickle.loads(pickle.dumps(epsg3577)) is CRS('EPSG:3577')
+    assert str(CRS('epsg:3577')) == 'epsg:3577'
+
+    tr = mk_osr_point_transform(epsg4326, epsg3577)
+    assert tr is mk_osr_point_transform(CRS('EPSG:4326'), CRS('EPSG:3577'))
+    assert tr is not mk_osr_point_transform(epsg3577, epsg4326)
+
+
 def test_polygon_path():
     from datacube.utils.geometry.tools import polygon_path
 
@@ -651,6 +722,35 @@ def test_polygon_path():
     assert set(pp[1].ravel()) == {2, 3}
 
 
+def test_polygon_grid_mask():
+    from datacube.utils.geometry import polygon_grid_mask
+    import numpy as np
+
+    xe, ye = np.arange(0, 11), np.arange(0, 6)
+
+    sq = np.array([[2.5, 1.2], [4.5, 1.2], [4.5, 3.7], [2.5, 3.7]])
+    mm = polygon_grid_mask([sq], xe, ye)
+    assert mm.shape == (5, 10)
+    assert mm[1:4, 2:5].all()
+    assert mm.sum() == 9
+
+    assert not polygon_grid_mask([sq + 100], xe, ye).any()
+    assert not polygon_grid_mask([], xe, ye).any()
+
+    # cells fully inside outer ring are included, cells inside the hole are not
+    outer = np.array([[-1, -1], [20, -1], [20, 20], [-1, 20]])
+    hole = np.array([[3.2, 1.2], [6.8, 1.2], [6.8, 3.8], [3.2, 3.8]])
+    mm = polygon_grid_mask([outer, hole], xe, ye)
+    assert mm.sum() == 50 - 2
+    assert not mm[2, 4:6].any()
+
+    # touching counts, non-uniform edges
+    tt = np.array([[0, 0], [2, 0], [2, 1], [0, 1], [0, 0]])
+    mm = polygon_grid_mask([tt], [0, 1, 2, 2.5, 7], [0, 1, 3])
+    assert mm.tolist() == [[True, True, True, False],
+                           [True, True, True, False]]
+
+
 def test_gbox_boundary():
     from datacube.utils.geometry.tools import gbox_boundary
     import numpy as np
@@ -997,6 +1097,58 @@ def test_compute_reproject_roi():
     assert roi_shape(rr.roi_dst) == src[roi_].shape
 
 
+def test_compute_reproject_roi_cached():
+    src = AlbersGS.tile_geobox((15, -40))
+    dst = src[10:-10, 10:-10]
+
+    compute_reproject_roi.cache_clear()
+    assert compute_reproject_roi.cache_info().hits == 0
+
+    rr1 = compute_reproject_roi(src, dst)
+    rr2 = compute_reproject_roi(AlbersGS.tile_geobox((15, -40)), src[10:-10, 10:-10])
+
+    info = compute_reproject_roi.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    assert rr1 is not rr2
+    assert rr1.roi_src == rr2.roi_src
+    assert rr1.roi_dst == rr2.roi_dst
+
+    # callers may modify returned value without affecting the cache
+    rr1.roi_src = np.s_[0:1, 0:1]
+    assert compute_reproject_roi(src, dst).roi_src == rr2.roi_src
+
+    compute_reproject_roi(src, dst, padding=0)
+    assert compute_reproject_roi.cache_info().currsize == 2
+
+
+def test_compute_reproject_roi_cached_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    from datacube.utils.geometry.tools import _REPROJECT_ROI_CACHE
+
+    src = AlbersGS.tile_geobox((15, -40))
+    dst = GeoBox.from_geopolygon(src.extent.to_crs(epsg4326), resolution=(-0.001, 0.001))
+
+    compute_reproject_roi.cache_clear()
+    rr = compute_reproject_roi(src, dst)
+    assert rr.transform.linear is None
+
+    # cached entries don't hold OGR transformers, every thread gets its own
+    assert all('transform' not in entry for entry in _REPROJECT_ROI_CACHE._cache.values())
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        rr2 = pool.submit(compute_reproject_roi, src, dst).result()
+
+    assert compute_reproject_roi.cache_info().hits == 1
+    assert rr2.roi_src == rr.roi_src
+    assert rr2.roi_dst == rr.roi_dst
+    assert rr2.transform is not rr.transform
+
+    pts = [(0, 0), (10, 20)]
+    np.testing.assert_allclose(rr2.transform(pts), rr.transform(pts))
+    np.testing.assert_allclose(rr2.transform.back(rr2.transform(pts)), pts, atol=1e-6)
+
+
 def test_compute_reproject_roi_issue647():
     """ In some scenarios non-overlapping geoboxes will result in non-empty
     `roi_dst` even though `roi_src` is empty.
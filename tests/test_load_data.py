@@ -178,6 +178,82 @@ def test_load_data_cbk(tmpdir):
     assert progress_call_data == [(1, 4), (2, 4)]
 
 
+def test_load_data_threads(tmpdir):
+    from datacube.api import TerminateCurrentLoad
+
+    tmpdir = Path(str(tmpdir))
+
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+
+    nodata = -999
+    aa = mk_test_image(96, 64, 'int16', nodata=nodata)
+
+    bands = [SimpleNamespace(name=name, values=aa, nodata=nodata)
+             for name in ['aa', 'bb']]
+
+    dss, gboxes = zip(*[gen_tiff_dataset(bands,
+                                         tmpdir,
+                                         prefix='ds{}-'.format(i),
+                                         timestamp='2018-07-1{}'.format(i),
+                                         **spatial)
+                        for i in range(3)])
+    gbox = gboxes[0]
+
+    sources = Datacube.group_datasets(dss, 'time')
+    assert sources.shape == (3,)
+
+    progress_call_data = []
+
+    def progress_cbk(n, nt):
+        progress_call_data.append((n, nt))
+
+    ds_data = Datacube.load_data(sources, gbox, dss[0].type.measurements,
+                                 progress_cbk=progress_cbk, threads=3)
+
+    assert progress_call_data == [(n, 6) for n in range(1, 7)]
+    assert 'dc_partial_load' not in ds_data.attrs
+    for i in range(3):
+        np.testing.assert_array_equal(aa, ds_data.aa.values[i])
+        np.testing.assert_array_equal(aa, ds_data.bb.values[i])
+
+    def progress_cbk_fail_early(n, nt):
+        raise TerminateCurrentLoad()
+
+    ds_data = Datacube.load_data(sources, gbox, dss[0].type.measurements,
+                                 progress_cbk=progress_cbk_fail_early, threads=2)
+    assert ds_data.dc_partial_load is True
+
+
+def test_load_data_dask_time_chunks(tmpdir):
+    tmpdir = Path(str(tmpdir))
+
+    spatial = dict(resolution=(15, -15),
+                   offset=(11230, 1381110),)
+
+    nodata = -999
+    aa = mk_test_image(96, 64, 'int16', nodata=nodata)
+
+    dss, gboxes = zip(*[gen_tiff_dataset(SimpleNamespace(name='aa', values=aa, nodata=nodata),
+                                         tmpdir,
+                                         prefix='ds{}-'.format(i),
+                                         timestamp='2018-07-1{}'.format(i),
+                                         **spatial)
+                        for i in range(3)])
+    gbox = gboxes[0]
+    sources = Datacube.group_datasets(dss, 'time')
+    mm = [dss[0].type.measurements['aa']]
+
+    xx = Datacube.load_data(sources, gbox, mm, dask_chunks={'time': 2, 'x': 48})
+    assert xx.aa.data.chunks == ((2, 1), (64,), (48, 48))
+    # one task per output block, no rechunking
+    assert len([k for k in xx.aa.data.__dask_graph__() if k[0] == xx.aa.data.name]) == 4
+
+    xx = xx.load()
+    for i in range(3):
+        np.testing.assert_array_equal(aa, xx.aa.values[i])
+
+
 def test_hdf5_lock_release_on_failure():
     from datacube.storage._rio import RasterDatasetDataSource, _HDF5_LOCK
     from datacube.storage import BandInfo
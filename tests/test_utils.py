@@ -20,7 +20,7 @@ from hypothesis import given
 from hypothesis.strategies import integers, text
 from pandas import to_datetime
 
-from datacube.helpers import write_geotiff
+from datacube.helpers import write_geotiff, write_cog, write_cogs
 from datacube.model import MetadataType
 from datacube.model.utils import xr_apply, traverse_datasets, flatten_datasets, dedup_lineage
 from datacube.testutils import mk_sample_product, make_graph_abcde, gen_dataset_test_dag, dataset_maker
@@ -257,6 +257,70 @@ def test_write_geotiff_str_crs(tmpdir, odc_style_xr_dataset):
         write_geotiff(filename, odc_style_xr_dataset)
 
 
+def test_write_cog(tmpdir, odc_style_xr_dataset):
+    import dask.array as da
+
+    expect = odc_style_xr_dataset['B10'].values
+
+    filename = tmpdir/'test-cog.tif'
+    write_cog(filename, odc_style_xr_dataset, overview_levels=[2, 4])
+    assert filename.exists()
+    assert [f.basename for f in tmpdir.listdir()] == ['test-cog.tif']
+
+    with rasterio.open(str(filename)) as src:
+        assert src.overviews(1) == [2, 4]
+        assert (src.read(1) == expect).all()
+
+    # dask input is written chunk by chunk
+    xx = odc_style_xr_dataset.chunk({'latitude': 30, 'longitude': 45})
+    assert isinstance(xx.B10.data, da.Array)
+
+    filename = tmpdir/'test-cog-dask.tif'
+    write_cog(filename, xx, overview_resampling='average', blocks_in_flight=2)
+
+    with rasterio.open(str(filename)) as src:
+        assert src.overviews(1) == [2, 4, 8]  # until overview fits into one 16x16 block
+        assert (src.read(1) == expect).all()
+
+    with pytest.raises(ValueError):
+        write_cog(filename, xx, blocks_in_flight=0)
+
+    # source chunks that don't line up with tiff blocks are still computed once
+    computed = []
+
+    def count(block, block_info=None):
+        computed.append(tuple(block_info[0]['chunk-location']))
+        return block
+
+    xx = odc_style_xr_dataset.chunk({'latitude': 7, 'longitude': 9})
+    xx['B10'].data = xx.B10.data.map_blocks(count, dtype=xx.B10.dtype)
+
+    filename = tmpdir/'test-cog-unaligned.tif'
+    write_cog(filename, xx, blocks_in_flight=1)
+    assert len(computed) == len(set(computed)) == xx.B10.data.npartitions
+
+    with rasterio.open(str(filename)) as src:
+        assert (src.read(1) == expect).all()
+
+
+def test_write_cogs(tmpdir, odc_style_xr_dataset):
+    xx = odc_style_xr_dataset.chunk({'latitude': 30, 'longitude': 45})
+    expect = odc_style_xr_dataset['B10'].values
+
+    outputs = [(tmpdir/'tile-{}.tif'.format(i), xx) for i in range(3)]
+    assert write_cogs(outputs, threads=2, overview_levels=[2]) == [filename for filename, _ in outputs]
+
+    for filename, _ in outputs:
+        with rasterio.open(str(filename)) as src:
+            assert src.overviews(1) == [2]
+            assert (src.read(1) == expect).all()
+
+    assert write_cogs([]) == []
+
+    with pytest.raises(ValueError):
+        write_cogs(outputs, threads=0)
+
+
 def test_write_geotiff_time_index_deprecated():
     """The `time_index` parameter to `write_geotiff()` was a poorly thought out addition and is now deprecated."""
 
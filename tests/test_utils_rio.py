@@ -7,6 +7,7 @@ from datacube.utils.rio import (
     get_rio_env,
     set_default_rio_config,
     activate_from_config,
+    RioHandlePool,
 )
 
 
@@ -121,3 +122,44 @@ def test_rio_env_via_config():
 
     deactivate_rio_env()
     assert get_rio_env() == {}
+
+
+def test_rio_handle_pool(data_folder):
+    fname = str(data_folder) + '/test.tif'
+    pool = RioHandlePool(max_size=1, max_age=None)
+
+    with pool.checkout(fname) as src:
+        assert src.count == 2
+        # handle is exclusive while checked out, so this opens another one
+        with pool.checkout(fname) as src2:
+            assert src2 is not src
+
+    st = pool.stats()
+    assert (st.hits, st.misses, st.evictions, st.idle) == (0, 2, 1, 1)
+
+    with pool.checkout(fname) as src3:
+        assert src3 is src
+
+    assert pool.stats().hits == 1
+
+    # failure inside the block closes handle instead of returning it
+    with pytest.raises(ValueError):
+        with pool.checkout(fname) as src:
+            raise ValueError()
+    assert src.closed
+    assert pool.stats().idle == 0
+
+    # expired handles are not reused
+    pool = RioHandlePool(max_size=4, max_age=0)
+    with pool.checkout(fname) as src:
+        pass
+    with pool.checkout(fname) as src2:
+        assert src2 is not src
+    assert src.closed
+
+    st = pool.stats()
+    assert (st.hits, st.misses, st.evictions) == (0, 2, 1)
+
+    pool.clear()
+    assert src2.closed
+    assert pool.stats().idle == 0
@@ -2,7 +2,7 @@ import numpy as np
 from affine import Affine
 import rasterio
 from datacube.utils.geometry import warp_affine, rio_reproject, gbox as gbx
-from datacube.utils.geometry._warp import resampling_s2rio, is_resampling_nn
+from datacube.utils.geometry._warp import resampling_s2rio, is_resampling_nn, warp_affine_np, warp_affine_rio
 
 from datacube.testutils.geom import (
     AlbersGS,
@@ -69,6 +69,51 @@ def test_warp():
     assert (dst[:, 20:] == -3).all()
 
 
+def test_warp_np():
+    import pytest
+
+    src = np.arange(12*16, dtype='int16').reshape(12, 16) % 7
+    src[:3, :5] = -2
+
+    for A, resampling, shape in [(Affine.translation(3, 2), 'nearest', (6, 8)),
+                                 (Affine.translation(-5, 4.3), 'nearest', (6, 8)),
+                                 (Affine.scale(2), 'nearest', (6, 8)),
+                                 (Affine.scale(4), 'average', (3, 4)),
+                                 (Affine.scale(2), 'mode', (6, 8)),
+                                 (Affine.translation(16, 0)*Affine.scale(-2, 2), 'average', (6, 8)),
+                                 (Affine.translation(0, 12)*Affine.scale(2, -2), 'mode', (5, 7))]:
+        # rounding of exact ties when averaging integers differs between GDAL versions
+        src_ = src.astype('float32') if resampling == 'average' else src
+
+        for nodata in (None, -2):
+            dst_np = np.full(shape, 100, dtype=src_.dtype)
+            dst_rio = dst_np.copy()
+
+            assert warp_affine_np(src_, dst_np, A, resampling,
+                                  src_nodata=nodata, dst_nodata=nodata) is dst_np
+            warp_affine_rio(src_, dst_rio, A, resampling,
+                            src_nodata=nodata, dst_nodata=nodata)
+            np.testing.assert_allclose(dst_np, dst_rio, rtol=1e-6)
+
+    # not supported: numpy backend declines and leaves dst untouched
+    dst = np.full((6, 8), 100, dtype='int16')
+    for A, resampling in [(Affine.scale(2), 'bilinear'),
+                          (Affine.scale(1.5), 'nearest'),
+                          (Affine.rotation(10), 'nearest'),
+                          (Affine.translation(0.5, 0)*Affine.scale(2), 'average'),
+                          (Affine.translation(-1, 0)*Affine.scale(2), 'average')]:
+        assert warp_affine_np(src, dst, A, resampling) is None
+    assert (dst == 100).all()
+
+    # warp_affine picks numpy or GDAL backend as needed
+    for A in (Affine.scale(2), Affine.scale(1.5)):
+        dst = np.zeros((6, 8), dtype='float32')
+        expect = np.zeros_like(dst)
+        assert warp_affine(src.astype('float32'), dst, A, 'average') is dst
+        warp_affine_rio(src.astype('float32'), expect, A, 'average')
+        assert dst == pytest.approx(expect)
+
+
 def test_rio_reproject():
     src = np.zeros((128, 256),
                    dtype='int16')
@@ -171,3 +171,49 @@ def test_run_tasks():
     run_tasks(tasks, executor, task_func, process_result_func)
 
     assert not tasks_to_do
+
+
+def test_task_ledger(tmpdir):
+    import pytest
+    from datacube.ui.task_app import TaskLedger
+
+    filename = str(tmpdir.join('ledger.db'))
+
+    with TaskLedger(filename) as ledger:
+        assert ledger.get_meta('config') is None
+        assert ledger.get_meta('config', {}) == {}
+        ledger.set_meta('config', {'a': [1, 2]})
+
+        assert ledger.lookup('1,2') is None
+        for i in range(3):
+            ledger.add('{},2'.format(i), 'fp{}'.format(i), {'tile_index': (i, 2)})
+
+        assert ledger.lookup('1,2') == ('fp1', TaskLedger.PLANNED)
+        assert ledger.get_task('1,2') == {'tile_index': (1, 2)}
+        assert ledger.get_task('no-such-task') is None
+
+        ledger.set_state(['0,2'], TaskLedger.RUNNING)
+        ledger.set_state(['1,2'], TaskLedger.WRITTEN, result='result')
+
+        with pytest.raises(ValueError):
+            ledger.set_state(['0,2'], 'bad-state')
+
+    # state persists between sessions
+    with TaskLedger(filename) as ledger:
+        assert ledger.get_meta('config') == {'a': [1, 2]}
+        assert ledger.counts() == {'planned': 1, 'running': 1, 'written': 1, 'indexed': 0, 'failed': 0}
+        pending = ledger.tasks(TaskLedger.PLANNED, TaskLedger.RUNNING)
+        assert [task['tile_index'] for task in pending] == [(0, 2), (2, 2)]
+        assert list(ledger.results()) == [('1,2', 'result')]
+
+        ledger.set_state(['1,2'], TaskLedger.INDEXED, result='ignored')
+        assert list(ledger.results()) == []
+        assert ledger.lookup('1,2') == ('fp1', TaskLedger.INDEXED)
+
+        # re-adding resets state
+        ledger.add('1,2', 'fp1b', {'tile_index': (1, 2)})
+        assert ledger.lookup('1,2') == ('fp1b', TaskLedger.PLANNED)
+
+        ledger.clear()
+        assert ledger.counts()[TaskLedger.PLANNED] == 0
+        assert ledger.get_meta('config') is None